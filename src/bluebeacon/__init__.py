@@ -4,6 +4,12 @@ BlueBeacon automatically detects server settings and pings the server to verify
 responsiveness, making it easy to monitor containerized Minecraft servers.
 """
 
-from importlib.metadata import version
 
-__version__ = version("bluebeacon")
+def __getattr__(name: str) -> str:
+    # Reading the package metadata is slow, so it only happens for --version
+    if name == "__version__":
+        from importlib.metadata import version
+
+        return version("bluebeacon")
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,106 @@
+"""Proxy backend checks for BlueBeacon.
+
+This module pings the backend servers listed in a proxy config together with the
+proxy itself.
+"""
+
+import ipaddress
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from bluebeacon import resolver
+from bluebeacon.ping import PingResult
+
+# Pings a server given its address, port and server type
+Pinger = Callable[[ipaddress.IPv4Address | ipaddress.IPv6Address, int, str], PingResult]
+
+
+@dataclass(frozen=True)
+class BackendResult:
+    """Outcome of pinging one backend.
+
+    Attributes:
+        name: Name of the backend in the proxy config.
+        host: Host of the backend as written in the proxy config.
+        port: Port of the backend.
+        result: The outcome of the ping, or None if the host could not be resolved.
+        error: Why the host could not be resolved.
+    """
+
+    name: str
+    host: str
+    port: int
+    result: Optional[PingResult] = None
+    error: Optional[str] = None
+
+    @property
+    def success(self) -> bool:
+        """Whether the backend responded."""
+        return self.result is not None and self.result.success
+
+
+def resolve_host(
+    host: str, deadline: Optional[float] = None
+) -> ipaddress.IPv4Address | ipaddress.IPv6Address:
+    """Resolve a backend host to the first address it has.
+
+    Host names, such as the names of containers, are resolved through
+    ``bluebeacon.resolver``, so the resolver is only asked once its last answer has
+    expired and never for longer than the resolve timeout, or than what is left
+    until the ``deadline``, a ``time.monotonic()``.
+
+    Raises:
+        OSError: If the host could not be resolved.
+    """
+    try:
+        return ipaddress.ip_address(host)
+    except ValueError:
+        return resolver.resolve(host, resolver.timeout_until(deadline))
+
+
+def probe_with_backends(
+    proxy: Tuple[ipaddress.IPv4Address | ipaddress.IPv6Address, int],
+    server_type: str,
+    backends: Sequence[Tuple[str, str, int]],
+    pinger: Pinger,
+    concurrency: int,
+    deadline: Optional[float] = None,
+    proxy_pinger: Optional[Pinger] = None,
+) -> Tuple[PingResult, List[BackendResult]]:
+    """Ping a proxy and all of its backends concurrently.
+
+    Backends are resolved and pinged by a pool of at most ``concurrency`` threads,
+    so proxies with thousands of backends don't start a thread for each. Backends
+    are always Java servers, while the proxy is pinged as ``server_type``.
+
+    Args:
+        proxy: The address and port of the proxy.
+        server_type: Either "both", "java" or "bedrock", used for the proxy.
+        backends: The name, host and port of every backend.
+        pinger: Pings a single server.
+        concurrency: Maximum number of servers pinged at the same time.
+        deadline: ``time.monotonic()`` by which backend host names must be resolved.
+        proxy_pinger: Pings the proxy, if it needs other settings than the backends,
+            such as its query port. Defaults to ``pinger``.
+
+    Returns:
+        The outcome for the proxy and one result per backend, in the same order.
+    """
+
+    def probe_backend(backend: Tuple[str, str, int]) -> BackendResult:
+        name, host, port = backend
+        try:
+            address = resolve_host(host, deadline)
+        except (OSError, ValueError) as exc:
+            return BackendResult(name, host, port, error=str(exc))
+
+        return BackendResult(name, host, port, pinger(address, port, "java"))
+
+    with ThreadPoolExecutor(
+        max_workers=min(len(backends) + 1, concurrency)
+    ) as executor:
+        proxy_result = executor.submit(proxy_pinger or pinger, *proxy, server_type)
+        backend_results = list(executor.map(probe_backend, backends))
+
+        return proxy_result.result(), backend_results
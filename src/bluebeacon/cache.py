@@ -0,0 +1,171 @@
+"""Parsed server config cache for BlueBeacon.
+
+This module stores the result of parsing a server config, or the Geyser config next to
+it, on disk, so that checks can skip parsing while the config file stays unchanged.
+"""
+
+import ipaddress
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from bluebeacon import detector, state
+from bluebeacon.detector import GeyserConfig, ServerConfig
+
+CACHE_VERSION = 5
+
+FileKey = Tuple[str, int, int, int]
+
+
+def file_key(config_file: Path) -> Optional[FileKey]:
+    """Identify the current version of a config file.
+
+    Args:
+        config_file: The config file to identify.
+
+    Returns:
+        A tuple of absolute path, inode, size and modification time in nanoseconds,
+        or None if the file could not be accessed.
+    """
+    try:
+        stat = config_file.stat()
+    except OSError:
+        return None
+
+    return str(config_file.absolute()), stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def load(key: FileKey) -> Optional[ServerConfig]:
+    """Load the cached server config of a config file.
+
+    Args:
+        key: The current key of the config file, as returned by ``file_key``.
+
+    Returns:
+        The cached server config, or None if there is no entry for exactly this
+        version of the config file. If the server binds to a host name, the address
+        is the one it resolved to when the config was parsed.
+    """
+    entry = _load_entry(key)
+    if entry is None:
+        return None
+
+    try:
+        return ServerConfig(
+            ipaddress.ip_address(entry["address"]),
+            int(entry["port"]),
+            str(entry["format"]),
+            str(entry["edition"]),
+            None if entry["host"] is None else str(entry["host"]),
+            None if entry["query_port"] is None else int(entry["query_port"]),
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def store(key: FileKey, server: ServerConfig) -> None:
+    """Store the server config parsed from a config file.
+
+    Args:
+        key: The key of the config file the result was parsed from, as returned by
+            ``file_key`` before parsing.
+        server: The parsed server config.
+
+    Raises:
+        OSError: If the cache could not be written.
+    """
+    _store_entry(
+        key,
+        {
+            "address": str(server.address),
+            "port": server.port,
+            "format": server.format,
+            "edition": server.edition,
+            "host": server.host,
+            "query_port": server.query_port,
+        },
+    )
+
+
+def load_geyser(key: FileKey) -> Optional[GeyserConfig]:
+    """Load the cached Bedrock listener of a Geyser config, like ``load``."""
+    entry = _load_entry(key)
+    if entry is None:
+        return None
+
+    try:
+        return GeyserConfig(int(entry["port"]), bool(entry["clone_remote_port"]))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def store_geyser(key: FileKey, geyser: GeyserConfig) -> None:
+    """Store the Bedrock listener parsed from a Geyser config, like ``store``.
+
+    Raises:
+        OSError: If the cache could not be written.
+    """
+    _store_entry(
+        key, {"port": geyser.port, "clone_remote_port": geyser.clone_remote_port}
+    )
+
+
+def read_geyser_config(config_file: Path) -> Optional[GeyserConfig]:
+    """Find and parse the Geyser config next to a server config, using the cache.
+
+    Failing to write the cache is ignored, it only costs parsing again.
+
+    Args:
+        config_file: The server config Geyser is installed next to.
+
+    Returns:
+        The Bedrock listener of Geyser, or None if Geyser isn't installed.
+
+    Raises:
+        OSError: If the Geyser config could not be read.
+        ValueError: If the Geyser config is invalid.
+    """
+    geyser_config = detector.find_geyser_config(config_file)
+    if geyser_config is None:
+        return None
+
+    key = file_key(geyser_config)
+    geyser = load_geyser(key) if key is not None else None
+    if geyser is None:
+        geyser = detector.parse_geyser_config(geyser_config)
+        if key is not None:
+            try:
+                store_geyser(key, geyser)
+            except OSError:
+                pass
+
+    return geyser
+
+
+def _load_entry(key: FileKey) -> Optional[Dict[str, Any]]:
+    """Load the cache entry of exactly this version of a config file."""
+    cache_file = state.state_file(key[0], "cache")
+    try:
+        with cache_file.open("rb") as f:
+            # Don't trust entries other users could have planted in a shared /tmp
+            if os.fstat(f.fileno()).st_uid != os.getuid():
+                return None
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if (
+        not isinstance(entry, dict)
+        or entry.get("version") != CACHE_VERSION
+        or entry.get("key") != list(key)
+    ):
+        return None
+
+    return entry
+
+
+def _store_entry(key: FileKey, fields: Dict[str, Any]) -> None:
+    """Write the cache entry of a config file."""
+    entry = {"version": CACHE_VERSION, "key": list(key), **fields}
+    state.write_atomic(state.state_file(key[0], "cache"), json.dumps(entry).encode())
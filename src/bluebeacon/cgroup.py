@@ -0,0 +1,130 @@
+"""CPU throttling detection for BlueBeacon.
+
+A container at its CPU quota is throttled as a whole, so the server and BlueBeacon
+stall together and a healthy server can miss the ping timeout. This module reads the
+CPU statistics of the cgroup v2 BlueBeacon runs in, so that checks can allow for the
+stalls and tell them apart from an unresponsive server:
+
+- ``cpu.stat`` counts the periods in which the cgroup ran out of its quota
+  (``nr_throttled``) and for how long (``throttled_usec``).
+- ``cpu.pressure`` reports the share of recent time in which some tasks of the cgroup
+  were waiting for a CPU (pressure stall information, PSI).
+
+Like the listener check, this only applies to servers running in the same container.
+"""
+
+import functools
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+# Percentage of the last 10 seconds with tasks waiting for a CPU from which a check
+# counts as affected by CPU starvation
+PRESSURE_THRESHOLD = 10.0
+
+# Highest pressure timeouts are scaled for, which gives at most 4 times the timeout
+MAX_PRESSURE = 75.0
+
+
+@dataclass(frozen=True)
+class CpuSample:
+    """CPU statistics of a cgroup at one point in time.
+
+    Attributes:
+        nr_throttled: Number of periods in which the cgroup used up its CPU quota.
+        throttled_usec: Microseconds the cgroup spent throttled in total.
+        pressure: Percentage of the last 10 seconds in which some tasks of the cgroup
+            waited for a CPU (PSI ``some avg10``), if known.
+    """
+
+    nr_throttled: int
+    throttled_usec: int
+    pressure: Optional[float] = None
+
+    def timeout_factor(self) -> float:
+        """Return the factor to scale timeouts by for the CPU pressure.
+
+        With tasks waiting for a CPU ``p`` percent of the time, a ping only gets to
+        run ``1 - p`` of the time, so its timeout is divided by that share.
+        """
+        if self.pressure is None:
+            return 1.0
+        return 100 / (100 - min(self.pressure, MAX_PRESSURE))
+
+    def throttled_since(self, earlier: "CpuSample") -> bool:
+        """Check whether the cgroup was throttled or starved of CPU since a sample."""
+        pressure = max(self.pressure or 0.0, earlier.pressure or 0.0)
+        return (
+            self.nr_throttled > earlier.nr_throttled or pressure >= PRESSURE_THRESHOLD
+        )
+
+
+def sample(root: Path = CGROUP_ROOT) -> Optional[CpuSample]:
+    """Read the CPU statistics of the cgroup of this process.
+
+    Args:
+        root: Where the cgroup v2 hierarchy is mounted.
+
+    Returns:
+        The statistics, or None if there is no cgroup v2 to read them from, e.g. on
+        hosts still using cgroup v1 or on other operating systems.
+    """
+    directory = _cgroup_dir(root)
+    try:
+        stat = (directory / "cpu.stat").read_bytes()
+    except OSError:
+        return None
+
+    # Without the cpu controller there is no quota and the throttling keys are missing
+    values = {}
+    for line in stat.splitlines():
+        key, _, value = line.partition(b" ")
+        if key in (b"nr_throttled", b"throttled_usec"):
+            values[key] = int(value)
+
+    return CpuSample(
+        values.get(b"nr_throttled", 0),
+        values.get(b"throttled_usec", 0),
+        _read_pressure(directory / "cpu.pressure"),
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _cgroup_dir(root: Path) -> Path:
+    """Find the directory of the cgroup this process belongs to.
+
+    Inside a container with its own cgroup namespace the cgroup is the root of the
+    hierarchy, otherwise ``/proc/self/cgroup`` has its path.
+    """
+    try:
+        with open("/proc/self/cgroup", "rb") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return root
+
+    for line in lines:
+        if line.startswith(b"0::"):
+            directory = root / line[3:].decode().lstrip("/")
+            if directory.is_dir():
+                return directory
+    return root
+
+
+def _read_pressure(path: Path) -> Optional[float]:
+    """Read the ``some avg10`` value of a PSI file, None if it's unavailable."""
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return None
+
+    for line in data.splitlines():
+        fields = line.split()
+        if fields[:1] != [b"some"]:
+            continue
+        for field in fields[1:]:
+            name, _, value = field.partition(b"=")
+            if name == b"avg10":
+                return float(value)
+    return None
@@ -1,17 +1,86 @@
 """Command-line interface for BlueBeacon.
 
 This module provides the main entry point for the BlueBeacon utility.
+
+Startup time dominates the cost of a healthcheck, so the other BlueBeacon modules are
+only imported by the commands that need them.
 """
 
+import ipaddress
+import os
+import time
+from functools import partial
 from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    NoReturn,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 
 import click
 
-from bluebeacon import __version__, detector, ping
+if TYPE_CHECKING:
+    from bluebeacon.detector import ServerConfig
+    from bluebeacon.latency import LatencyPolicy
+    from bluebeacon.metrics import Metrics
+    from bluebeacon.ping import PingResult
+    from bluebeacon.statusfile import StatusFileWriter
 
 EXIT_SUCCESS = 0
 EXIT_FAILURE = 1
 EXIT_ERROR = 2
+EXIT_DEGRADED = 3
+
+DEFAULT_INTERVAL = 5.0
+
+# Bounds of the adaptive ping timeout. Three attempts at the maximum still fail in
+# under 1 s, the usual healthcheck timeout.
+DEFAULT_TIMEOUT_MIN = 0.05
+DEFAULT_TIMEOUT_MAX = 0.3
+
+# Recent checks the latency percentile is taken over, at most the history size
+DEFAULT_LATENCY_WINDOW = 10
+MAX_LATENCY_WINDOW = 32
+
+# Seconds failed checks count towards --failures, and the longest streak kept
+DEFAULT_FAILURE_WINDOW = 60.0
+MAX_FAILURES = 64
+
+# Failed checks in a row it takes to fail while the CPU quota throttles the container,
+# as a throttled server may only have missed the ping because it was stalled
+THROTTLED_FAILURES = 2
+
+# Servers pinged at the same time by 'fleet' and by 'check --backends'
+DEFAULT_CONCURRENCY = 64
+
+# Seconds of --deadline kept for saving the outcome and reporting it once the probes
+# are cut off
+DEADLINE_MARGIN = 0.05
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class DefaultCommandGroup(click.Group):
+    """Click group that runs a default command when no subcommand is named.
+
+    This keeps ``bluebeacon [OPTIONS] [CONFIG_PATH]`` working as the healthcheck
+    while also offering subcommands such as ``bluebeacon serve``.
+    """
+
+    def __init__(self, *args: Any, default_command: str, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.default_command = default_command
+
+    def parse_args(self, ctx: click.Context, args: List[str]) -> List[str]:
+        if not args or args[0] not in self.commands:
+            args = [self.default_command, *args]
+        return super().parse_args(ctx, args)
 
 
 def set_server_type(ctx: click.Context, param: click.Parameter, value: bool) -> None:
@@ -27,7 +96,536 @@ def set_server_type(ctx: click.Context, param: click.Parameter, value: bool) ->
     ctx.obj["server_type"] = server_type
 
 
-@click.command(
+def probe_options(func: F) -> F:
+    """Add the options that select how to ping servers to a command."""
+    decorators = [
+        click.option(
+            "--java",
+            is_flag=True,
+            callback=set_server_type,
+            expose_value=False,
+            help="Target Java Edition servers only",
+        ),
+        click.option(
+            "--bedrock",
+            is_flag=True,
+            callback=set_server_type,
+            expose_value=False,
+            help="Target Bedrock Edition servers only",
+        ),
+        click.option(
+            "--both",
+            is_flag=True,
+            callback=set_server_type,
+            expose_value=False,
+            help="Target both Java and Bedrock Edition servers (default: the edition of the server config, and Bedrock as well on Java servers running Geyser)",
+        ),
+        click.option(
+            "--depth",
+            type=click.Choice(["connect", "legacy", "query", "query-full", "status"]),
+            default="status",
+            show_default=True,
+            help="How thoroughly to probe: open a connection (or RakNet ping), send a legacy ping, request the basic or full stat of the UDP query protocol, or request the full status",
+        ),
+        click.option(
+            "--timeout-min",
+            type=click.FloatRange(min=0, min_open=True),
+            default=DEFAULT_TIMEOUT_MIN,
+            show_default=True,
+            help="Lower bound in seconds of the timeout learned from recent round-trip times",
+        ),
+        click.option(
+            "--timeout-max",
+            type=click.FloatRange(min=0, min_open=True),
+            default=DEFAULT_TIMEOUT_MAX,
+            show_default=True,
+            help="Upper bound in seconds of the timeout learned from recent round-trip times",
+        ),
+    ]
+    for decorator in reversed(decorators):
+        func = decorator(func)
+    return func
+
+
+def server_options(func: F) -> F:
+    """Add the options that locate and select the server to ping to a command."""
+    func = click.option(
+        "--listener-check/--no-listener-check",
+        default=True,
+        show_default=True,
+        help="Fail without pinging if /proc/net shows nothing listening on the server port. Disable if BlueBeacon runs outside the network namespace of the server",
+    )(func)
+    func = click.argument(
+        "config_path",
+        type=click.Path(path_type=Path),
+        required=False,
+        metavar="CONFIG_PATH",
+        default=Path.home(),
+    )(func)
+    return probe_options(func)
+
+
+def default_socket_path() -> Path:
+    """Return the default location of the prober socket."""
+    from bluebeacon import daemon
+
+    return daemon.default_socket_path()
+
+
+def process_start() -> float:
+    """Return the ``time.monotonic()`` at which this process started.
+
+    This includes the startup of the interpreter and the imports before any code of
+    BlueBeacon runs. The kernel only reports the start in clock ticks, so the result
+    may be up to a tick early. Without ``/proc`` it is now.
+    """
+    now = time.monotonic()
+    try:
+        with open("/proc/self/stat", "rb") as f:
+            stat = f.read()
+        # Field 22, counting from the fields after the parenthesized command name
+        start_ticks = int(stat.rpartition(b")")[2].split()[19])
+        uptime = time.clock_gettime(time.CLOCK_BOOTTIME)
+        age = uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (AttributeError, IndexError, OSError, ValueError):
+        return now
+    return now - max(age, 0.0)
+
+
+def fail(ctx: click.Context, message: str) -> NoReturn:
+    """Report an error and exit with EXIT_ERROR.
+
+    With ``--json`` the error is printed as a JSON object, like any other result.
+    """
+    if ctx.obj and ctx.obj.get("json"):
+        import json
+
+        click.echo(json.dumps({"success": False, "error": message}))
+    else:
+        click.echo(f"Error: {message}")
+    ctx.exit(EXIT_ERROR)
+
+
+def resolve_server(
+    ctx: click.Context,
+    config_path: Path,
+    precompute: bool = False,
+    deadline: Optional[float] = None,
+) -> Tuple[Path, "ServerConfig"]:
+    """Find and parse the server config, exiting with EXIT_ERROR on failure.
+
+    The parsed result is cached for as long as the config file stays unchanged.
+    The host name a proxy binds to is resolved through ``bluebeacon.resolver``
+    even then, which only asks the resolver once its last answer has expired.
+    With ``precompute`` the config is always parsed and failing to write the cache
+    is an error. Resolving gives up at the ``deadline``, a ``time.monotonic()``,
+    unless an earlier answer is still cached.
+
+    Returns:
+        The config file that was found and the server config read from it.
+    """
+    from bluebeacon import cache, detector
+
+    try:
+        server_config = detector.find_server_config(config_path)
+    except FileNotFoundError as exc:
+        fail(ctx, str(exc))
+
+    # Taken before parsing, so a change during parsing invalidates the entry
+    key = cache.file_key(server_config)
+    if key is not None and not precompute:
+        cached = cache.load(key)
+        if cached is not None and cached.host is not None:
+            from bluebeacon import resolver
+
+            try:
+                address = resolver.resolve(
+                    cached.host, resolver.timeout_until(deadline)
+                )
+                cached = cached._replace(address=address)
+            except OSError as exc:
+                fail(ctx, str(exc))
+        if cached is not None:
+            return server_config, cached
+
+    try:
+        server = detector.read_server_config(server_config, deadline)
+    except (OSError, ValueError) as exc:
+        fail(ctx, str(exc))
+
+    if key is not None:
+        try:
+            cache.store(key, server)
+        except OSError as exc:
+            if precompute:
+                fail(ctx, f"Could not write config cache: {exc}")
+
+    return server_config, server
+
+
+def resolve_query_port(
+    ctx: click.Context, config_file: Path, server: "ServerConfig", depth: str
+) -> Optional[int]:
+    """Get the query port for the query depths, exiting with EXIT_ERROR on failure.
+
+    The query port is read along with the server config, so it is cached with it.
+    Only a disabled or invalid query port has the config read again, to report why.
+
+    Returns:
+        The query port, or None if the depth doesn't use the query protocol.
+    """
+    if not depth.startswith("query"):
+        return None
+    if server.query_port is not None:
+        return server.query_port
+
+    from bluebeacon import detector
+
+    try:
+        query_port = detector.parse_query_port(config_file)
+    except (OSError, ValueError) as exc:
+        fail(ctx, f"Could not read query port: {exc}")
+    if query_port is None:
+        fail(ctx, f"The query protocol is not enabled in {config_file}")
+    return query_port
+
+
+def resolve_bedrock_port(
+    ctx: click.Context, config_file: Path, server: "ServerConfig", server_type: str
+) -> Optional[int]:
+    """Find the Bedrock port Geyser opens next to a Java server.
+
+    The Geyser config is cached like the server config, for as long as it stays
+    unchanged. Exits with EXIT_ERROR if it can't be read.
+
+    Returns:
+        The Bedrock port, or None if Bedrock isn't pinged or Geyser isn't installed,
+        in which case Bedrock is pinged on the server port.
+    """
+    if server_type == "java":
+        return None
+
+    from bluebeacon import cache
+
+    try:
+        geyser = cache.read_geyser_config(config_file)
+    except (OSError, ValueError) as exc:
+        fail(ctx, f"Could not read Geyser config: {exc}")
+
+    return None if geyser is None else geyser.bedrock_port(server.port)
+
+
+def resolve_server_type(
+    ctx: click.Context, config_file: Path, server: "ServerConfig"
+) -> Tuple[str, Optional[int]]:
+    """Choose the editions to ping and the port to ping Bedrock on.
+
+    Without --java, --bedrock or --both, only the edition the config belongs to is
+    pinged, and Bedrock as well on Java servers running Geyser.
+
+    Returns:
+        "both", "java" or "bedrock", and the Bedrock port, see
+        ``resolve_bedrock_port``.
+    """
+    server_type = ctx.obj.get("server_type") if ctx.obj else None
+    bedrock_port = resolve_bedrock_port(ctx, config_file, server, server_type or "both")
+    if server_type is not None:
+        return server_type, bedrock_port
+
+    if server.edition == "java" and bedrock_port is not None:
+        return "both", bedrock_port
+    return server.edition, bedrock_port
+
+
+def check_timeout_bounds(timeout_min: float, timeout_max: float) -> None:
+    """Reject timeout bounds that don't form a range."""
+    if timeout_min > timeout_max:
+        raise click.BadParameter(
+            "must not be greater than --timeout-max", param_hint="'--timeout-min'"
+        )
+
+
+def ping_with_history(
+    server_address: ipaddress.IPv4Address | ipaddress.IPv6Address,
+    server_port: int,
+    server_type: str,
+    depth: str,
+    timeout_min: float,
+    timeout_max: float,
+    listener_check: bool = False,
+    query_port: Optional[int] = None,
+    bedrock_port: Optional[int] = None,
+    latency_policy: Optional["LatencyPolicy"] = None,
+    deadline: Optional[float] = None,
+) -> "PingResult":
+    """Ping the server with a timeout learned from its recent round-trip times.
+
+    The outcome is added to the latency history and the probe history of the
+    server. Failing to save the latency history only costs the adaptation, so it
+    is ignored.
+
+    With ``listener_check``, editions without a listening socket on the server port
+    are not pinged. If none has one, the ping fails at once as "not listening".
+    ``query_port`` is the UDP port queried by the query depths, ``bedrock_port``
+    the port Bedrock is pinged on if it differs from the server port. With
+    ``latency_policy``, a successful ping that misses the latency objective is
+    marked as degraded. The ping fails as "timeout" once ``time.monotonic()``
+    passes the ``deadline``, without pinging at all if it already has.
+
+    Under CPU pressure the timeout is stretched by the share of time the container
+    gets to run, up to ``timeout_max``, and a ping during which the container was
+    throttled is marked as such, see ``bluebeacon.cgroup``.
+    """
+    from bluebeacon import cgroup, latency, ping
+
+    probed_type = server_type
+    if listener_check:
+        from bluebeacon import listeners
+
+        listening = listeners.listening_server_type(
+            server_address, server_port, server_type, bedrock_port
+        )
+        if listening is None:
+            result = ping.PingResult(False, error="not listening")
+            record_outcome(server_address, server_port, result)
+            return result
+        # Only the editions pinged are narrowed, the history stays the same
+        probed_type = listening
+
+    if deadline is not None and time.monotonic() >= deadline:
+        result = ping.PingResult(False, error="timeout")
+        record_outcome(server_address, server_port, result)
+        return result
+
+    history = latency.LatencyHistory.for_server(
+        server_address, server_port, server_type, depth
+    )
+    timeout = history.timeout(timeout_min, timeout_max)
+    cpu = cgroup.sample()
+    if cpu is not None:
+        # Still bounded, a throttled failure is left to the deferred verdict instead
+        timeout = min(timeout * cpu.timeout_factor(), timeout_max)
+
+    result = ping.probe_server(
+        server_address,
+        server_port,
+        probed_type,
+        depth=depth,
+        timeout=timeout,
+        query_port=query_port,
+        bedrock_port=bedrock_port,
+        deadline=deadline,
+    )
+
+    history.record(result, timeout)
+    try:
+        history.save()
+    except OSError:
+        pass
+
+    import dataclasses
+
+    if latency_policy is not None and latency_policy.degraded(result, history):
+        result = dataclasses.replace(result, degraded=True)
+
+    if cpu is not None:
+        after = cgroup.sample()
+        if after is not None and after.throttled_since(cpu):
+            result = dataclasses.replace(result, throttled=True)
+
+    record_outcome(server_address, server_port, result)
+    return result
+
+
+def judge_failures(
+    server: "ServerConfig", result: "PingResult", failures: int, failure_window: float
+) -> Tuple[int, bool]:
+    """Decide whether the outcome of a ping fails the check, see --failures.
+
+    A failure only counts once ``failures`` checks in a row have failed within
+    ``failure_window`` seconds, and a failure while throttled always waits for the
+    next check to confirm it. The streak is only kept on disk when it's needed.
+
+    Returns:
+        The number of consecutive failures, including this one, and whether they
+        fail the check.
+    """
+    if result.throttled and not result.success:
+        required = max(failures, THROTTLED_FAILURES)
+    else:
+        required = failures
+
+    from bluebeacon import damping
+
+    # A streak started by a throttled failure must still be ended by a success
+    track = required > 1
+    if not track:
+        try:
+            track = damping.streak_file(server.address, server.port).stat().st_size > 0
+        except OSError:
+            pass
+
+    consecutive_failures = 0 if result.success else 1
+    if track:
+        streak = damping.FailureStreak.for_server(server.address, server.port)
+        consecutive_failures = streak.record(result.success, failure_window)
+        try:
+            streak.save()
+        except OSError:
+            pass
+
+    return consecutive_failures, consecutive_failures >= required
+
+
+def record_outcome(
+    server_address: ipaddress.IPv4Address | ipaddress.IPv6Address,
+    server_port: int,
+    result: "PingResult",
+) -> None:
+    """Add the outcome of a ping to the probe history read by ``stats``.
+
+    Failing to write the history only leaves a gap in the statistics, so it is
+    ignored.
+    """
+    from bluebeacon import history
+
+    try:
+        history.ProbeHistory.for_server(server_address, server_port).append(result)
+    except OSError:
+        pass
+
+
+def format_address(host: object, port: int) -> str:
+    """Format a host and port, putting IPv6 addresses in brackets."""
+    host = str(host)
+    if ":" in host:
+        host = f"[{host}]"
+    return f"{host}:{port}"
+
+
+def format_result(result: "PingResult") -> str:
+    """Describe the outcome of a ping in a few words."""
+    if result.success and result.latency is not None:
+        return f"up ({result.latency * 1000:.1f} ms)"
+    if result.success:
+        return "up"
+    return f"down ({result.error})"
+
+
+def result_json(result: "PingResult") -> Dict[str, Any]:
+    """Convert the outcome of a ping into JSON-compatible values."""
+    import dataclasses
+
+    payload = dataclasses.asdict(result)
+    latency = payload.pop("latency")
+    payload["latency_ms"] = None if latency is None else round(latency * 1000, 3)
+    return payload
+
+
+def check_backends(
+    ctx: click.Context,
+    config_file: Path,
+    server: "ServerConfig",
+    server_type: str,
+    min_backends: int,
+    proxy_pinger: Callable[..., "PingResult"],
+    backend_pinger: Callable[..., "PingResult"],
+    json_output: bool,
+    failures: int = 1,
+    failure_window: float = DEFAULT_FAILURE_WINDOW,
+    deadline: Optional[float] = None,
+) -> None:
+    """Ping a proxy and its backends, report on each and exit.
+
+    Succeeds if the proxy and at least ``min_backends`` backends respond, and is
+    degraded if the proxy misses its latency objective. Failures of the proxy are
+    absorbed like those of a single server, see ``judge_failures``. The backends are pinged with ``backend_pinger`` and the proxy with ``proxy_pinger``,
+    which can add the settings only known for the proxy. Backend host names are
+    resolved within what is left until the ``deadline``.
+    """
+    from bluebeacon import backends, detector
+
+    try:
+        proxy_backends = detector.parse_proxy_backends(config_file)
+    except (OSError, ValueError) as exc:
+        fail(ctx, str(exc))
+
+    proxy_result, backend_results = backends.probe_with_backends(
+        (server.address, server.port),
+        server_type,
+        proxy_backends,
+        backend_pinger,
+        DEFAULT_CONCURRENCY,
+        deadline,
+        proxy_pinger,
+    )
+    backends_up = sum(backend.success for backend in backend_results)
+    consecutive_failures, proxy_failed = judge_failures(
+        server, proxy_result, failures, failure_window
+    )
+    healthy = not proxy_failed and backends_up >= min_backends
+
+    if json_output:
+        import json
+
+        payload = server_json(config_file, server, proxy_result)
+        payload["backends"] = [
+            {
+                "name": backend.name,
+                "host": backend.host,
+                "port": backend.port,
+                **(
+                    result_json(backend.result)
+                    if backend.result is not None
+                    else {"success": False, "error": backend.error}
+                ),
+            }
+            for backend in backend_results
+        ]
+        if failures > 1:
+            payload["consecutive_failures"] = consecutive_failures
+        payload["backends_up"] = backends_up
+        payload["healthy"] = healthy
+        click.echo(json.dumps(payload))
+    else:
+        address = format_address(server.address, server.port)
+        click.echo(f"proxy\t{address}\t{format_result(proxy_result)}")
+        for backend in backend_results:
+            address = format_address(backend.host, backend.port)
+            if backend.result is None:
+                click.echo(f"{backend.name}\t{address}\terror: {backend.error}")
+            else:
+                state = format_result(backend.result)
+                click.echo(f"{backend.name}\t{address}\t{state}")
+
+    if not healthy:
+        ctx.exit(EXIT_FAILURE)
+    ctx.exit(EXIT_DEGRADED if proxy_result.degraded else EXIT_SUCCESS)
+
+
+def server_json(
+    config_file: Path, server: "ServerConfig", result: "PingResult"
+) -> Dict[str, Any]:
+    """Describe a checked server and the outcome of its ping for ``--json``."""
+    return {
+        "config_file": str(config_file),
+        "config_format": server.format,
+        "address": str(server.address),
+        "port": server.port,
+        **result_json(result),
+    }
+
+
+@click.group(
+    cls=DefaultCommandGroup,
+    default_command="check",
+    help="Docker healthcheck utility for Minecraft servers.",
+)
+def main() -> None:
+    """Entry point of the BlueBeacon CLI, running ``check`` by default."""
+
+
+@main.command(
     help="Docker healthcheck utility for Minecraft servers. This tool checks if a Minecraft server is running and responding to ping requests. It automatically detects server configuration from the provided path.",
     short_help="Minecraft server healthcheck utility",
     epilog="""CONFIG_PATH: Path to server config file or directory (default: user home directory)
@@ -36,62 +634,504 @@ def set_server_type(ctx: click.Context, param: click.Parameter, value: bool) ->
 Exit codes:
   0 - Success: Server is reachable and responding
   1 - Failure: Server is not reachable or not responding
-  2 - Error: Configuration error or invalid arguments""",
+  2 - Error: Configuration error or invalid arguments
+  3 - Degraded: Server is responding, but slower than --max-latency
+
+\b
+Other commands:
+  serve  - Keep probing in the background and publish the result
+  client - Report the result published by 'serve'
+  fleet  - Check many servers at once
+  stats  - Summarize the latest checks""",
 )
 @click.help_option("--help", "-h")
 @click.option("--version", "-V", is_flag=True, help="Show the version and exit")
 @click.option(
-    "--java",
+    "--precompute",
     is_flag=True,
-    callback=set_server_type,
-    expose_value=False,
-    help="Target Java Edition servers only",
+    help="Parse the server config into the cache and exit without pinging",
 )
 @click.option(
-    "--bedrock",
+    "--backends",
     is_flag=True,
-    callback=set_server_type,
-    expose_value=False,
-    help="Target Bedrock Edition servers only",
+    help="Also ping the backend servers listed in a Velocity or BungeeCord config and print the result of each",
 )
 @click.option(
-    "--both",
+    "--json",
+    "json_output",
     is_flag=True,
-    callback=set_server_type,
-    expose_value=False,
-    help="Target both Java and Bedrock Edition servers (default)",
+    help="Print the result, including the status the server reported, as a JSON object",
 )
-@click.argument(
-    "config_path",
-    type=click.Path(path_type=Path),
-    required=False,
-    metavar="CONFIG_PATH",
-    default=Path.home(),
+@click.option(
+    "--min-backends",
+    type=click.IntRange(min=0),
+    help="Require at least this many backends to respond, implies --backends  [default: 0]",
+)
+@click.option(
+    "--max-latency",
+    type=click.FloatRange(min=0, min_open=True),
+    help="Report a server that responds slower than this many seconds as degraded (exit code 3)",
+)
+@click.option(
+    "--latency-percentile",
+    type=click.FloatRange(min=0, max=100, min_open=True),
+    help="Judge this percentile of the round-trip times of recent checks against --max-latency instead of only the latest one, e.g. 95",
+)
+@click.option(
+    "--latency-window",
+    type=click.IntRange(min=1, max=MAX_LATENCY_WINDOW),
+    default=DEFAULT_LATENCY_WINDOW,
+    show_default=True,
+    help="Number of recent checks --latency-percentile is taken over",
+)
+@click.option(
+    "--failures",
+    type=click.IntRange(min=1, max=MAX_FAILURES),
+    default=1,
+    show_default=True,
+    help="Only fail once this many checks in a row have failed within --failure-window, so a single missed ping during a GC pause doesn't count",
+)
+@click.option(
+    "--failure-window",
+    type=click.FloatRange(min=0, min_open=True),
+    default=DEFAULT_FAILURE_WINDOW,
+    show_default=True,
+    help="Seconds a failed check counts towards --failures",
+)
+@click.option(
+    "--deadline",
+    type=click.FloatRange(min=0, min_open=True),
+    help="Report the result within this many seconds of starting, cutting off the ping if needed. Set it below the healthcheck timeout, e.g. 0.9 for --timeout=1s",
 )
+@server_options
 @click.pass_context
-def main(ctx: click.Context, config_path: Path, version: bool) -> int:
+def check(
+    ctx: click.Context,
+    config_path: Path,
+    depth: str,
+    timeout_min: float,
+    timeout_max: float,
+    version: bool,
+    precompute: bool,
+    backends: bool,
+    json_output: bool,
+    min_backends: Optional[int],
+    max_latency: Optional[float],
+    latency_percentile: Optional[float],
+    latency_window: int,
+    failures: int,
+    failure_window: float,
+    deadline: Optional[float],
+    listener_check: bool,
+) -> int:
     """Implementation of the BlueBeacon CLI."""
+    # Startup, discovery and parsing count towards the deadline, only the ping can be
+    # cut short
+    ping_deadline: Optional[float] = None
+    if deadline is not None:
+        ping_deadline = process_start() + deadline - DEADLINE_MARGIN
+
+    ctx.ensure_object(dict)["json"] = json_output
+
     if version:
+        from bluebeacon import __version__
+
         click.echo(f"BlueBeacon v{__version__}")
         ctx.exit(EXIT_SUCCESS)
 
-    server_type = ctx.obj.get("server_type", "both") if ctx.obj else "both"
+    if precompute:
+        config_file, server = resolve_server(ctx, config_path, precompute=True)
+        resolve_bedrock_port(ctx, config_file, server, "both")
+        ctx.exit(EXIT_SUCCESS)
+
+    check_timeout_bounds(timeout_min, timeout_max)
+
+    latency_policy: Optional["LatencyPolicy"] = None
+    if max_latency is not None:
+        from bluebeacon.latency import LatencyPolicy
+
+        latency_policy = LatencyPolicy(max_latency, latency_percentile, latency_window)
+    elif latency_percentile is not None:
+        raise click.BadParameter(
+            "requires --max-latency", param_hint="'--latency-percentile'"
+        )
+
+    config_file, server = resolve_server(ctx, config_path, deadline=ping_deadline)
+    query_port = resolve_query_port(ctx, config_file, server, depth)
+    server_type, bedrock_port = resolve_server_type(ctx, config_file, server)
+
+    if backends or min_backends is not None:
+        # Backends run in other containers and their query ports are unknown, so
+        # they get no listener check and a status request instead of a query
+        backend_depth = "status" if depth.startswith("query") else depth
+        check_backends(
+            ctx,
+            config_file,
+            server,
+            server_type,
+            min_backends or 0,
+            partial(
+                ping_with_history,
+                depth=depth,
+                timeout_min=timeout_min,
+                timeout_max=timeout_max,
+                listener_check=listener_check,
+                query_port=query_port,
+                bedrock_port=bedrock_port,
+                latency_policy=latency_policy,
+                deadline=ping_deadline,
+            ),
+            partial(
+                ping_with_history,
+                depth=backend_depth,
+                timeout_min=timeout_min,
+                timeout_max=timeout_max,
+                deadline=ping_deadline,
+            ),
+            json_output,
+            failures,
+            failure_window,
+            ping_deadline,
+        )
+
+    result = ping_with_history(
+        server.address,
+        server.port,
+        server_type,
+        depth,
+        timeout_min,
+        timeout_max,
+        listener_check,
+        query_port,
+        bedrock_port,
+        latency_policy,
+        deadline=ping_deadline,
+    )
+
+    consecutive_failures, failed = judge_failures(
+        server, result, failures, failure_window
+    )
+
+    if json_output:
+        import json
+
+        payload = server_json(config_file, server, result)
+        if failures > 1:
+            payload["consecutive_failures"] = consecutive_failures
+        click.echo(json.dumps(payload))
+
+    if result.degraded:
+        ctx.exit(EXIT_DEGRADED)
+    ctx.exit(EXIT_FAILURE if failed else EXIT_SUCCESS)
+
+
+@main.command(
+    help="Keep pinging the server on a fixed interval and publish the latest result on a Unix domain socket. Run this once per container and use 'bluebeacon client' as the healthcheck.",
+    short_help="Run a resident prober",
+    epilog="CONFIG_PATH: Path to server config file or directory (default: user home directory)",
+)
+@click.help_option("--help", "-h")
+@server_options
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(path_type=Path),
+    default=default_socket_path,
+    show_default="$XDG_RUNTIME_DIR/bluebeacon.sock",
+    help="Unix domain socket to publish the result on",
+)
+@click.option(
+    "--interval",
+    type=click.FloatRange(min=0.1),
+    default=DEFAULT_INTERVAL,
+    show_default=True,
+    help="Seconds between two pings",
+)
+@click.option(
+    "--metrics-port",
+    type=click.IntRange(min=0, max=65535),
+    default=None,
+    help="Serve Prometheus metrics of the latest pings on this TCP port (disabled by default)",
+)
+@click.option(
+    "--metrics-address",
+    default="0.0.0.0",
+    show_default=True,
+    help="Address to serve Prometheus metrics on",
+)
+@click.option(
+    "--status-file",
+    type=click.Path(path_type=Path),
+    help="Also publish the latest result in this memory-mapped file, for 'bluebeacon client --status-file'",
+)
+@click.pass_context
+def serve(
+    ctx: click.Context,
+    config_path: Path,
+    depth: str,
+    timeout_min: float,
+    timeout_max: float,
+    socket_path: Path,
+    interval: float,
+    metrics_port: Optional[int],
+    metrics_address: str,
+    status_file: Optional[Path],
+    listener_check: bool,
+) -> None:
+    """Run the resident prober."""
+    from bluebeacon import daemon
+
+    check_timeout_bounds(timeout_min, timeout_max)
+
+    config_file, server = resolve_server(ctx, config_path)
+    query_port = resolve_query_port(ctx, config_file, server, depth)
+    server_type, bedrock_port = resolve_server_type(ctx, config_file, server)
+
+    collector: Optional["Metrics"] = None
+    if metrics_port is not None:
+        from bluebeacon import metrics
+
+        collector = metrics.Metrics(format_address(server.address, server.port))
+        try:
+            metrics.start_server((metrics_address, metrics_port), collector)
+        except OSError as exc:
+            fail(ctx, f"Cannot serve metrics on port {metrics_port}: {exc}")
+
+    writer: Optional["StatusFileWriter"] = None
+    if status_file is not None:
+        from bluebeacon import statusfile
+
+        try:
+            writer = statusfile.StatusFileWriter(status_file)
+        except OSError as exc:
+            fail(ctx, f"Cannot create status file {status_file}: {exc}")
+
+    def probe() -> bool:
+        error: Optional[Exception] = None
+        try:
+            result = ping_with_history(
+                server.address,
+                server.port,
+                server_type,
+                depth,
+                timeout_min,
+                timeout_max,
+                listener_check,
+                query_port,
+                bedrock_port,
+            )
+        except Exception as exc:
+            # Publish the failure, then leave reporting the error to the prober
+            from bluebeacon import ping
+
+            error = exc
+            result = ping.PingResult(False, error="error")
+        if collector is not None:
+            collector.observe(result)
+        if writer is not None:
+            writer.publish(result)
+        if error is not None:
+            raise error
+        return result.success
+
+    daemon.serve(probe, socket_path, interval)
+
+
+@main.command(
+    help="Check every server of a fleet. ROOT is either a directory with one subdirectory per server, such as the Pterodactyl volumes directory, or a glob pattern matching server directories or config files. The configs are read in parallel, then all servers are pinged with bounded concurrency and one line is printed per server.",
+    short_help="Check many servers at once",
+    epilog="""\b
+Exit codes:
+  0 - Success: All servers are reachable and responding
+  1 - Failure: At least one server is not reachable or not responding
+  2 - Error: No servers were found, or a server config could not be read""",
+)
+@click.help_option("--help", "-h")
+@probe_options
+@click.argument("root")
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    show_default="number of CPUs + 4, at most 32",
+    help="Threads reading server configs",
+)
+@click.option(
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=DEFAULT_CONCURRENCY,
+    show_default=True,
+    help="Maximum number of servers pinged at the same time",
+)
+@click.pass_context
+def fleet(
+    ctx: click.Context,
+    root: str,
+    depth: str,
+    timeout_min: float,
+    timeout_max: float,
+    workers: Optional[int],
+    concurrency: int,
+) -> None:
+    """Check all servers of a fleet."""
+    import asyncio
+
+    from bluebeacon import fleet as fleet_module
+
+    check_timeout_bounds(timeout_min, timeout_max)
+
+    server_type = ctx.obj.get("server_type") if ctx.obj else None
 
     try:
-        server_config = detector.find_server_config(config_path)
-    except FileNotFoundError as exc:
+        paths = fleet_module.discover(root)
+    except OSError as exc:
         click.echo(f"Error: {exc}")
         ctx.exit(EXIT_ERROR)
+    if not paths:
+        click.echo(f"Error: No servers found in {root}")
+        ctx.exit(EXIT_ERROR)
 
+    servers = fleet_module.resolve_all(paths, workers, query=depth.startswith("query"))
+    results = asyncio.run(
+        fleet_module.probe_all(
+            servers, server_type, depth, timeout_min, timeout_max, concurrency
+        )
+    )
+
+    exit_code = EXIT_SUCCESS
+    for server, result in zip(servers, results):
+        if result is None or server.address is None or server.port is None:
+            click.echo(f"{server.path}\t-\terror: {server.error}")
+            exit_code = EXIT_ERROR
+            continue
+
+        address = format_address(server.address, server.port)
+        click.echo(f"{server.path}\t{address}\t{format_result(result)}")
+        if not result.success:
+            exit_code = max(exit_code, EXIT_FAILURE)
+
+    ctx.exit(exit_code)
+
+
+@main.command(
+    help="Report the success rate and round-trip time percentiles of the latest checks of the server, from the probe history every check, 'serve' and 'fleet' add to. This does not contact the server.",
+    short_help="Summarize the latest checks",
+    epilog="CONFIG_PATH: Path to server config file or directory (default: user home directory)",
+)
+@click.help_option("--help", "-h")
+@click.argument(
+    "config_path",
+    type=click.Path(path_type=Path),
+    required=False,
+    metavar="CONFIG_PATH",
+    default=Path.home(),
+)
+@click.option(
+    "--json",
+    "json_output",
+    is_flag=True,
+    help="Print the statistics as a JSON object",
+)
+@click.pass_context
+def stats(ctx: click.Context, config_path: Path, json_output: bool) -> None:
+    """Summarize the probe history of the server."""
+    from bluebeacon import history
+
+    ctx.ensure_object(dict)["json"] = json_output
+
+    _, server = resolve_server(ctx, config_path)
+    records = history.ProbeHistory.for_server(server.address, server.port).read()
+    summary = history.summarize(records)
+
+    if json_output:
+        import json
+
+        payload = {
+            "address": str(server.address),
+            "port": server.port,
+            **summary,
+        }
+        for p in history.PERCENTILES:
+            latency = payload.pop(f"p{p}")
+            payload[f"p{p}_ms"] = None if latency is None else round(latency * 1000, 3)
+        click.echo(json.dumps(payload))
+        return
+
+    click.echo(f"server\t{format_address(server.address, server.port)}")
+    if not records:
+        click.echo("checks\t0")
+        return
+
+    span = summary["last"] - summary["first"]
+    click.echo(f"checks\t{summary['checks']} over {span:.0f} s")
+    click.echo(f"success\t{summary['success_rate']:.1%}")
+    for p in history.PERCENTILES:
+        latency = summary[f"p{p}"]
+        click.echo(f"p{p}\t" + ("-" if latency is None else f"{latency * 1000:.1f} ms"))
+    if summary["errors"]:
+        errors = ", ".join(f"{error} {n}" for error, n in summary["errors"].items())
+        click.echo(f"errors\t{errors}")
+
+
+@main.command(
+    help="Report the latest result published by 'bluebeacon serve'. This does not read any config or contact the server itself, which makes it a very cheap healthcheck.",
+    short_help="Read the result of a resident prober",
+    epilog="""\b
+Exit codes:
+  0 - Success: Server is reachable and responding
+  1 - Failure: Server is not reachable, not responding or the result is too old
+  2 - Error: The prober or its status file could not be reached""",
+)
+@click.help_option("--help", "-h")
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(path_type=Path),
+    default=default_socket_path,
+    show_default="$XDG_RUNTIME_DIR/bluebeacon.sock",
+    help="Unix domain socket the prober publishes the result on",
+)
+@click.option(
+    "--status-file",
+    type=click.Path(path_type=Path),
+    help="Read the result from the status file of 'bluebeacon serve --status-file' instead of the socket",
+)
+@click.option(
+    "--max-age",
+    type=click.FloatRange(min=0),
+    default=3 * DEFAULT_INTERVAL,
+    show_default=True,
+    help="Seconds after which a published result counts as a failure",
+)
+@click.pass_context
+def client(
+    ctx: click.Context,
+    socket_path: Path,
+    status_file: Optional[Path],
+    max_age: float,
+) -> None:
+    """Read the result of the resident prober."""
+    status: Optional[Tuple[bool, float]]
     try:
-        server_address, server_port = detector.parse_server_config(server_config)
-    except ValueError as exc:
+        if status_file is not None:
+            from bluebeacon import statusfile
+
+            record = statusfile.read_status_file(status_file)
+            status = None if record is None else (record.success, record.timestamp)
+        else:
+            from bluebeacon import daemon
+
+            status = daemon.read_status(socket_path)
+    except (OSError, ValueError) as exc:
         click.echo(f"Error: {exc}")
         ctx.exit(EXIT_ERROR)
 
-    server_reachable = ping.ping_server(server_address, server_port, server_type)
+    if status is None:
+        ctx.exit(EXIT_FAILURE)
+
+    server_reachable, timestamp = status
+    fresh = time.time() - timestamp <= max_age
 
-    ctx.exit(EXIT_SUCCESS if server_reachable else EXIT_FAILURE)
+    ctx.exit(EXIT_SUCCESS if server_reachable and fresh else EXIT_FAILURE)
 
 
 if __name__ == "__main__":  # pragma: no cover
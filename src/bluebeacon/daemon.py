@@ -0,0 +1,160 @@
+"""Resident prober for BlueBeacon.
+
+This module keeps pinging a Minecraft server on a fixed schedule and publishes the
+latest result on a Unix domain socket, so that healthchecks only have to read it.
+"""
+
+import signal
+import socket
+import socketserver
+import threading
+import time
+import traceback
+from pathlib import Path
+from types import FrameType
+from typing import Callable, Optional, Tuple
+
+from bluebeacon import state
+
+
+def default_socket_path() -> Path:
+    """Return the default location of the prober socket."""
+    return state.runtime_dir() / "bluebeacon.sock"
+
+
+class Prober:
+    """Runs a probe on a fixed schedule and remembers its latest result."""
+
+    def __init__(self, probe: Callable[[], bool], interval: float) -> None:
+        """
+        Args:
+            probe: Callable returning True if the server responded.
+            interval: Seconds between the start of two consecutive probes.
+        """
+        self.probe = probe
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._result: Optional[Tuple[bool, float]] = None
+
+    @property
+    def result(self) -> Optional[Tuple[bool, float]]:
+        """The latest result as ``(success, unix timestamp)``, if there is one."""
+        with self._lock:
+            return self._result
+
+    def run_once(self) -> bool:
+        """Run the probe a single time and store its result.
+
+        An exception raised by the probe counts as a failure and is printed to
+        stderr, so that an unexpected error stops the server from being reported as
+        up instead of ending the prober.
+        """
+        try:
+            success = self.probe()
+        except Exception:
+            traceback.print_exc()
+            success = False
+        with self._lock:
+            self._result = (success, time.time())
+        return success
+
+    def run(self, stop: threading.Event) -> None:
+        """Run the probe until ``stop`` is set, keeping a fixed start-to-start pace."""
+        next_run = time.monotonic()
+        while not stop.is_set():
+            self.run_once()
+            next_run += self.interval
+            stop.wait(max(0.0, next_run - time.monotonic()))
+
+
+class _StatusHandler(socketserver.BaseRequestHandler):
+    server: "StatusServer"
+
+    def handle(self) -> None:
+        result = self.server.prober.result
+        if result is None:
+            # Nothing has been probed yet, which the client reports as a failure
+            self.request.sendall(b"-\n")
+        else:
+            success, timestamp = result
+            self.request.sendall(f"{int(success)} {timestamp:.3f}\n".encode())
+
+
+class StatusServer(socketserver.UnixStreamServer):
+    """Unix domain socket server answering every connection with the latest result.
+
+    The reply is a single ASCII line of the form ``<1|0> <unix timestamp>``, or
+    ``-`` if no probe has completed yet.
+    """
+
+    def __init__(self, socket_path: Path, prober: Prober) -> None:
+        self.prober = prober
+        self.socket_path = socket_path
+        # A socket left behind by a previous run would make bind() fail
+        socket_path.unlink(missing_ok=True)
+        super().__init__(str(socket_path), _StatusHandler)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
+
+
+def serve(probe: Callable[[], bool], socket_path: Path, interval: float) -> None:
+    """Probe the server periodically and publish the result until terminated.
+
+    Args:
+        probe: Callable returning True if the server responded.
+        socket_path: Path of the Unix domain socket to publish the result on.
+        interval: Seconds between the start of two consecutive probes.
+    """
+    prober = Prober(probe, interval)
+    stop = threading.Event()
+
+    def terminate(signum: int, frame: Optional[FrameType]) -> None:
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, terminate)
+
+    with StatusServer(socket_path, prober) as server:
+        thread = threading.Thread(target=prober.run, args=(stop,), daemon=True)
+        thread.start()
+        try:
+            server.serve_forever()
+        finally:
+            stop.set()
+
+
+def read_status(
+    socket_path: Path, timeout: float = 0.5
+) -> Optional[Tuple[bool, float]]:
+    """Read the latest result published by a running prober.
+
+    Args:
+        socket_path: Path of the Unix domain socket the prober listens on.
+        timeout: Seconds to wait for the prober to answer.
+
+    Returns:
+        The latest result as ``(success, unix timestamp)``, or None if the prober
+        has not completed a probe yet.
+
+    Raises:
+        OSError: If the prober could not be reached.
+        ValueError: If the prober answered with something unexpected.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(socket_path))
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = sock.recv(64)
+            if not chunk:
+                break
+            data += chunk
+
+    fields = data.decode("ascii").split()
+    if fields == ["-"]:
+        return None
+    if len(fields) != 2 or fields[0] not in ("0", "1"):
+        raise ValueError(f"Unexpected answer from {socket_path}: {data!r}")
+
+    return fields[0] == "1", float(fields[1])
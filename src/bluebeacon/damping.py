@@ -0,0 +1,99 @@
+"""Flap damping for BlueBeacon.
+
+A single ping lost during a long garbage collection pause of a busy server shouldn't
+fail the healthcheck. This module remembers the failures of recent checks between
+invocations, so that a check only reports the server as down once enough checks in a
+row have failed within a time window.
+"""
+
+import array
+import ipaddress
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+from bluebeacon import state
+
+# Failures kept per server, more than any sensible --failures needs
+MAX_FAILURES = 64
+
+
+def streak_file(
+    address: ipaddress.IPv4Address | ipaddress.IPv6Address, port: int
+) -> Path:
+    """Return the path of the state file with the streak of a server."""
+    return state.state_file(f"{address}:{port}", "flap")
+
+
+class FailureStreak:
+    """Times of the consecutive failed checks of one server, oldest first.
+
+    The times are stored as an array of doubles in a state file, like the latency
+    history. A successful check ends the streak and empties the file.
+    """
+
+    def __init__(self, path: Path, failures: "array.array[float]") -> None:
+        self.path = path
+        self.failures = failures
+        self._changed = False
+
+    @classmethod
+    def for_server(
+        cls, address: ipaddress.IPv4Address | ipaddress.IPv6Address, port: int
+    ) -> "FailureStreak":
+        """Load the streak of a server.
+
+        Returns:
+            The stored streak, or an empty one if there is none or it can't be read.
+        """
+        path = streak_file(address, port)
+        failures = array.array("d")
+        try:
+            with path.open("rb") as f:
+                # Don't trust failures other users could have planted in a shared /tmp
+                if os.fstat(f.fileno()).st_uid == os.getuid():
+                    failures.frombytes(f.read())
+        except (OSError, ValueError):
+            failures = array.array("d")
+
+        return cls(path, failures)
+
+    def record(self, success: bool, window: float, now: Optional[float] = None) -> int:
+        """Add the outcome of a check.
+
+        Failures older than ``window`` seconds are forgotten, so failures that are
+        far apart never add up to a streak.
+
+        Args:
+            success: Whether the server responded.
+            window: Seconds a failure counts towards the streak.
+            now: Unix time of the check, defaults to now.
+
+        Returns:
+            The number of consecutive failures within the window, including this
+            check, at most MAX_FAILURES.
+        """
+        if now is None:
+            now = time.time()
+
+        if success:
+            self._changed = len(self.failures) > 0
+            del self.failures[:]
+            return 0
+
+        recent = [failure for failure in self.failures if now - failure <= window]
+        recent.append(now)
+        self.failures = array.array("d", recent[-MAX_FAILURES:])
+        self._changed = True
+        return len(self.failures)
+
+    def save(self) -> None:
+        """Store the streak if it changed.
+
+        Raises:
+            OSError: If the streak could not be written.
+        """
+        if self._changed:
+            state.write_atomic(self.path, self.failures.tobytes())
+            self._changed = False
@@ -4,12 +4,15 @@ This module handles the detection and parsing of Minecraft server configuration
 """
 
 import ipaddress
-import tomllib
+import re
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
-import javaproperties
-import yaml
+# The host a proxy binds to: an address, or a host name that still needs to be resolved
+Host = ipaddress.IPv4Address | ipaddress.IPv6Address | str
+
+# Host names, allowing the underscores of Docker container names
+_HOST_NAME = re.compile(r"[A-Za-z0-9_-]+(\.[A-Za-z0-9_-]+)*\.?")
 
 
 def find_server_config(path: Path) -> Path:
@@ -36,14 +39,52 @@ def find_server_config(path: Path) -> Path:
     raise FileNotFoundError(f"No valid server configuration found in {path}.")
 
 
+# Config file names and extensions that reveal the format of a file
+_FILE_NAME_FORMATS = {
+    "server.properties": "ini",
+    "config.yml": "yaml",
+    "velocity.toml": "toml",
+}
+_SUFFIX_FORMATS = {
+    ".properties": "ini",
+    ".yml": "yaml",
+    ".yaml": "yaml",
+    ".toml": "toml",
+}
+
+
+class ServerConfig(NamedTuple):
+    """Where a server listens, as read from its config file.
+
+    Attributes:
+        address: The address the server listens on.
+        port: The port the server listens on.
+        format: The format the config file was parsed as, "ini", "yaml" or "toml".
+        edition: The edition the config belongs to, "java" or "bedrock", or "both"
+            if unknown.
+        host: The host name the address was resolved from, if the server binds to
+            a host name.
+        query_port: The port of the query protocol, or None if it is disabled or
+            invalid, see ``parse_query_port``.
+    """
+
+    address: ipaddress.IPv4Address | ipaddress.IPv6Address
+    port: int
+    format: str
+    edition: str = "both"
+    host: Optional[str] = None
+    query_port: Optional[int] = None
+
+
 def parse_server_config(
     config_file: Path,
 ) -> Tuple[ipaddress.IPv4Address | ipaddress.IPv6Address, int]:
     """
     Parses a server configuration file and extracts the server address and port.
-    The function supports multiple file formats (INI, YAML, TOML) and tries each
-    parser in sequence. If the file format is unsupported or parsing fails, an
-    exception is raised.
+    The function supports multiple file formats (INI, YAML, TOML). The file is read
+    once, and the parser for the format suggested by the file name, extension or
+    content is tried first, followed by the remaining parsers on the same data. If
+    the file format is unsupported or parsing fails, an exception is raised.
 
     :param config_file: The path to the configuration file to be parsed.
     :type config_file: Path
@@ -52,9 +93,51 @@ def parse_server_config(
     :rtype: Tuple[ipaddress.IPv4Address | ipaddress.IPv6Address, int]
     :raises ValueError: If the configuration file format is unsupported.
     """
-    for parser in [_parse_ini_config, _parse_yaml_config, _parse_toml_config]:
+    server_config = read_server_config(config_file)
+    return server_config.address, server_config.port
+
+
+def read_server_config(
+    config_file: Path, deadline: Optional[float] = None
+) -> ServerConfig:
+    """Parse a server config file like ``parse_server_config``.
+
+    Args:
+        config_file: The path to the configuration file to be parsed.
+        deadline: ``time.monotonic()`` by which a host name the server binds to must
+            be resolved, see ``bluebeacon.resolver.timeout_until``.
+
+    Returns:
+        The server address and port, together with the format of the config file,
+        the edition inferred from it and the query port.
+
+    Raises:
+        ValueError: If the configuration file format is unsupported.
+        OSError: If the server binds to a host name that could not be resolved.
+    """
+    with config_file.open("rb") as f:
+        data = f.read()
+
+    # Looked up on every call so that the readers can be patched in tests
+    readers = {
+        "ini": _ini_address,
+        "yaml": _yaml_address,
+        "toml": _toml_address,
+    }
+    formats = list(readers)
+    guessed_format = _guess_config_format(config_file, data)
+    if guessed_format is not None:
+        formats.remove(guessed_format)
+        formats.insert(0, guessed_format)
+
+    # Each format is parsed at most once, and the address, the edition and the query
+    # port are all read from the same parsed config
+    for config_format in formats:
+        config = _load_config(config_format, data)
+        if config is None:
+            continue
         try:
-            result = parser(config_file)
+            result = readers[config_format](config)
             if result is not None:
                 break
         except ValueError:
@@ -63,69 +146,428 @@ def parse_server_config(
     else:
         raise ValueError(f"Unsupported server config file format: {config_file}")
 
-    if result[0] == ipaddress.IPv4Address("0.0.0.0"):
-        result = (ipaddress.IPv4Address("127.0.0.1"), result[1])
-    elif result[0] == ipaddress.IPv6Address("::"):
-        result = (ipaddress.IPv6Address("::1"), result[1])
+    address, port = result
+    host = None
+    if isinstance(address, str):
+        from bluebeacon import resolver
 
-    return result
+        host = address
+        address = resolver.resolve(host, resolver.timeout_until(deadline))
 
+    if address == ipaddress.IPv4Address("0.0.0.0"):
+        address = ipaddress.IPv4Address("127.0.0.1")
+    elif address == ipaddress.IPv6Address("::"):
+        address = ipaddress.IPv6Address("::1")
 
-def _parse_ini_config(
-    config_file: Path,
-) -> Optional[Tuple[ipaddress.IPv4Address | ipaddress.IPv6Address, int]]:
+    edition = _infer_edition(config_format, config)
     try:
-        with config_file.open("rb") as f:
-            config = javaproperties.load(f)
+        query_port = _parse_query_port(config_format, config)
+    except ValueError:
+        # Only matters to the query depths, which report it from parse_query_port
+        query_port = None
+    return ServerConfig(address, port, config_format, edition, host, query_port)
+
+
+def _infer_edition(config_format: str, config: Dict[str, Any]) -> str:
+    """Infer the edition of a server from its parsed config file.
+
+    Velocity and BungeeCord only proxy Java Edition. Bedrock Dedicated Server uses
+    ``server.properties`` as well, but only it has ``server-portv6``.
+    """
+    if config_format != "ini":
+        return "java"
+
+    return "bedrock" if "server-portv6" in config else "java"
+
+
+def _guess_config_format(config_file: Path, data: bytes) -> Optional[str]:
+    """Guess the format of a config file without parsing it.
+
+    Args:
+        config_file: Path of the config file, used for its name and extension.
+        data: Contents of the config file, sniffed if the name is inconclusive.
+
+    Returns:
+        "ini", "yaml" or "toml", or None if the format could not be guessed.
+    """
+    config_format = _FILE_NAME_FORMATS.get(config_file.name)
+    if config_format is None:
+        config_format = _SUFFIX_FORMATS.get(config_file.suffix.lower())
+    if config_format is not None:
+        return config_format
+
+    # Decide on the first line that is neither empty nor a comment
+    for raw_line in data.splitlines():
+        line = raw_line.strip()
+        if not line or line.startswith((b"#", b"!")):
+            continue
+        if line.startswith(b"["):
+            # TOML table header
+            return "toml"
+        if line.startswith(b"- ") or line == b"---":
+            return "yaml"
+
+        equals = line.find(b"=")
+        colon = line.find(b":")
+        if colon != -1 and (equals == -1 or colon < equals):
+            return "yaml"
+        if equals != -1:
+            # Unlike properties, TOML values are quoted, arrays or inline tables
+            value = line[equals + 1 :].lstrip()
+            return "toml" if value[:1] in (b'"', b"'", b"[", b"{") else "ini"
+        return None
+
+    return None
+
+
+def _load_config(config_format: Optional[str], data: bytes) -> Optional[Dict[str, Any]]:
+    """Parse config data of the given format, None if it isn't valid in that format."""
+    if config_format == "ini":
+        return _load_properties(data)
+    if config_format == "yaml":
+        return _load_yaml(data)
+    if config_format == "toml":
+        return _load_toml(data)
+
+    return None
+
+
+def _load_properties(data: bytes) -> Optional[Dict[str, Any]]:
+    """Parse the contents of a ``.properties`` file, None if it's invalid."""
+    # Parser modules are imported on demand, so cached checks never load them
+    import javaproperties
+
+    try:
+        # .properties files are Latin-1 encoded
+        config: Dict[str, Any] = javaproperties.loads(data.decode("latin-1"))
     except javaproperties.InvalidUEscapeError:
         return None
+    return config
+
+
+def _load_yaml(data: bytes) -> Optional[Dict[str, Any]]:
+    """Parse the contents of a YAML file, None if it's invalid.
+
+    Documents that aren't a mapping, e.g. an empty file, give an empty config.
+    """
+    import yaml
+
+    try:
+        config = yaml.safe_load(data)
+    except yaml.YAMLError:
+        return None
+    return config if isinstance(config, dict) else {}
+
+
+def _load_toml(data: bytes) -> Optional[Dict[str, Any]]:
+    """Parse the contents of a TOML file, None if it's invalid."""
+    import tomllib
+
+    try:
+        return tomllib.loads(data.decode("utf-8"))
+    except (tomllib.TOMLDecodeError, UnicodeDecodeError):
+        return None
+
 
+def _parse_ini_config(
+    data: bytes,
+) -> Optional[Tuple[ipaddress.IPv4Address | ipaddress.IPv6Address, int]]:
+    config = _load_properties(data)
+    return None if config is None else _ini_address(config)
+
+
+def _ini_address(
+    config: Dict[str, Any],
+) -> Optional[Tuple[ipaddress.IPv4Address | ipaddress.IPv6Address, int]]:
     if "server-ip" in config and "server-port" in config:
+        # An empty server-ip, the default, listens on every address
         return (
-            ipaddress.ip_address(config["server-ip"]),
+            ipaddress.ip_address(config["server-ip"] or "0.0.0.0"),
             int(config["server-port"]),
         )
+    if "server-portv6" in config:
+        # Bedrock Dedicated Server always listens on every address
+        return ipaddress.IPv4Address("0.0.0.0"), int(config.get("server-port", 19132))
 
     return None
 
 
-def _parse_yaml_config(
-    config_file: Path,
-) -> Optional[Tuple[ipaddress.IPv4Address | ipaddress.IPv6Address, int]]:
-    try:
-        with config_file.open("r", encoding="utf-8") as f:
-            config = yaml.safe_load(f)
-    except yaml.YAMLError:
-        return None
+def _parse_yaml_config(data: bytes) -> Optional[Tuple[Host, int]]:
+    config = _load_yaml(data)
+    return None if config is None else _yaml_address(config)
+
 
+def _yaml_address(config: Dict[str, Any]) -> Optional[Tuple[Host, int]]:
     if "listeners" in config:
         for listener in config["listeners"]:
             if "host" in listener:
                 (address, port) = listener["host"].rsplit(":", 1)
 
                 return (
-                    ipaddress.ip_address(address.strip("[]")),
+                    _parse_host(address),
                     int(port),
                 )
 
     return None
 
 
-def _parse_toml_config(
-    config_file: Path,
-) -> Optional[Tuple[ipaddress.IPv4Address | ipaddress.IPv6Address, int]]:
-    try:
-        with config_file.open("rb") as f:
-            config = tomllib.load(f)
-    except tomllib.TOMLDecodeError:
-        return None
+def _parse_toml_config(data: bytes) -> Optional[Tuple[Host, int]]:
+    config = _load_toml(data)
+    return None if config is None else _toml_address(config)
 
+
+def _toml_address(config: Dict[str, Any]) -> Optional[Tuple[Host, int]]:
     if "bind" in config:
         (address, port) = config["bind"].rsplit(":", 1)
 
         return (
-            ipaddress.ip_address(address.strip("[]")),
+            _parse_host(address),
             int(port),
         )
 
     return None
+
+
+def _parse_host(host: str) -> Host:
+    """Parse the host a proxy binds to, which may be an address or a host name.
+
+    Raises:
+        ValueError: If the host is neither.
+    """
+    host = host.strip("[]")
+    try:
+        return ipaddress.ip_address(host)
+    except ValueError:
+        if len(host) > 253 or not _HOST_NAME.fullmatch(host):
+            raise ValueError(f"Invalid host: {host}") from None
+        return host
+
+
+def parse_proxy_backends(config_file: Path) -> List[Tuple[str, str, int]]:
+    """Extract the backend servers listed in a proxy config.
+
+    Velocity lists its backends in the ``[servers]`` table of ``velocity.toml``,
+    BungeeCord in the ``servers`` section of ``config.yml``. Other configs have no
+    backends.
+
+    Args:
+        config_file: The path to the configuration file to be parsed.
+
+    Returns:
+        The name, host and port of every backend, in the order of the config. Hosts
+        may be names that still need to be resolved.
+
+    Raises:
+        ValueError: If the address of a backend is invalid.
+    """
+    with config_file.open("rb") as f:
+        data = f.read()
+
+    config_format = _guess_config_format(config_file, data)
+    if config_format == "toml":
+        return _parse_velocity_backends(data)
+    if config_format == "yaml":
+        return _parse_bungee_backends(data)
+
+    return []
+
+
+def _parse_velocity_backends(data: bytes) -> List[Tuple[str, str, int]]:
+    import tomllib
+
+    try:
+        config = tomllib.loads(data.decode("utf-8"))
+    except (tomllib.TOMLDecodeError, UnicodeDecodeError):
+        return []
+
+    servers = config.get("servers")
+    if not isinstance(servers, dict):
+        return []
+
+    # The "try" key lists the servers to connect players to, not a backend
+    return [
+        (name, *_split_backend_address(address))
+        for name, address in servers.items()
+        if isinstance(address, str)
+    ]
+
+
+def _parse_bungee_backends(data: bytes) -> List[Tuple[str, str, int]]:
+    import yaml
+
+    try:
+        config = yaml.safe_load(data)
+    except yaml.YAMLError:
+        return []
+
+    servers = config.get("servers") if isinstance(config, dict) else None
+    if not isinstance(servers, dict):
+        return []
+
+    return [
+        (str(name), *_split_backend_address(server["address"]))
+        for name, server in servers.items()
+        if isinstance(server, dict) and isinstance(server.get("address"), str)
+    ]
+
+
+def parse_query_port(config_file: Path) -> Optional[int]:
+    """Extract the port of the query protocol from a server config.
+
+    Vanilla servers enable it with ``enable-query`` and ``query.port`` in
+    ``server.properties``, Velocity in the ``[query]`` table of ``velocity.toml`` and
+    BungeeCord with ``query_enabled`` and ``query_port`` of its first listener.
+
+    Args:
+        config_file: The path to the configuration file to be parsed.
+
+    Returns:
+        The query port, or None if the query protocol is disabled or the config
+        couldn't be parsed.
+
+    Raises:
+        ValueError: If the query port is invalid.
+    """
+    with config_file.open("rb") as f:
+        data = f.read()
+
+    config_format = _guess_config_format(config_file, data)
+    config = _load_config(config_format, data)
+    if config is None:
+        return None
+
+    return _parse_query_port(config_format, config)
+
+
+def _parse_query_port(
+    config_format: Optional[str], config: Dict[str, Any]
+) -> Optional[int]:
+    """Extract the query port from a parsed config of the given format."""
+    if config_format == "ini":
+        return _parse_properties_query_port(config)
+    if config_format == "toml":
+        return _parse_velocity_query_port(config)
+    if config_format == "yaml":
+        return _parse_bungee_query_port(config)
+
+    return None
+
+
+def _parse_properties_query_port(config: Dict[str, Any]) -> Optional[int]:
+    if config.get("enable-query", "false").strip().lower() != "true":
+        return None
+
+    # The query port defaults to 25565, like the server port
+    return int(config.get("query.port") or 25565)
+
+
+def _parse_velocity_query_port(config: Dict[str, Any]) -> Optional[int]:
+    query = config.get("query")
+    if not isinstance(query, dict) or query.get("enabled") is not True:
+        return None
+
+    return int(query.get("port", 25577))
+
+
+def _parse_bungee_query_port(config: Dict[str, Any]) -> Optional[int]:
+    listeners = config.get("listeners")
+    if not isinstance(listeners, list) or not listeners:
+        return None
+
+    listener = listeners[0]
+    if not isinstance(listener, dict) or listener.get("query_enabled") is not True:
+        return None
+
+    return int(listener.get("query_port", 25577))
+
+
+def _split_backend_address(address: str) -> Tuple[str, int]:
+    """Split a backend address into host and port, defaulting to port 25565."""
+    host, separator, port = address.rpartition(":")
+    if not separator or host.endswith(":") or "]" in port:
+        # No port, or a bare IPv6 address
+        return address.strip("[]"), 25565
+
+    try:
+        return host.strip("[]"), int(port)
+    except ValueError:
+        raise ValueError(f"Invalid backend address: {address}") from None
+
+
+# Where Geyser keeps its config, relative to the directory of the server config: the
+# plugins directory of Spigot, Paper, BungeeCord and Velocity, or the config directory
+# of the Fabric and NeoForge mods
+_GEYSER_CONFIG_PATTERNS = ("plugins/Geyser-*/config.yml", "config/Geyser-*/config.yml")
+
+
+class GeyserConfig(NamedTuple):
+    """Where Geyser accepts Bedrock players, as read from its config file.
+
+    Attributes:
+        port: The UDP port Geyser listens on.
+        clone_remote_port: Whether Geyser listens on the port of the Java server
+            instead of ``port``.
+    """
+
+    port: int
+    clone_remote_port: bool
+
+    def bedrock_port(self, server_port: int) -> int:
+        """Return the port Bedrock players connect on, given the Java server port."""
+        return server_port if self.clone_remote_port else self.port
+
+
+def find_geyser_config(config_file: Path) -> Optional[Path]:
+    """Find the config of Geyser, the proxy letting Bedrock players join Java servers.
+
+    Floodgate only authenticates the players Geyser lets in and has no listener of
+    its own, so its config is not needed.
+
+    Args:
+        config_file: The server config, next to which the plugins or mods live.
+
+    Returns:
+        The Geyser config, or None if Geyser is not installed.
+    """
+    directory = config_file.parent
+    for pattern in _GEYSER_CONFIG_PATTERNS:
+        for path in sorted(directory.glob(pattern)):
+            return path
+
+    return None
+
+
+def parse_geyser_config(geyser_config: Path) -> GeyserConfig:
+    """Extract the Bedrock listener from a Geyser config.
+
+    Geyser listens on ``bedrock.port``, by default 19132, unless
+    ``bedrock.clone-remote-port`` makes it use the port of the Java server.
+
+    Args:
+        geyser_config: The path to the Geyser config, see ``find_geyser_config``.
+
+    Returns:
+        The Bedrock port and whether it is cloned from the Java server.
+
+    Raises:
+        ValueError: If the config is not valid YAML or the port is invalid.
+    """
+    import yaml
+
+    with geyser_config.open("rb") as f:
+        data = f.read()
+
+    try:
+        config = yaml.safe_load(data)
+    except yaml.YAMLError as exc:
+        raise ValueError(f"Invalid Geyser config {geyser_config}: {exc}") from None
+
+    bedrock = config.get("bedrock") if isinstance(config, dict) else None
+    if not isinstance(bedrock, dict):
+        bedrock = {}
+
+    port = bedrock.get("port", 19132)
+    if not isinstance(port, int) or not 0 < port < 65536:
+        raise ValueError(f"Invalid Bedrock port in {geyser_config}: {port}")
+
+    return GeyserConfig(port, bedrock.get("clone-remote-port") is True)
@@ -0,0 +1,186 @@
+"""Fleet checks for BlueBeacon.
+
+This module checks many servers at once, for hosts that keep the data directories of
+all their servers under a common root.
+"""
+
+import asyncio
+import glob
+import ipaddress
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from bluebeacon import cache, detector, ping, resolver
+from bluebeacon.history import ProbeHistory
+from bluebeacon.latency import LatencyHistory
+
+
+@dataclass(frozen=True)
+class FleetServer:
+    """A server found in the fleet, or the reason its config couldn't be read.
+
+    Attributes:
+        path: The server directory or config file.
+        address: The address the server listens on.
+        port: The port the server listens on.
+        query_port: The port of the query protocol, only read for the query depths.
+        bedrock_port: The port Geyser accepts Bedrock players on, if installed.
+        server_type: The editions inferred from the config, "both" for Java
+            servers running Geyser.
+        error: Why the server config could not be found or parsed.
+    """
+
+    path: Path
+    address: Optional[ipaddress.IPv4Address | ipaddress.IPv6Address] = None
+    port: Optional[int] = None
+    query_port: Optional[int] = None
+    bedrock_port: Optional[int] = None
+    server_type: str = "both"
+    error: Optional[str] = None
+
+
+def discover(root: str) -> List[Path]:
+    """List the server directories of a fleet.
+
+    Args:
+        root: Either a directory whose subdirectories each hold a server, or a glob
+            pattern matching server directories or config files.
+
+    Returns:
+        The server directories or config files, sorted by path.
+
+    Raises:
+        OSError: If ``root`` is not a glob pattern and can't be listed.
+    """
+    if any(char in root for char in "*?["):
+        return sorted(Path(path) for path in glob.glob(root))
+
+    return sorted(path for path in Path(root).iterdir() if path.is_dir())
+
+
+def resolve(path: Path, query: bool = False) -> FleetServer:
+    """Find and parse the config of a single server.
+
+    The parsed result is cached like for single checks, as is the Geyser config of
+    servers running Geyser, and host names are resolved through the resolver cache.
+    Failing to write the cache is ignored. With ``query``, the query port is read as
+    well and a server with the query protocol disabled is an error.
+    """
+    try:
+        config_file = detector.find_server_config(path)
+        key = cache.file_key(config_file)
+        server = cache.load(key) if key is not None else None
+        if server is not None and server.host is not None:
+            server = server._replace(address=resolver.resolve(server.host))
+        if server is None:
+            server = detector.read_server_config(config_file)
+            if key is not None:
+                try:
+                    cache.store(key, server)
+                except OSError:
+                    pass
+        query_port = server.query_port if query else None
+        if query and query_port is None:
+            # Read again to report an invalid query port
+            query_port = detector.parse_query_port(config_file)
+        geyser = cache.read_geyser_config(config_file)
+    except (OSError, ValueError) as exc:
+        return FleetServer(path, error=str(exc))
+
+    if query and query_port is None:
+        return FleetServer(
+            path, error=f"The query protocol is not enabled in {config_file}"
+        )
+
+    bedrock_port = None if geyser is None else geyser.bedrock_port(server.port)
+    server_type = server.edition
+    if server_type == "java" and bedrock_port is not None:
+        server_type = "both"
+
+    return FleetServer(
+        path, server.address, server.port, query_port, bedrock_port, server_type
+    )
+
+
+def resolve_all(
+    paths: Sequence[Path], workers: Optional[int] = None, query: bool = False
+) -> List[FleetServer]:
+    """Find and parse the configs of many servers using a pool of threads.
+
+    Args:
+        paths: The server directories or config files, see ``discover``.
+        workers: Maximum number of threads, defaults to the number of CPUs plus 4,
+            but at most 32, like ``ThreadPoolExecutor``.
+        query: Whether to read the query ports as well, see ``resolve``.
+
+    Returns:
+        One entry per path, in the same order.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(partial(resolve, query=query), paths))
+
+
+async def probe_all(
+    servers: Sequence[FleetServer],
+    server_type: Optional[str],
+    depth: str,
+    timeout_min: float,
+    timeout_max: float,
+    concurrency: int,
+) -> List[Optional[ping.PingResult]]:
+    """Ping many servers, running at most ``concurrency`` pings at the same time.
+
+    Every server is pinged with a timeout learned from its own latency history, and
+    the outcomes are added to the probe histories, like single checks.
+
+    Args:
+        servers: The servers to ping.
+        server_type: Either "both", "java" or "bedrock", or None to ping the
+            editions inferred from the config of each server.
+        depth: One of ``ping.DEPTHS``.
+        timeout_min: Lower bound of the ping timeout in seconds.
+        timeout_max: Upper bound of the ping timeout in seconds.
+        concurrency: Maximum number of servers pinged at the same time.
+
+    Returns:
+        One result per server, in the same order. Servers without an address get
+        None.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def probe(server: FleetServer) -> Optional[ping.PingResult]:
+        if server.address is None or server.port is None:
+            return None
+
+        editions = server_type or server.server_type
+        history = LatencyHistory.for_server(
+            server.address, server.port, editions, depth
+        )
+        timeout = history.timeout(timeout_min, timeout_max)
+        async with semaphore:
+            result = await ping.async_probe_server(
+                server.address,
+                server.port,
+                editions,
+                depth=depth,
+                timeout=timeout,
+                query_port=server.query_port,
+                bedrock_port=server.bedrock_port,
+            )
+
+        history.record(result, timeout)
+        try:
+            history.save()
+        except OSError:
+            pass
+        try:
+            ProbeHistory.for_server(server.address, server.port).append(result)
+        except OSError:
+            pass
+
+        return result
+
+    return await asyncio.gather(*(probe(server) for server in servers))
@@ -0,0 +1,205 @@
+"""Probe history for BlueBeacon.
+
+This module keeps the outcomes of the latest pings of a server in a ring buffer, for
+``bluebeacon stats``. Unlike the latency history, which only keeps the round-trip times
+the timeout is derived from, every outcome is kept with its time, protocol and
+failure reason.
+
+The ring buffer is a state file of constant size: a header followed by ``SLOTS``
+fixed-size records. Appending writes one record and the header in place, so it costs
+the same for the first and the millionth ping::
+
+    header  magic b"BBPH", format version, number of slots, number of pings appended
+    record  unix timestamp (float), round-trip time in seconds or NaN (float),
+            protocol code, failure code
+"""
+
+import ipaddress
+import math
+import os
+import struct
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from bluebeacon import state
+from bluebeacon.latency import percentile
+from bluebeacon.ping import PingResult
+from bluebeacon.statusfile import FAILURE_CODES, FAILURE_NAMES
+
+MAGIC = b"BBPH"
+FORMAT_VERSION = 1
+
+# One hour of checks at the default 5 s interval
+SLOTS = 720
+
+HEADER = struct.Struct("=4sHHQ")
+RECORD = struct.Struct("=dfBB2x")
+
+PROTOCOL_CODES = {None: 0, "java": 1, "bedrock": 2}
+PROTOCOL_NAMES = {code: name for name, code in PROTOCOL_CODES.items()}
+
+# Percentiles of the round-trip time reported by ``summarize``
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass(frozen=True)
+class ProbeRecord:
+    """Outcome of a past ping.
+
+    Attributes:
+        timestamp: Unix time the ping completed.
+        protocol: The protocol that got the response, "java" or "bedrock".
+        latency: Seconds the ping took, if it succeeded.
+        error: Why the server didn't respond, see ``PingResult.error``.
+    """
+
+    timestamp: float
+    protocol: Optional[str]
+    latency: Optional[float]
+    error: Optional[str]
+
+    @property
+    def success(self) -> bool:
+        """Whether the server responded."""
+        return self.error is None
+
+
+class ProbeHistory:
+    """Ring buffer of the latest ping outcomes of one server."""
+
+    def __init__(self, path: Path, slots: int = SLOTS) -> None:
+        self.path = path
+        self.slots = slots
+
+    @classmethod
+    def for_server(
+        cls, address: ipaddress.IPv4Address | ipaddress.IPv6Address, port: int
+    ) -> "ProbeHistory":
+        """Return the history of a server, shared by all editions and depths."""
+        return cls(state.state_file(f"{address}:{port}", "log"))
+
+    def append(self, result: PingResult, timestamp: Optional[float] = None) -> None:
+        """Add the outcome of a ping, overwriting the oldest one if full.
+
+        A missing or unusable file is replaced by an empty history first.
+
+        Args:
+            result: The outcome of the ping.
+            timestamp: Unix time the ping completed, defaults to now.
+
+        Raises:
+            OSError: If the history could not be written.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        failure = 0
+        if not result.success:
+            failure = FAILURE_CODES.get(result.error, FAILURE_CODES["error"])
+        record = RECORD.pack(
+            timestamp,
+            math.nan if result.latency is None else result.latency,
+            PROTOCOL_CODES.get(result.protocol, 0),
+            failure,
+        )
+
+        fd = self._open()
+        try:
+            appended = HEADER.unpack(os.pread(fd, HEADER.size, 0))[3]
+            offset = HEADER.size + appended % self.slots * RECORD.size
+            # The record first, so the header never counts a record not yet written
+            os.pwrite(fd, record, offset)
+            header = HEADER.pack(MAGIC, FORMAT_VERSION, self.slots, appended + 1)
+            os.pwrite(fd, header, 0)
+        finally:
+            os.close(fd)
+
+    def read(self) -> List[ProbeRecord]:
+        """Read the outcomes in the history, oldest first.
+
+        Returns:
+            The outcomes, or an empty list if there is no usable history.
+        """
+        try:
+            with self.path.open("rb") as f:
+                # Don't trust outcomes other users could have planted in a shared /tmp
+                if os.fstat(f.fileno()).st_uid != os.getuid():
+                    return []
+                data = f.read()
+        except OSError:
+            return []
+        if not self._valid(data):
+            return []
+
+        appended = HEADER.unpack_from(data)[3]
+        count = min(appended, self.slots)
+        records = []
+        for index in range(appended - count, appended):
+            offset = HEADER.size + index % self.slots * RECORD.size
+            timestamp, latency, protocol, failure = RECORD.unpack_from(data, offset)
+            records.append(
+                ProbeRecord(
+                    timestamp,
+                    PROTOCOL_NAMES.get(protocol),
+                    None if math.isnan(latency) else latency,
+                    FAILURE_NAMES.get(failure, "error"),
+                )
+            )
+        return records
+
+    def _open(self) -> int:
+        """Open the file for appending, replacing it if it can't be used."""
+        try:
+            fd = os.open(self.path, os.O_RDWR)
+        except FileNotFoundError:
+            pass
+        else:
+            header = os.pread(fd, HEADER.size, 0)
+            stat = os.fstat(fd)
+            if (
+                stat.st_uid == os.getuid()
+                and stat.st_size == self._size()
+                and self._valid(header, check_size=False)
+            ):
+                return fd
+            os.close(fd)
+
+        empty = HEADER.pack(MAGIC, FORMAT_VERSION, self.slots, 0)
+        state.write_atomic(self.path, empty + bytes(self.slots * RECORD.size))
+        return os.open(self.path, os.O_RDWR)
+
+    def _size(self) -> int:
+        return HEADER.size + self.slots * RECORD.size
+
+    def _valid(self, data: bytes, check_size: bool = True) -> bool:
+        """Check the header, and with ``check_size`` the size of a history file."""
+        if len(data) < HEADER.size or (check_size and len(data) != self._size()):
+            return False
+        magic, version, slots, _ = HEADER.unpack_from(data)
+        return bool(
+            magic == MAGIC and version == FORMAT_VERSION and slots == self.slots
+        )
+
+
+def summarize(records: Sequence[ProbeRecord]) -> Dict[str, Any]:
+    """Compute the success rate and latency percentiles of past pings.
+
+    Returns:
+        The number of pings, the time span they cover, the share of successful
+        pings, the round-trip time percentiles of the successful pings in seconds
+        (``p50``, ``p95`` and ``p99``) and the number of failures per reason.
+    """
+    latencies = [record.latency for record in records if record.latency is not None]
+    successes = sum(record.success for record in records)
+    errors = Counter(record.error for record in records if record.error is not None)
+
+    return {
+        "checks": len(records),
+        "first": records[0].timestamp if records else None,
+        "last": records[-1].timestamp if records else None,
+        "success_rate": successes / len(records) if records else None,
+        **{f"p{p}": percentile(latencies, p) for p in PERCENTILES},
+        "errors": dict(errors),
+    }
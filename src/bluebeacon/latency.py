@@ -0,0 +1,185 @@
+"""Latency history for BlueBeacon.
+
+This module remembers the round-trip times of recent pings between invocations and
+derives the ping timeout from them, so that checks of fast servers fail fast while
+slow servers get the time they need.
+"""
+
+import array
+import ipaddress
+import math
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+from bluebeacon import state
+from bluebeacon.ping import DEFAULT_TIMEOUT, PingResult
+
+# Number of round-trip times kept per server
+HISTORY_SIZE = 32
+
+# Smoothing factors and variance multiplier of the retransmission timeout (RFC 6298)
+ALPHA = 1 / 8
+BETA = 1 / 4
+K = 4
+
+
+def percentile(samples: Iterable[float], percent: float) -> Optional[float]:
+    """Compute a percentile with the nearest-rank method.
+
+    The result is always one of the samples.
+
+    Args:
+        samples: The samples, in any order.
+        percent: The percentile, between 0 (exclusive) and 100.
+
+    Returns:
+        The percentile, or None without any samples.
+    """
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    rank = math.ceil(percent / 100 * len(ordered))
+    return ordered[max(rank, 1) - 1]
+
+
+class LatencyHistory:
+    """Recent round-trip times of one server, oldest first.
+
+    The samples are stored as an array of 32-bit floats in a state file, which keeps
+    loading and saving them to a single small read or write.
+    """
+
+    def __init__(self, path: Path, samples: "array.array[float]") -> None:
+        self.path = path
+        self.samples = samples
+
+    @classmethod
+    def load(cls, key: str) -> "LatencyHistory":
+        """Load the history of a server.
+
+        Args:
+            key: Identifies the server and the way it is probed.
+
+        Returns:
+            The stored history, or an empty one if there is none or it can't be read.
+        """
+        path = state.state_file(key, "rtt")
+        samples = array.array("f")
+        try:
+            with path.open("rb") as f:
+                # Don't trust samples other users could have planted in a shared /tmp
+                if os.fstat(f.fileno()).st_uid == os.getuid():
+                    samples.frombytes(f.read())
+        except (OSError, ValueError):
+            samples = array.array("f")
+
+        return cls(path, samples[-HISTORY_SIZE:])
+
+    @classmethod
+    def for_server(
+        cls,
+        address: ipaddress.IPv4Address | ipaddress.IPv6Address,
+        port: int,
+        server_type: str,
+        depth: str,
+    ) -> "LatencyHistory":
+        """Load the history of a server probed in the given way, see ``load``."""
+        return cls.load(f"{address}:{port}/{server_type}/{depth}")
+
+    def save(self) -> None:
+        """Store the history.
+
+        Raises:
+            OSError: If the history could not be written.
+        """
+        state.write_atomic(self.path, self.samples.tobytes())
+
+    def add(self, rtt: float) -> None:
+        """Add a round-trip time in seconds, dropping the oldest one if full."""
+        self.samples.append(rtt)
+        del self.samples[:-HISTORY_SIZE]
+
+    def record(self, result: PingResult, timeout: float) -> None:
+        """Add the outcome of a ping that used the given timeout.
+
+        Successful pings add their latency. A timeout only proves that the round trip
+        takes longer than the timeout, so it adds twice the timeout. Like TCP's
+        retransmission timer, the timeout then backs off exponentially until a slow
+        server gets through. Other failures say nothing about the latency and are
+        ignored.
+        """
+        if result.latency is not None:
+            self.add(result.latency)
+        elif result.error == "timeout":
+            self.add(2 * timeout)
+
+    def timeout(self, minimum: float, maximum: float) -> float:
+        """Derive the ping timeout from the history.
+
+        Computes the smoothed round-trip time and its variation like TCP's
+        retransmission timeout and allows for four times the variation on top.
+        Without any history ``DEFAULT_TIMEOUT`` is used.
+
+        Args:
+            minimum: Lower bound of the timeout in seconds.
+            maximum: Upper bound of the timeout in seconds.
+
+        Returns:
+            The timeout in seconds.
+        """
+        if not self.samples:
+            return min(max(DEFAULT_TIMEOUT, minimum), maximum)
+
+        srtt = self.samples[0]
+        rttvar = srtt / 2
+        for rtt in self.samples[1:]:
+            rttvar = (1 - BETA) * rttvar + BETA * abs(srtt - rtt)
+            srtt = (1 - ALPHA) * srtt + ALPHA * rtt
+
+        return min(max(srtt + K * rttvar, minimum), maximum)
+
+    def percentile(self, percent: float, window: int) -> Optional[float]:
+        """Compute a percentile of the latest round-trip times, see ``percentile``.
+
+        Args:
+            percent: The percentile, between 0 (exclusive) and 100.
+            window: Number of latest samples to use.
+
+        Returns:
+            The percentile in seconds, or None without any history.
+        """
+        return percentile(self.samples[-window:], percent)
+
+
+@dataclass(frozen=True)
+class LatencyPolicy:
+    """Latency objective that tells slow servers from healthy ones.
+
+    Attributes:
+        max_latency: Highest acceptable round-trip time in seconds.
+        percentile: Judge this percentile of the latest round-trip times instead
+            of only the latest one, e.g. 95.
+        window: Number of latest round-trip times the percentile is taken over.
+    """
+
+    max_latency: float
+    percentile: Optional[float] = None
+    window: int = 10
+
+    def degraded(self, result: PingResult, history: LatencyHistory) -> bool:
+        """Check whether a successful ping misses the objective.
+
+        Failed pings are not degraded, they are down. The history must already
+        include the ping, see ``LatencyHistory.record``. Timeouts in the history
+        count as twice their timeout, so a server that recently timed out stays
+        degraded until the timeouts drop out of the window.
+        """
+        if not result.success:
+            return False
+        if self.percentile is None:
+            latency = result.latency
+        else:
+            latency = history.percentile(self.percentile, self.window)
+        return latency is not None and latency > self.max_latency
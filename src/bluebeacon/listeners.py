@@ -0,0 +1,131 @@
+"""Listener checks for BlueBeacon.
+
+This module reads the socket tables of the kernel in ``/proc/net`` to find out whether
+anything listens on a port, without sending any traffic. During the long start of a
+modded server this rules out pings that could only time out.
+
+The tables only list the sockets of the network namespace BlueBeacon runs in, so the
+check only applies to servers running in the same container.
+"""
+
+import ipaddress
+import sys
+from typing import Optional
+
+# Socket tables per transport protocol
+PROC_NET_FILES = {
+    "tcp": ("/proc/net/tcp", "/proc/net/tcp6"),
+    "udp": ("/proc/net/udp", "/proc/net/udp6"),
+}
+
+# Socket states of a listening TCP socket and of an unconnected UDP socket
+LISTENING_STATES = {"tcp": "0A", "udp": "07"}
+
+Address = ipaddress.IPv4Address | ipaddress.IPv6Address
+
+
+def is_listening(address: Address, port: int, transport: str) -> Optional[bool]:
+    """Check whether a socket accepts connections or datagrams on an address.
+
+    Sockets bound to the wildcard address listen on every address.
+
+    Args:
+        address: The address the server is pinged on.
+        port: The port the server is pinged on.
+        transport: Either "tcp" or "udp".
+
+    Returns:
+        Whether a socket listens on the address and port, or None if the socket
+        tables could not be read, e.g. on other operating systems.
+    """
+    state = LISTENING_STATES[transport].encode()
+    # Ports are printed as four hex digits after the address
+    port_field = b":%04X " % port
+    readable = False
+
+    for path in PROC_NET_FILES[transport]:
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except OSError:
+            # Without IPv6 support the tcp6 and udp6 tables are missing
+            continue
+        readable = True
+
+        # Only split the table into sockets if one of them uses the port
+        if port_field not in data:
+            continue
+
+        for line in data.splitlines()[1:]:
+            fields = line.split()
+            if len(fields) < 4 or fields[3] != state:
+                continue
+            hex_address, _, hex_port = fields[1].partition(b":")
+            if int(hex_port, 16) != port:
+                continue
+
+            local_address = _decode_address(hex_address)
+            if (
+                local_address.is_unspecified
+                or address.is_unspecified
+                or _same_address(local_address, address)
+            ):
+                return True
+
+    return False if readable else None
+
+
+def listening_server_type(
+    address: Address,
+    port: int,
+    server_type: str,
+    bedrock_port: Optional[int] = None,
+) -> Optional[str]:
+    """Narrow a server type to the editions that have a listening socket.
+
+    Java servers listen on TCP, Bedrock servers on UDP. Editions whose listener
+    can't be checked are kept.
+
+    Args:
+        address: The address the server is pinged on.
+        port: The port the server is pinged on.
+        server_type: Either "both", "java" or "bedrock".
+        bedrock_port: The port Bedrock is pinged on, defaults to ``port``.
+
+    Returns:
+        "both", "java" or "bedrock", or None if nothing listens for any of the
+        editions of ``server_type``.
+    """
+    java = server_type in ("both", "java") and is_listening(address, port, "tcp")
+    bedrock = server_type in ("both", "bedrock") and is_listening(
+        address, bedrock_port or port, "udp"
+    )
+    if java is not False and bedrock is not False:
+        return "both"
+    if java is not False:
+        return "java"
+    if bedrock is not False:
+        return "bedrock"
+    return None
+
+
+def _decode_address(hex_address: bytes) -> Address:
+    """Decode an address of a socket table.
+
+    The kernel prints every 32-bit word of the address as a number in host byte
+    order.
+    """
+    packed = b"".join(
+        int(hex_address[i : i + 8], 16).to_bytes(4, sys.byteorder)
+        for i in range(0, len(hex_address), 8)
+    )
+    return ipaddress.ip_address(packed)
+
+
+def _same_address(a: Address, b: Address) -> bool:
+    """Compare two addresses, treating IPv4-mapped IPv6 addresses as IPv4."""
+    if isinstance(a, ipaddress.IPv6Address) and a.ipv4_mapped is not None:
+        a = a.ipv4_mapped
+    if isinstance(b, ipaddress.IPv6Address) and b.ipv4_mapped is not None:
+        b = b.ipv4_mapped
+    return a == b
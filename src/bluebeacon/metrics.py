@@ -0,0 +1,200 @@
+"""Prometheus exporter for BlueBeacon.
+
+This module collects the results of the resident prober and serves them in the
+Prometheus text format. Scrapes only return the text rendered after the latest probe,
+they never ping the server themselves.
+"""
+
+import http.server
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from bluebeacon.ping import PingResult
+
+# Upper bounds in seconds of the probe latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Metrics:
+    """Thread-safe collection of the probe results of one server."""
+
+    def __init__(self, server: str) -> None:
+        """
+        Args:
+            server: Identifies the server in the ``server`` label, e.g. its address.
+        """
+        self.labels = f'server="{_escape(server)}"'
+        self._lock = threading.Lock()
+        self._rendered: Optional[bytes] = None
+        self._result: Optional[PingResult] = None
+        self._timestamp = 0.0
+        self._consecutive_failures = 0
+        self._bucket_counts = [0] * len(LATENCY_BUCKETS)
+        self._latency_sum = 0.0
+        self._latency_count = 0
+
+    def observe(self, result: PingResult) -> None:
+        """Record the outcome of a probe."""
+        with self._lock:
+            self._result = result
+            self._timestamp = time.time()
+            if result.success:
+                self._consecutive_failures = 0
+            else:
+                self._consecutive_failures += 1
+
+            if result.latency is not None:
+                for i, bound in enumerate(LATENCY_BUCKETS):
+                    if result.latency <= bound:
+                        self._bucket_counts[i] += 1
+                self._latency_sum += result.latency
+                self._latency_count += 1
+
+            self._rendered = None
+
+    def render(self) -> bytes:
+        """Return the metrics in the Prometheus text format.
+
+        The text is rendered once per probe and reused by every scrape in between.
+        """
+        with self._lock:
+            if self._rendered is None:
+                self._rendered = self._render()
+            return self._rendered
+
+    def _render(self) -> bytes:
+        labels = self.labels
+        lines: List[str] = []
+
+        def metric(
+            name: str,
+            kind: str,
+            help_text: str,
+            samples: List[Tuple[str, int | float]],
+        ) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(
+                f"{name}{suffix} {_format_value(value)}" for suffix, value in samples
+            )
+
+        result = self._result
+        if result is not None:
+            metric(
+                "bluebeacon_up",
+                "gauge",
+                "Whether the server responded to the latest probe.",
+                [(f"{{{labels}}}", int(result.success))],
+            )
+            metric(
+                "bluebeacon_consecutive_failures",
+                "gauge",
+                "Number of probes that failed in a row.",
+                [(f"{{{labels}}}", self._consecutive_failures)],
+            )
+            metric(
+                "bluebeacon_last_probe_timestamp_seconds",
+                "gauge",
+                "Unix time the latest probe completed.",
+                [(f"{{{labels}}}", self._timestamp)],
+            )
+            if result.players_online is not None:
+                metric(
+                    "bluebeacon_players_online",
+                    "gauge",
+                    "Number of players online, as of the latest status.",
+                    [(f"{{{labels}}}", result.players_online)],
+                )
+            if result.players_max is not None:
+                metric(
+                    "bluebeacon_players_max",
+                    "gauge",
+                    "Maximum number of players, as of the latest status.",
+                    [(f"{{{labels}}}", result.players_max)],
+                )
+
+        buckets = [
+            (f'_bucket{{{labels},le="{bound:g}"}}', count)
+            for bound, count in zip(LATENCY_BUCKETS, self._bucket_counts)
+        ]
+        buckets.append((f'_bucket{{{labels},le="+Inf"}}', self._latency_count))
+        metric(
+            "bluebeacon_probe_duration_seconds",
+            "histogram",
+            "Duration of successful probes.",
+            buckets
+            + [
+                (f"_sum{{{labels}}}", self._latency_sum),
+                (f"_count{{{labels}}}", self._latency_count),
+            ],
+        )
+
+        return ("\n".join(lines) + "\n").encode()
+
+
+def _format_value(value: int | float) -> str:
+    """Format a sample value exactly.
+
+    Counts are written as integers and other values with the shortest repr that
+    reads back as the same float, as rounding would make timestamps drift and
+    counters stall.
+    """
+    if isinstance(value, int):
+        return str(value)
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    server: "MetricsServer"
+
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+
+        body = self.server.metrics.render()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        # Scrapes every few seconds would flood the container log
+        pass
+
+
+class MetricsServer(http.server.ThreadingHTTPServer):
+    """HTTP server exporting the collected metrics on ``/metrics``."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], metrics: Metrics) -> None:
+        self.metrics = metrics
+        super().__init__(address, _MetricsHandler)
+
+
+def start_server(address: Tuple[str, int], metrics: Metrics) -> MetricsServer:
+    """Serve the metrics from a background thread.
+
+    Args:
+        address: Host and port to listen on.
+        metrics: The metrics to export.
+
+    Returns:
+        The running server.
+
+    Raises:
+        OSError: If the address could not be bound.
+    """
+    server = MetricsServer(address, metrics)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -3,80 +3,624 @@
 This module handles pinging Minecraft servers to check their availability.
 """
 
+import errno
 import ipaddress
+import socket
+import sys
 import threading
-from typing import Callable
+import time
+from dataclasses import dataclass
+from functools import partial
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 
-from mcstatus import BedrockServer, JavaServer
+if TYPE_CHECKING:
+    from mcstatus import BedrockServer, JavaServer
+
+# Probe depths, from the cheapest to the most thorough check
+DEPTHS = ("connect", "legacy", "query", "query-full", "status")
+
+# 250 ms are enough for local servers. This results in a failure taking ~750 ms, as
+# the probes make 3 attempts in total. This keeps the total runtime under 1 s.
+DEFAULT_TIMEOUT = 0.25
+
+# Number of attempts per probe, matching the default of mcstatus
+TRIES = 3
+
+# Legacy (pre-1.7) server list ping, answered with a 0xFF kick packet
+LEGACY_PING = b"\xfe\x01"
+
+# RakNet unconnected ping: packet ID, time, offline message magic and client GUID
+RAKNET_UNCONNECTED_PING = bytes.fromhex(
+    "01" "0000000000000000" "00ffff00fefefefefdfdfdfd12345678" "0000000000000000"
+)
+RAKNET_UNCONNECTED_PONG_ID = 0x1C
+
+# Errors proving that nothing answers on the address, so retrying can't help
+REFUSAL_ERRNOS = (errno.ECONNREFUSED, errno.EHOSTUNREACH, errno.ENETUNREACH)
+
+R = TypeVar("R")
+
+
+def __getattr__(name: str) -> Any:
+    # mcstatus is by far the slowest dependency to import, so it is only loaded once a
+    # status ping needs it
+    if name in ("BedrockServer", "JavaServer"):
+        import mcstatus
+
+        return getattr(mcstatus, name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@dataclass(frozen=True)
+class PingResult:
+    """Outcome of pinging a server.
+
+    Attributes:
+        success: Whether the server responded.
+        protocol: The protocol that got the response, "java" or "bedrock".
+        latency: Seconds the successful probe took, including its failed attempts.
+        error: Why the server didn't respond: "timeout" if any probe timed out,
+            "refused" if every probe was refused and "error" otherwise.
+        version: Version name the server reported, only known from a full status.
+        protocol_version: Protocol version number the server reported.
+        players_online: Number of players online.
+        players_max: Maximum number of players.
+        degraded: Whether the server responded, but slower than its latency
+            objective, see ``bluebeacon.latency.LatencyPolicy``.
+        throttled: Whether the CPU quota of the container throttled the check, see
+            ``bluebeacon.cgroup``.
+    """
+
+    success: bool
+    protocol: Optional[str] = None
+    latency: Optional[float] = None
+    error: Optional[str] = None
+    version: Optional[str] = None
+    protocol_version: Optional[int] = None
+    players_online: Optional[int] = None
+    players_max: Optional[int] = None
+    degraded: bool = False
+    throttled: bool = False
+
+    @classmethod
+    def from_response(
+        cls, protocol: str, latency: float, response: Any
+    ) -> "PingResult":
+        """Create the result of a successful probe.
+
+        Args:
+            protocol: The protocol that got the response, "java" or "bedrock".
+            latency: Seconds the probe took.
+            response: The status response of mcstatus, the query response, or None
+                for probes that don't request the status.
+        """
+        # Query responses carry the player counts themselves
+        players_online = getattr(response, "players_online", None)
+        if isinstance(players_online, int):
+            return cls(
+                True,
+                protocol,
+                latency,
+                version=response.version,
+                players_online=players_online,
+                players_max=int(response.players_max),
+            )
+
+        version = getattr(response, "version", None)
+        players = getattr(response, "players", None)
+        if version is None or players is None:
+            return cls(True, protocol, latency)
+
+        return cls(
+            True,
+            protocol,
+            latency,
+            version=str(version.name),
+            protocol_version=int(version.protocol),
+            players_online=int(players.online),
+            players_max=int(players.max),
+        )
 
 
 def ping_server(
     server_address: ipaddress.IPv4Address | ipaddress.IPv6Address,
     server_port: int,
     server_type: str,
+    depth: str = "status",
+    timeout: float = DEFAULT_TIMEOUT,
+    query_port: Optional[int] = None,
+    bedrock_port: Optional[int] = None,
+    deadline: Optional[float] = None,
 ) -> bool:
+    """Ping a Minecraft server, see ``probe_server``.
+
+    Returns:
+        True if the server responds successfully, False otherwise.
+    """
+    return probe_server(
+        server_address,
+        server_port,
+        server_type,
+        depth=depth,
+        timeout=timeout,
+        query_port=query_port,
+        bedrock_port=bedrock_port,
+        deadline=deadline,
+    ).success
+
+
+def probe_server(
+    server_address: ipaddress.IPv4Address | ipaddress.IPv6Address,
+    server_port: int,
+    server_type: str,
+    depth: str = "status",
+    timeout: float = DEFAULT_TIMEOUT,
+    query_port: Optional[int] = None,
+    bedrock_port: Optional[int] = None,
+    deadline: Optional[float] = None,
+) -> PingResult:
     """Ping a Minecraft server using parallel protocol checks using daemon threads.
 
-    Attempts both Java and Bedrock status checks concurrently and returns True
-    as soon as one of them succeeds. Keeps a simple synchronous API.
+    Attempts both Java and Bedrock checks concurrently and returns as soon as one of
+    them succeeds. Keeps a simple synchronous API.
+
+    The depth trades the fidelity of the check for latency and load on the server:
+
+    - ``connect`` only opens a TCP connection (Java) or waits for the reply to a
+      RakNet unconnected ping (Bedrock), without parsing anything.
+    - ``legacy`` sends the single packet legacy ping and waits for the kick packet
+      (Java). Bedrock servers are probed as with ``connect``.
+    - ``query`` and ``query-full`` request the basic or full stat over the UDP
+      query protocol (Java), see ``bluebeacon.query``. Bedrock servers are probed
+      as with ``connect``.
+    - ``status`` performs a full status request, including decoding the response.
+
+    Only timeouts use up the attempts of a probe. A refused connection, or an ICMP
+    port unreachable in reply to a datagram, fails the probe at once.
+
+    The ``deadline`` bounds the whole ping, which the timeout can't: it applies to
+    every attempt, and for a status request to every read of a response that drips
+    in.
+
+    The probe that loses the race keeps running in its daemon thread until it ends
+    on its own, as do the probes still running at the deadline. This is of no
+    concern for a short-lived process, but long-running services should use
+    ``async_probe_server`` instead.
 
     Args:
         server_address: IPv4 or IPv6 address of the Minecraft server to ping
         server_port: Network port number the Minecraft server is listening on
         server_type: Either "both", "java" or "bedrock"
+        depth: One of DEPTHS
+        timeout: Seconds to wait for each network operation of an attempt
+        query_port: Query port of the server, defaults to ``server_port``
+        bedrock_port: Port of the Bedrock listener, defaults to ``server_port``. On
+            Java servers running Geyser, Bedrock players connect on another port
+        deadline: ``time.monotonic()`` by which to stop waiting for the probes and
+            fail as "timeout", however many attempts they have left
 
     Returns:
-        True if the server responds successfully, False otherwise.
+        The outcome of the ping, with the latency of the successful probe.
     """
-
-    if server_type not in ["both", "java", "bedrock"]:
-        raise ValueError("Invalid server type")
-
-    host = str(server_address)
-    if isinstance(server_address, ipaddress.IPv6Address):
-        host = f"[{host}]"
-
-    # 250 ms are enough for local servers. This results in a failure taking ~750 ms, as the library performs 3 checks in
-    # total. This keeps the total runtime under 1 s.
-    timeout = 0.25
+    _check_arguments(server_type, depth)
+    host = _mcstatus_host(server_address)
 
     # Use condition-based synchronization to avoid fixed-time waiting
     lock = threading.Lock()
     cond = threading.Condition(lock)
-    success = False
+    result: Optional[PingResult] = None
+    errors: List[BaseException] = []
     finished_threads = 0
 
-    def worker(
-        server_factory: Callable[[str, int, float], JavaServer | BedrockServer],
-    ) -> None:
-        nonlocal success, finished_threads
+    def worker(protocol: str, probe: Callable[[], object]) -> None:
+        nonlocal result, finished_threads
+        start = time.perf_counter()
         try:
-            server = server_factory(host, server_port, timeout)
-            server.status()
-            success = True
-        except (TimeoutError, IOError):
+            response = probe()
+            latency = time.perf_counter() - start
+            with cond:
+                if result is None:
+                    result = PingResult.from_response(protocol, latency, response)
+        except (TimeoutError, IOError) as exc:
             # Treat these simply as a failed check
-            pass
-
-        with cond:
-            finished_threads += 1
-            cond.notify()
+            with cond:
+                errors.append(exc)
+        finally:
+            # Also on unexpected errors, so the caller never waits forever
+            with cond:
+                finished_threads += 1
+                cond.notify()
 
-    threads = []
+    probes: List[Tuple[str, Callable[[], object]]] = []
 
     if server_type in ["both", "java"]:
-        threads.append(threading.Thread(target=worker, args=(JavaServer,), daemon=True))
+        if depth == "status":
+            java_probe = _status_probe("JavaServer", host, server_port, timeout)
+        elif depth == "legacy":
+            java_probe = partial(
+                _retry, _legacy_ping, server_address, server_port, timeout
+            )
+        elif depth in ("query", "query-full"):
+            from bluebeacon import query
+
+            java_probe = partial(
+                _retry,
+                partial(query.query, full=depth == "query-full"),
+                server_address,
+                query_port or server_port,
+                timeout,
+            )
+        else:
+            java_probe = partial(_retry, _connect, server_address, server_port, timeout)
+        probes.append(("java", java_probe))
     if server_type in ["both", "bedrock"]:
-        threads.append(
-            threading.Thread(target=worker, args=(BedrockServer,), daemon=True)
-        )
+        bedrock_port = bedrock_port or server_port
+        if depth == "status":
+            status_probe = _status_probe("BedrockServer", host, bedrock_port, timeout)
+
+            def bedrock_status() -> object:
+                # mcstatus sends the status request from an unconnected socket, which
+                # never sees the ICMP port unreachable of a closed port and waits for
+                # every timeout instead. A RakNet ping from a connected socket fails
+                # immediately in that case.
+                _retry(_raknet_ping, server_address, bedrock_port, timeout)
+                return status_probe()
+
+            probes.append(("bedrock", bedrock_status))
+        else:
+            bedrock_probe = partial(
+                _retry, _raknet_ping, server_address, bedrock_port, timeout
+            )
+            probes.append(("bedrock", bedrock_probe))
+
+    threads = [
+        threading.Thread(target=worker, args=probe, daemon=True) for probe in probes
+    ]
 
     for t in threads:
         t.start()
 
-    # Wait until either one succeeds or both have finished, without a fixed timeout
+    # Wait until either one succeeds or both have finished, or the deadline passes
     with cond:
-        while not success and finished_threads < len(threads):
-            cond.wait()
+        while result is None and finished_threads < len(threads):
+            if deadline is None:
+                cond.wait()
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return PingResult(False, error="timeout")
+            cond.wait(remaining)
+
+        if result is not None:
+            return result
+        return PingResult(False, error=_failure_reason(errors))
+
+
+async def async_ping_server(
+    server_address: ipaddress.IPv4Address | ipaddress.IPv6Address,
+    server_port: int,
+    server_type: str,
+    depth: str = "status",
+    timeout: float = DEFAULT_TIMEOUT,
+    query_port: Optional[int] = None,
+    bedrock_port: Optional[int] = None,
+    deadline: Optional[float] = None,
+) -> bool:
+    """Ping a Minecraft server from a running event loop, see ``async_probe_server``.
+
+    Returns:
+        True if the server responds successfully, False otherwise.
+    """
+    result = await async_probe_server(
+        server_address,
+        server_port,
+        server_type,
+        depth=depth,
+        timeout=timeout,
+        query_port=query_port,
+        bedrock_port=bedrock_port,
+        deadline=deadline,
+    )
+    return result.success
+
+
+async def async_probe_server(
+    server_address: ipaddress.IPv4Address | ipaddress.IPv6Address,
+    server_port: int,
+    server_type: str,
+    depth: str = "status",
+    timeout: float = DEFAULT_TIMEOUT,
+    query_port: Optional[int] = None,
+    bedrock_port: Optional[int] = None,
+    deadline: Optional[float] = None,
+) -> PingResult:
+    """Ping a Minecraft server using concurrent tasks of the running event loop.
+
+    Checks the server like ``probe_server``, using the async status requests of
+    mcstatus. As soon as one probe succeeds the others are cancelled, and their
+    sockets are closed before this returns. The probes still running at the
+    ``deadline`` are cancelled the same way, as are all probes when the coroutine
+    itself is cancelled, so no threads or sockets outlive the call.
+
+    Args:
+        server_address: IPv4 or IPv6 address of the Minecraft server to ping
+        server_port: Network port number the Minecraft server is listening on
+        server_type: Either "both", "java" or "bedrock"
+        depth: One of DEPTHS
+        timeout: Seconds to wait for each network operation of an attempt
+        query_port: Query port of the server, defaults to ``server_port``
+        bedrock_port: Port of the Bedrock listener, defaults to ``server_port``. On
+            Java servers running Geyser, Bedrock players connect on another port
+        deadline: ``time.monotonic()`` by which to stop waiting for the probes and
+            fail as "timeout", however many attempts they have left
+
+    Returns:
+        The outcome of the ping, with the latency of the successful probe.
+    """
+    # Deferred like mcstatus, as the CLI never runs an event loop
+    import asyncio
+
+    _check_arguments(server_type, depth)
+    host = _mcstatus_host(server_address)
+
+    async def run(protocol: str, probe: Callable[[], Awaitable[object]]) -> PingResult:
+        start = time.perf_counter()
+        response = await probe()
+        return PingResult.from_response(protocol, time.perf_counter() - start, response)
+
+    probes: List[Tuple[str, Callable[[], Awaitable[object]]]] = []
+
+    if server_type in ["both", "java"]:
+        if depth == "status":
+            java_probe = _async_status_probe("JavaServer", host, server_port, timeout)
+        elif depth == "legacy":
+            java_probe = partial(
+                _async_retry, _async_legacy_ping, server_address, server_port, timeout
+            )
+        elif depth in ("query", "query-full"):
+            from bluebeacon import query
+
+            java_probe = partial(
+                _async_retry,
+                partial(query.async_query, full=depth == "query-full"),
+                server_address,
+                query_port or server_port,
+                timeout,
+            )
+        else:
+            java_probe = partial(
+                _async_retry, _async_connect, server_address, server_port, timeout
+            )
+        probes.append(("java", java_probe))
+    if server_type in ["both", "bedrock"]:
+        bedrock_port = bedrock_port or server_port
+        raknet_probe = partial(
+            _async_retry, _async_raknet_ping, server_address, bedrock_port, timeout
+        )
+        if depth == "status":
+            status_probe = _async_status_probe(
+                "BedrockServer", host, bedrock_port, timeout
+            )
+
+            async def bedrock_status() -> object:
+                # See probe_server on why the RakNet ping goes first
+                await raknet_probe()
+                return await status_probe()
+
+            probes.append(("bedrock", bedrock_status))
+        else:
+            probes.append(("bedrock", raknet_probe))
+
+    pending = {asyncio.create_task(run(protocol, probe)) for protocol, probe in probes}
+    errors: List[BaseException] = []
+    try:
+        while pending:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return PingResult(False, error="timeout")
+            done, pending = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                exc = task.exception()
+                if exc is None:
+                    return task.result()
+                if not isinstance(exc, (TimeoutError, IOError)):
+                    raise exc
+                # Treat these simply as a failed check
+                errors.append(exc)
+    finally:
+        for task in pending:
+            task.cancel()
+        # Wait for the cancelled probes to close their sockets
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    return PingResult(False, error=_failure_reason(errors))
+
+
+def _check_arguments(server_type: str, depth: str) -> None:
+    """Reject unknown server types and probe depths."""
+    if server_type not in ["both", "java", "bedrock"]:
+        raise ValueError("Invalid server type")
+    if depth not in DEPTHS:
+        raise ValueError("Invalid probe depth")
+
+
+def _mcstatus_host(address: ipaddress.IPv4Address | ipaddress.IPv6Address) -> str:
+    """Format an address as host for mcstatus, which expects IPv6 in brackets."""
+    if isinstance(address, ipaddress.IPv6Address):
+        return f"[{address}]"
+    return str(address)
+
+
+def _failure_reason(errors: List[BaseException]) -> str:
+    """Summarize why all probes failed, see ``PingResult.error``."""
+    if any(isinstance(exc, TimeoutError) for exc in errors):
+        return "timeout"
+    if errors and all(is_refusal(exc) for exc in errors):
+        return "refused"
+    return "error"
+
+
+def _status_probe(
+    class_name: str, host: str, port: int, timeout: float
+) -> Callable[[], object]:
+    """Create a probe requesting the full status through mcstatus."""
+    # Resolved through the module, so mcstatus is imported lazily and can be patched
+    server_class: type[JavaServer] | type[BedrockServer] = getattr(
+        sys.modules[__name__], class_name
+    )
+
+    return lambda: server_class(host, port, timeout).status()
+
+
+def _async_status_probe(
+    class_name: str, host: str, port: int, timeout: float
+) -> Callable[[], Awaitable[object]]:
+    """Create a probe requesting the full status through the async API of mcstatus."""
+    server_class: type[JavaServer] | type[BedrockServer] = getattr(
+        sys.modules[__name__], class_name
+    )
+
+    return lambda: server_class(host, port, timeout).async_status()
+
+
+def _retry(
+    probe: Callable[[ipaddress.IPv4Address | ipaddress.IPv6Address, int, float], R],
+    address: ipaddress.IPv4Address | ipaddress.IPv6Address,
+    port: int,
+    timeout: float,
+) -> R:
+    """Run a probe up to TRIES times, raising the last error if all attempts fail.
+
+    Refusals end the probe after the first attempt, see ``is_refusal``.
+    """
+    for _ in range(TRIES - 1):
+        try:
+            return probe(address, port, timeout)
+        except (TimeoutError, IOError) as exc:
+            if is_refusal(exc):
+                raise
+    return probe(address, port, timeout)
+
+
+async def _async_retry(
+    probe: Callable[
+        [ipaddress.IPv4Address | ipaddress.IPv6Address, int, float], Awaitable[R]
+    ],
+    address: ipaddress.IPv4Address | ipaddress.IPv6Address,
+    port: int,
+    timeout: float,
+) -> R:
+    """Async version of ``_retry``."""
+    for _ in range(TRIES - 1):
+        try:
+            return await probe(address, port, timeout)
+        except (TimeoutError, IOError) as exc:
+            if is_refusal(exc):
+                raise
+    return await probe(address, port, timeout)
+
+
+def is_refusal(exc: BaseException) -> bool:
+    """Check whether an error proves that nothing answers on the probed address.
+
+    This is the case for refused connections, which is also how the kernel reports an
+    ICMP port unreachable on a connected UDP socket, and for unreachable hosts and
+    networks. Timeouts and unexpected replies are not refusals.
+    """
+    return isinstance(exc, ConnectionRefusedError) or (
+        isinstance(exc, OSError) and exc.errno in REFUSAL_ERRNOS
+    )
+
+
+def _connect(
+    address: ipaddress.IPv4Address | ipaddress.IPv6Address, port: int, timeout: float
+) -> None:
+    """Open and close a TCP connection to the server."""
+    with socket.create_connection((str(address), port), timeout=timeout):
+        pass
+
+
+def _legacy_ping(
+    address: ipaddress.IPv4Address | ipaddress.IPv6Address, port: int, timeout: float
+) -> None:
+    """Send a legacy server list ping and wait for the kick packet answering it."""
+    with socket.create_connection((str(address), port), timeout=timeout) as sock:
+        sock.sendall(LEGACY_PING)
+        if sock.recv(1) != b"\xff":
+            raise IOError("Unexpected response to legacy ping")
+
+
+def _raknet_ping(
+    address: ipaddress.IPv4Address | ipaddress.IPv6Address, port: int, timeout: float
+) -> None:
+    """Send a RakNet unconnected ping and wait for the pong."""
+    family = socket.AF_INET6 if address.version == 6 else socket.AF_INET
+    with socket.socket(family, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect((str(address), port))
+        sock.send(RAKNET_UNCONNECTED_PING)
+        data = sock.recv(2048)
+        if not data or data[0] != RAKNET_UNCONNECTED_PONG_ID:
+            raise IOError("Unexpected response to RakNet ping")
+
+
+async def _async_connect(
+    address: ipaddress.IPv4Address | ipaddress.IPv6Address, port: int, timeout: float
+) -> None:
+    """Async version of ``_connect``."""
+    import asyncio
+
+    _, writer = await asyncio.wait_for(
+        asyncio.open_connection(str(address), port), timeout
+    )
+    writer.close()
+    await writer.wait_closed()
+
+
+async def _async_legacy_ping(
+    address: ipaddress.IPv4Address | ipaddress.IPv6Address, port: int, timeout: float
+) -> None:
+    """Async version of ``_legacy_ping``."""
+    import asyncio
+
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(str(address), port), timeout
+    )
+    try:
+        writer.write(LEGACY_PING)
+        response = await asyncio.wait_for(reader.read(1), timeout)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+    if response != b"\xff":
+        raise IOError("Unexpected response to legacy ping")
+
+
+async def _async_raknet_ping(
+    address: ipaddress.IPv4Address | ipaddress.IPv6Address, port: int, timeout: float
+) -> None:
+    """Async version of ``_raknet_ping``."""
+    import asyncio
 
-    return success
+    loop = asyncio.get_running_loop()
+    family = socket.AF_INET6 if address.version == 6 else socket.AF_INET
+    with socket.socket(family, socket.SOCK_DGRAM) as sock:
+        sock.setblocking(False)
+        await loop.sock_connect(sock, (str(address), port))
+        await loop.sock_sendall(sock, RAKNET_UNCONNECTED_PING)
+        data = await asyncio.wait_for(loop.sock_recv(sock, 2048), timeout)
+        if not data or data[0] != RAKNET_UNCONNECTED_PONG_ID:
+            raise IOError("Unexpected response to RakNet ping")
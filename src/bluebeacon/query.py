@@ -0,0 +1,306 @@
+"""Query protocol client for BlueBeacon.
+
+This module implements the UDP query protocol of Java Edition servers (GameSpy4), which
+servers with ``enable-query=true`` answer on their query port. A query needs a
+challenge token first. Tokens are bound to the address and port of the client and
+stay valid for about 30 seconds, so sessions keep their socket and token and are
+reused by later queries of the same process, which then need a single round trip.
+"""
+
+import ipaddress
+import os
+import select
+import socket
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+QUERY_MAGIC = b"\xfe\xfd"
+HANDSHAKE = 9
+STAT = 0
+
+# Vanilla servers forget tokens after 30 seconds, reuse them a bit shorter
+TOKEN_LIFETIME = 25.0
+
+# Padding that turns a basic stat request into a full stat request
+FULL_STAT_PADDING = b"\x00\x00\x00\x00"
+
+# Marks the start of the player list in a full stat response
+PLAYER_SECTION = b"\x00\x01player_\x00\x00"
+
+Address = ipaddress.IPv4Address | ipaddress.IPv6Address
+
+
+@dataclass(frozen=True)
+class QueryResponse:
+    """Answer to a basic or full stat request.
+
+    Attributes:
+        motd: The message of the day.
+        map: Name of the world.
+        players_online: Number of players online.
+        players_max: Maximum number of players.
+        version: Version name, only sent in a full stat.
+        plugins: Server software and plugins, only sent in a full stat.
+        players: Names of the players online, only sent in a full stat.
+    """
+
+    motd: str
+    map: str
+    players_online: int
+    players_max: int
+    version: Optional[str] = None
+    plugins: Optional[str] = None
+    players: Tuple[str, ...] = ()
+
+
+class QuerySession:
+    """Connected UDP socket to the query port of a server, with its token."""
+
+    def __init__(self, address: Address, port: int) -> None:
+        self.key = (str(address), port)
+        family = socket.AF_INET6 if address.version == 6 else socket.AF_INET
+        self.sock = socket.socket(family, socket.SOCK_DGRAM)
+        try:
+            # Non-blocking, so the same socket works with select and event loops
+            self.sock.setblocking(False)
+            self.sock.connect(self.key)
+        except OSError:
+            self.sock.close()
+            raise
+        # Servers only use the lower 4 bits of every byte
+        self.session_id = int.from_bytes(os.urandom(4), "big") & 0x0F0F0F0F
+        self.token: Optional[int] = None
+        self.token_time = 0.0
+
+    def close(self) -> None:
+        """Close the socket."""
+        self.sock.close()
+
+    def token_valid(self) -> bool:
+        """Check whether the token can still be used."""
+        return (
+            self.token is not None
+            and time.monotonic() - self.token_time < TOKEN_LIFETIME
+        )
+
+    def stat(self, full: bool, timeout: float) -> QueryResponse:
+        """Request the basic or full stat, fetching a new token if needed.
+
+        Args:
+            full: Whether to request the full stat.
+            timeout: Seconds to wait for each reply.
+
+        Raises:
+            TimeoutError: If the server didn't reply in time. A server also ignores
+                requests with an expired token, so the token is dropped.
+            OSError: If the reply is invalid or the request was refused.
+        """
+        try:
+            if not self.token_valid():
+                self._set_token(self._exchange(self._handshake_request(), timeout))
+            return parse_stat(self._exchange(self._stat_request(full), timeout), full)
+        except TimeoutError:
+            self.token = None
+            raise
+
+    async def async_stat(self, full: bool, timeout: float) -> QueryResponse:
+        """Async version of ``stat``."""
+        try:
+            if not self.token_valid():
+                reply = await self._async_exchange(self._handshake_request(), timeout)
+                self._set_token(reply)
+            reply = await self._async_exchange(self._stat_request(full), timeout)
+            return parse_stat(reply, full)
+        except TimeoutError:
+            self.token = None
+            raise
+
+    def _handshake_request(self) -> Tuple[bytes, int]:
+        return self._request(HANDSHAKE, b""), HANDSHAKE
+
+    def _stat_request(self, full: bool) -> Tuple[bytes, int]:
+        if self.token is None:
+            raise ValueError("No challenge token")
+        payload = struct.pack(">I", self.token & 0xFFFFFFFF)
+        if full:
+            payload += FULL_STAT_PADDING
+        return self._request(STAT, payload), STAT
+
+    def _request(self, packet_type: int, payload: bytes) -> bytes:
+        return (
+            QUERY_MAGIC + bytes([packet_type]) + struct.pack(">I", self.session_id)
+        ) + payload
+
+    def _set_token(self, reply: bytes) -> None:
+        try:
+            self.token = int(reply.split(b"\x00", 1)[0])
+        except ValueError:
+            raise IOError("Invalid challenge token") from None
+        self.token_time = time.monotonic()
+
+    def _reply_payload(self, data: bytes, packet_type: int) -> Optional[bytes]:
+        """Return the payload of a reply, or None if it answers another request."""
+        if (
+            len(data) < 5
+            or data[0] != packet_type
+            or struct.unpack(">I", data[1:5])[0] != self.session_id
+        ):
+            return None
+        return data[5:]
+
+    def _exchange(self, request: Tuple[bytes, int], timeout: float) -> bytes:
+        packet, packet_type = request
+        self.sock.send(packet)
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([self.sock], [], [], remaining)[0]:
+                raise TimeoutError("Query timed out")
+            # Raises ConnectionRefusedError after an ICMP port unreachable
+            payload = self._reply_payload(self.sock.recv(65535), packet_type)
+            if payload is not None:
+                return payload
+
+    async def _async_exchange(
+        self, request: Tuple[bytes, int], timeout: float
+    ) -> bytes:
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        packet, packet_type = request
+        await loop.sock_sendall(self.sock, packet)
+
+        async def receive() -> bytes:
+            while True:
+                data = await loop.sock_recv(self.sock, 65535)
+                payload = self._reply_payload(data, packet_type)
+                if payload is not None:
+                    return payload
+
+        return await asyncio.wait_for(receive(), timeout)
+
+
+def parse_stat(payload: bytes, full: bool) -> QueryResponse:
+    """Parse the payload of a basic or full stat reply.
+
+    Raises:
+        IOError: If the payload is malformed.
+    """
+    try:
+        if full:
+            return _parse_full_stat(payload)
+        return _parse_basic_stat(payload)
+    except (IndexError, KeyError, ValueError):
+        raise IOError("Invalid query response") from None
+
+
+def _parse_basic_stat(payload: bytes) -> QueryResponse:
+    fields = payload.split(b"\x00", 5)
+    motd, _, world, online, maximum = (field.decode("latin-1") for field in fields[:5])
+    return QueryResponse(motd, world, int(online), int(maximum))
+
+
+def _parse_full_stat(payload: bytes) -> QueryResponse:
+    # The payload starts with the padding "splitnum\0\x80\0"
+    info_section, _, player_section = payload[11:].partition(PLAYER_SECTION)
+    fields = info_section.decode("utf-8", "replace").split("\x00")
+    info = dict(zip(fields[::2], fields[1::2]))
+    players = tuple(
+        name.decode("utf-8", "replace")
+        for name in player_section.split(b"\x00")
+        if name
+    )
+    return QueryResponse(
+        info["hostname"],
+        info["map"],
+        int(info["numplayers"]),
+        int(info["maxplayers"]),
+        version=info.get("version"),
+        plugins=info.get("plugins"),
+        players=players,
+    )
+
+
+_sessions: Dict[Tuple[str, int], QuerySession] = {}
+_sessions_lock = threading.Lock()
+
+
+def acquire_session(address: Address, port: int) -> QuerySession:
+    """Take the cached session of a query port, or open a new one.
+
+    The session is removed from the cache while it is in use, so concurrent queries
+    of the same server never share a socket.
+    """
+    with _sessions_lock:
+        session = _sessions.pop((str(address), port), None)
+    if session is not None:
+        return session
+    return QuerySession(address, port)
+
+
+def release_session(session: QuerySession) -> None:
+    """Put a session back into the cache, for the next query of the same server."""
+    with _sessions_lock:
+        previous = _sessions.get(session.key)
+        _sessions[session.key] = session
+    if previous is not None:
+        previous.close()
+
+
+def clear_sessions() -> None:
+    """Close all cached sessions."""
+    with _sessions_lock:
+        sessions: List[QuerySession] = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
+
+
+def query(
+    address: Address, port: int, timeout: float, full: bool = False
+) -> QueryResponse:
+    """Request the basic or full stat of a server, reusing a cached session.
+
+    Args:
+        address: Address of the server.
+        port: Query port of the server.
+        timeout: Seconds to wait for each reply.
+        full: Whether to request the full stat.
+
+    Raises:
+        TimeoutError: If the server didn't reply in time.
+        OSError: If the reply is invalid or the request was refused.
+    """
+    session = acquire_session(address, port)
+    try:
+        response = session.stat(full, timeout)
+    except TimeoutError:
+        # The session stays usable, only its token was dropped
+        release_session(session)
+        raise
+    except BaseException:
+        session.close()
+        raise
+    release_session(session)
+    return response
+
+
+async def async_query(
+    address: Address, port: int, timeout: float, full: bool = False
+) -> QueryResponse:
+    """Async version of ``query``."""
+    session = acquire_session(address, port)
+    try:
+        response = await session.async_stat(full, timeout)
+    except TimeoutError:
+        # The session stays usable, only its token was dropped
+        release_session(session)
+        raise
+    except BaseException:
+        session.close()
+        raise
+    release_session(session)
+    return response
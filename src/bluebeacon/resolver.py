@@ -0,0 +1,139 @@
+"""Host name resolution for BlueBeacon.
+
+Proxies may bind to a host name instead of an address, such as ``localhost`` or the
+name of a container. Resolving it on every check would add the latency of the resolver
+to every check, and a slow resolver could push a check past the healthcheck timeout.
+This module keeps resolved addresses in a state file between checks instead.
+
+``getaddrinfo`` doesn't reveal the TTL of the records it resolved, so addresses are
+kept for a fixed ``TTL``. If resolving fails or takes longer than the resolve timeout
+once an address has expired, the expired address keeps being served for up to
+``STALE_TTL`` (serve-stale, RFC 8767), as it most likely still is the right one.
+"""
+
+import ipaddress
+import json
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from bluebeacon import state
+
+Address = ipaddress.IPv4Address | ipaddress.IPv6Address
+
+# Seconds a resolved address is used without resolving the name again
+TTL = 60.0
+
+# Seconds an expired address is still used while the name can't be resolved
+STALE_TTL = 24 * 60 * 60.0
+
+# Seconds to wait for the resolver, well within the 1 s timeout of a healthcheck
+RESOLVE_TIMEOUT = 0.5
+
+
+def resolve(
+    host: str, timeout: float = RESOLVE_TIMEOUT, now: Optional[float] = None
+) -> Address:
+    """Resolve a host name, reusing the address of an earlier call while it is fresh.
+
+    Args:
+        host: The host name to resolve.
+        timeout: Seconds to wait for the resolver.
+        now: Unix time of the call, defaults to now.
+
+    Returns:
+        The first address the name resolves to.
+
+    Raises:
+        OSError: If the name could not be resolved in time and there is no stale
+            address to fall back to.
+    """
+    if now is None:
+        now = time.time()
+
+    cache_file = state.state_file(host, "dns")
+    cached = _load(cache_file, host)
+    if cached is not None and now - cached[1] < TTL:
+        return cached[0]
+
+    try:
+        address = _lookup(host, timeout)
+    except OSError as exc:
+        if cached is not None and now - cached[1] < TTL + STALE_TTL:
+            return cached[0]
+        raise OSError(f"Could not resolve {host}: {exc}") from exc
+
+    entry = {"host": host, "address": str(address), "resolved": now}
+    try:
+        state.write_atomic(cache_file, json.dumps(entry).encode())
+    except OSError:
+        # Only costs resolving the name again on the next check
+        pass
+    return address
+
+
+def timeout_until(deadline: Optional[float]) -> float:
+    """Return the resolve timeout, cut to what is left until a deadline.
+
+    Args:
+        deadline: ``time.monotonic()`` by which the check must report, if any.
+
+    Returns:
+        ``RESOLVE_TIMEOUT``, or less if the deadline is closer. Once the deadline has
+        passed, only a cached address can be used.
+    """
+    if deadline is None:
+        return RESOLVE_TIMEOUT
+    return max(0.0, min(RESOLVE_TIMEOUT, deadline - time.monotonic()))
+
+
+def _load(cache_file: Path, host: str) -> Optional[Tuple[Address, float]]:
+    """Load the cached address of a host name and the time it was resolved."""
+    try:
+        with cache_file.open("rb") as f:
+            # Don't trust addresses other users could have planted in a shared /tmp
+            if os.fstat(f.fileno()).st_uid != os.getuid():
+                return None
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(entry, dict) or entry.get("host") != host:
+        return None
+    try:
+        return ipaddress.ip_address(entry["address"]), float(entry["resolved"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _lookup(host: str, timeout: float) -> Address:
+    """Resolve a host name with the system resolver, giving up after ``timeout``.
+
+    ``getaddrinfo`` can't be interrupted, so it runs in a daemon thread that is left
+    behind if the resolver doesn't answer in time.
+    """
+    results: List[Address] = []
+    errors: List[OSError] = []
+
+    def run() -> None:
+        try:
+            infos = socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+            # Drop the scope ID of link-local IPv6 addresses
+            results.append(ipaddress.ip_address(str(infos[0][4][0]).split("%")[0]))
+        except OSError as exc:
+            errors.append(exc)
+        except (IndexError, ValueError):
+            errors.append(OSError(f"No address found for {host}"))
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+
+    if results:
+        return results[0]
+    if errors:
+        raise errors[0]
+    raise TimeoutError(f"Resolving {host} took longer than {timeout} s")
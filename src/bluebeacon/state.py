@@ -0,0 +1,47 @@
+"""Persistent state for BlueBeacon.
+
+This module decides where BlueBeacon keeps the small files that carry information from
+one invocation to the next.
+"""
+
+import os
+import tempfile
+import zlib
+from pathlib import Path
+
+
+def runtime_dir() -> Path:
+    """Return the directory for runtime files.
+
+    Uses ``$XDG_RUNTIME_DIR`` when it is set and falls back to the system's
+    temporary directory otherwise.
+    """
+    return Path(os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir())
+
+
+def state_file(key: str, suffix: str) -> Path:
+    """Return the path of the state file of the given kind for ``key``.
+
+    Args:
+        key: Identifies what the state belongs to, for example a config file path.
+        suffix: Identifies the kind of state, used as file extension.
+
+    Returns:
+        A path inside ``runtime_dir()`` that is stable for the same key and suffix.
+    """
+    return runtime_dir() / f"bluebeacon-{zlib.crc32(key.encode()):08x}.{suffix}"
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Replace the contents of a file so that readers never see a partial write.
+
+    Raises:
+        OSError: If the file could not be written.
+    """
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        temp_path.write_bytes(data)
+        os.replace(temp_path, path)
+    except OSError:
+        temp_path.unlink(missing_ok=True)
+        raise
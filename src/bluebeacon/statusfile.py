@@ -0,0 +1,187 @@
+"""Memory-mapped status file for BlueBeacon.
+
+The resident prober can publish its latest result in a small binary file that it
+updates in place through ``mmap``. Healthchecks then read a few bytes of the mapped
+file instead of connecting to the prober socket, parsing a config or pinging.
+
+The file holds a single fixed-layout record, in native byte order as it never leaves
+the host::
+
+    offset  size  field
+         0     4  magic b"BBST"
+         4     2  format version
+         6     2  reserved
+         8     8  sequence counter, odd while the record is being written
+        16     8  unix timestamp of the ping (float)
+        24     8  round-trip time in seconds, NaN if unknown (float)
+        32     1  1 if the server responded, 0 otherwise
+        33     1  failure code, see FAILURE_CODES
+        34     6  reserved
+
+The sequence counter makes the record a seqlock: the writer makes the counter odd,
+updates the fields and makes it even again. Readers retry while the counter is odd or
+changed during their read, so they never act on a torn record.
+"""
+
+import math
+import mmap
+import os
+import struct
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from bluebeacon.ping import PingResult
+
+MAGIC = b"BBST"
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct("=4sHH")
+SEQUENCE = struct.Struct("=Q")
+FIELDS = struct.Struct("=ddBB6x")
+
+SEQUENCE_OFFSET = HEADER.size
+FIELDS_OFFSET = SEQUENCE_OFFSET + SEQUENCE.size
+RECORD_SIZE = FIELDS_OFFSET + FIELDS.size
+
+# Failure codes stored for the errors of a ping, 0 for successful pings
+FAILURE_CODES = {None: 0, "timeout": 1, "refused": 2, "error": 3, "not listening": 4}
+FAILURE_NAMES = {code: name for name, code in FAILURE_CODES.items()}
+
+# Reads attempted before giving up on a record that keeps changing
+READ_ATTEMPTS = 100
+
+
+@dataclass(frozen=True)
+class StatusRecord:
+    """Latest result read from a status file.
+
+    Attributes:
+        sequence: Counts the updates of the record, 0 before the first ping.
+        timestamp: Unix time the ping completed.
+        success: Whether the server responded.
+        latency: Seconds the ping took, if known.
+        error: Why the server didn't respond, see ``PingResult.error``.
+    """
+
+    sequence: int
+    timestamp: float
+    success: bool
+    latency: Optional[float]
+    error: Optional[str]
+
+
+class StatusFileWriter:
+    """Keeps a status file mapped and updates its record in place."""
+
+    def __init__(self, path: Path) -> None:
+        """Create the status file with an empty record and map it.
+
+        The file is written completely before it is moved into place, so readers
+        never see it without a header.
+
+        Raises:
+            OSError: If the file could not be created or mapped.
+        """
+        self.path = path
+        self.sequence = 0
+
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, 0)
+        record = bytearray(RECORD_SIZE)
+        record[: HEADER.size] = header
+        FIELDS.pack_into(record, FIELDS_OFFSET, 0.0, math.nan, 0, 0)
+
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        fd = os.open(temp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, record)
+            self._map = mmap.mmap(fd, RECORD_SIZE)
+            os.replace(temp_path, path)
+        except OSError:
+            temp_path.unlink(missing_ok=True)
+            raise
+        finally:
+            os.close(fd)
+
+    def publish(self, result: "PingResult", timestamp: Optional[float] = None) -> None:
+        """Store the outcome of a ping.
+
+        Args:
+            result: The outcome of the ping.
+            timestamp: Unix time the ping completed, defaults to now.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        latency = math.nan if result.latency is None else result.latency
+        failure = 0
+        if not result.success:
+            failure = FAILURE_CODES.get(result.error, FAILURE_CODES["error"])
+
+        SEQUENCE.pack_into(self._map, SEQUENCE_OFFSET, self.sequence + 1)
+        FIELDS.pack_into(
+            self._map, FIELDS_OFFSET, timestamp, latency, result.success, failure
+        )
+        self.sequence += 2
+        SEQUENCE.pack_into(self._map, SEQUENCE_OFFSET, self.sequence)
+
+    def close(self) -> None:
+        """Unmap the file. The file stays in place with the latest record."""
+        self._map.close()
+
+
+def read_status_file(path: Path) -> Optional[StatusRecord]:
+    """Read the latest result from a status file.
+
+    Args:
+        path: Path of the status file.
+
+    Returns:
+        The latest result, or None if the prober has not completed a ping yet.
+
+    Raises:
+        OSError: If the file could not be read.
+        ValueError: If the file is not a status file of a supported version, or
+            its record kept changing while being read.
+    """
+    # A plain descriptor, as the buffered file object of open() costs more than
+    # the rest of the read
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        mapped = mmap.mmap(fd, RECORD_SIZE, access=mmap.ACCESS_READ)
+    except ValueError:
+        # The file is shorter than a record
+        raise ValueError(f"Not a BlueBeacon status file: {path}") from None
+    finally:
+        os.close(fd)
+
+    with mapped:
+        magic, version, _ = HEADER.unpack_from(mapped)
+        if magic != MAGIC:
+            raise ValueError(f"Not a BlueBeacon status file: {path}")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported status file version {version}: {path}")
+
+        for _ in range(READ_ATTEMPTS):
+            (sequence,) = SEQUENCE.unpack_from(mapped, SEQUENCE_OFFSET)
+            if sequence % 2 == 0:
+                fields = FIELDS.unpack_from(mapped, FIELDS_OFFSET)
+                if SEQUENCE.unpack_from(mapped, SEQUENCE_OFFSET)[0] == sequence:
+                    break
+            # Let a writer that was interrupted mid-update finish
+            time.sleep(0)
+        else:
+            raise ValueError(f"Status file is changing too fast to be read: {path}")
+
+    if sequence == 0:
+        return None
+
+    timestamp, latency, success, failure = fields
+    return StatusRecord(
+        sequence,
+        timestamp,
+        bool(success),
+        None if math.isnan(latency) else latency,
+        FAILURE_NAMES.get(failure, "error"),
+    )
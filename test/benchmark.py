@@ -0,0 +1,349 @@
+"""Benchmarks for BlueBeacon.
+
+The benchmarks measure the three costs of a healthcheck: starting the CLI, parsing the
+server config and pinging the server. Pings go to the local stub servers, so no network
+access or Minecraft server is needed.
+
+Run them from the repository root and keep the JSON output to compare later commits
+against::
+
+    python -m test.benchmark --output baseline.json
+    python -m test.benchmark --compare baseline.json
+
+With ``--compare``, the exit code is 1 if any benchmark got slower than the threshold.
+"""
+
+import asyncio
+import ipaddress
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import click
+
+from bluebeacon import detector, ping
+
+from .stub_server import BedrockStubServer, JavaStubServer, QueryStubServer
+
+# Version of the JSON output format
+FORMAT_VERSION = 1
+
+GROUPS = ("cold_start", "parsing", "probing")
+
+# Number of entries in the generated configs, from a typical config to a BungeeCord
+# network with thousands of backend servers
+CONFIG_SIZES = {"small": 10, "large": 1_000, "huge": 10_000}
+
+# Pings sent and kept in flight at the same time by the throughput benchmark
+THROUGHPUT_PINGS = 512
+THROUGHPUT_CONCURRENCY = 64
+
+LOCALHOST = ipaddress.IPv4Address("127.0.0.1")
+
+Results = Dict[str, Dict[str, Any]]
+
+
+def summarize(
+    samples: Sequence[float], unit: str, higher_is_better: bool = False
+) -> Dict[str, Any]:
+    """Describe the samples of one benchmark."""
+    return {
+        "unit": unit,
+        "higher_is_better": higher_is_better,
+        "runs": len(samples),
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def measure(func: Callable[[], object], repeat: int) -> Dict[str, Any]:
+    """Time ``repeat`` calls of ``func`` after a warm-up call."""
+    func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples, "s")
+
+
+def bench_cold_start(repeat: int) -> Results:
+    """Time complete runs of the CLI in a new interpreter, like a healthcheck."""
+    results = {}
+
+    with tempfile.TemporaryDirectory() as directory, JavaStubServer() as server:
+        config = Path(directory) / "server.properties"
+        config.write_text(f"server-ip=127.0.0.1\nserver-port={server.port}\n")
+        env = {**os.environ, "XDG_RUNTIME_DIR": directory}
+
+        commands = {
+            "cold_start/version": ["--version"],
+            "cold_start/check": ["--java", str(config)],
+        }
+        for name, args in commands.items():
+            command = [sys.executable, "-m", "bluebeacon.cli", *args]
+            results[name] = measure(
+                lambda: subprocess.run(
+                    command, env=env, capture_output=True, check=True
+                ),
+                repeat,
+            )
+
+    return results
+
+
+def generate_config(config_format: str, entries: int, directory: Path) -> Path:
+    """Write a config file with the given number of entries.
+
+    The properties file gets extra keys, the proxy configs get backend servers.
+
+    Returns:
+        The path of the config file.
+    """
+    if config_format == "ini":
+        path = directory / "server.properties"
+        lines = [f"setting-{i}=value-{i}" for i in range(entries)]
+        lines += ["server-ip=127.0.0.1", "server-port=25565"]
+    elif config_format == "yaml":
+        path = directory / "config.yml"
+        lines = ["listeners:", "- host: 0.0.0.0:25577", "  motd: Proxy", "servers:"]
+        for i in range(entries):
+            lines += [
+                f"  server-{i}:",
+                f"    address: 10.0.{i // 256 % 256}.{i % 256}:25565",
+                "    restricted: false",
+            ]
+    elif config_format == "toml":
+        path = directory / "velocity.toml"
+        lines = ['bind = "0.0.0.0:25577"', "[servers]"]
+        lines += [
+            f'server-{i} = "10.0.{i // 256 % 256}.{i % 256}:25565"'
+            for i in range(entries)
+        ]
+        lines.append('try = ["server-0"]')
+    else:
+        raise ValueError(f"Unknown config format: {config_format}")
+
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def bench_parsing(repeat: int) -> Results:
+    """Time parsing generated configs of every format and size."""
+    results = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        for config_format in ("ini", "yaml", "toml"):
+            for size, entries in CONFIG_SIZES.items():
+                subdirectory = Path(directory) / f"{config_format}-{size}"
+                subdirectory.mkdir()
+                path = generate_config(config_format, entries, subdirectory)
+
+                results[f"parsing/{config_format}/{size}"] = measure(
+                    lambda: detector.parse_server_config(path), repeat
+                )
+                if config_format != "ini":
+                    results[f"parsing/{config_format}/{size}/backends"] = measure(
+                        lambda: detector.parse_proxy_backends(path), repeat
+                    )
+
+    return results
+
+
+async def _throughput(port: int, server_type: str, depth: str) -> float:
+    """Send many concurrent pings and return the number of pings per second."""
+    semaphore = asyncio.Semaphore(THROUGHPUT_CONCURRENCY)
+
+    async def probe() -> ping.PingResult:
+        async with semaphore:
+            return await ping.async_probe_server(
+                LOCALHOST, port, server_type, depth=depth, timeout=1.0
+            )
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(probe() for _ in range(THROUGHPUT_PINGS)))
+    elapsed = time.perf_counter() - start
+
+    if not all(result.success for result in results):
+        raise RuntimeError(f"Pings to the {server_type} stub server failed")
+    return THROUGHPUT_PINGS / elapsed
+
+
+def bench_probing(repeat: int) -> Results:
+    """Time pings of the stub servers and measure the throughput of async pings."""
+    results = {}
+
+    with (
+        JavaStubServer() as java_server,
+        BedrockStubServer() as bedrock_server,
+        QueryStubServer() as query_server,
+    ):
+        servers: List[Tuple[str, int]] = [
+            ("java", java_server.port),
+            ("bedrock", bedrock_server.port),
+        ]
+        for server_type, port in servers:
+            for depth in ping.DEPTHS:
+                if server_type == "bedrock" and depth not in ("connect", "status"):
+                    # Bedrock servers are pinged the same way as with "connect"
+                    continue
+
+                def ping_once() -> None:
+                    if not ping.ping_server(
+                        LOCALHOST,
+                        port,
+                        server_type,
+                        depth=depth,
+                        timeout=1.0,
+                        query_port=query_server.port,
+                    ):
+                        raise RuntimeError(f"Ping to the {server_type} stub failed")
+
+                results[f"probing/{server_type}/{depth}/latency"] = measure(
+                    ping_once, repeat
+                )
+
+            rates = [
+                asyncio.run(_throughput(port, server_type, "status"))
+                for _ in range(max(repeat // 5, 1))
+            ]
+            results[f"probing/{server_type}/status/throughput"] = summarize(
+                rates, "pings/s", higher_is_better=True
+            )
+
+    return results
+
+
+BENCHMARKS: Dict[str, Callable[[int], Results]] = {
+    "cold_start": bench_cold_start,
+    "parsing": bench_parsing,
+    "probing": bench_probing,
+}
+
+
+def git_commit() -> Optional[str]:
+    """Return the commit the benchmarks run on, if known."""
+    try:
+        process = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return process.stdout.strip()
+
+
+def run(groups: Sequence[str], repeat: int) -> Dict[str, Any]:
+    """Run the benchmark groups and describe the environment they ran in."""
+    results: Results = {}
+    for group in groups:
+        results.update(BENCHMARKS[group](repeat))
+
+    return {
+        "format_version": FORMAT_VERSION,
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(
+    baseline: Results, current: Results, threshold: float
+) -> List[Tuple[str, float, bool]]:
+    """Compare the medians of the benchmarks both runs have in common.
+
+    Args:
+        baseline: The results of the earlier run.
+        current: The results of this run.
+        threshold: Relative slowdown that counts as a regression, e.g. 0.1 for 10 %.
+
+    Returns:
+        The name, relative change of the median and whether it is a regression, per
+        benchmark. A positive change means slower.
+    """
+    comparison = []
+    for name, result in current.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]["median"]
+        after = result["median"]
+        if result.get("higher_is_better"):
+            change = before / after - 1
+        else:
+            change = after / before - 1
+        comparison.append((name, change, change > threshold))
+    return comparison
+
+
+@click.command(help="Run the BlueBeacon benchmarks and write the results as JSON.")
+@click.option(
+    "--group",
+    "groups",
+    type=click.Choice(GROUPS),
+    multiple=True,
+    help="Benchmark group to run, can be repeated (default: all)",
+)
+@click.option(
+    "--repeat",
+    type=click.IntRange(min=2),
+    default=10,
+    show_default=True,
+    help="Measured runs per benchmark",
+)
+@click.option(
+    "--output",
+    type=click.File("w"),
+    default="-",
+    help="File to write the results to (default: standard output)",
+)
+@click.option(
+    "--compare",
+    "baseline_file",
+    type=click.File("r"),
+    help="Results of an earlier run to compare against",
+)
+@click.option(
+    "--threshold",
+    type=click.FloatRange(min=0),
+    default=0.1,
+    show_default=True,
+    help="Relative slowdown of the median that counts as a regression",
+)
+def main(
+    groups: Tuple[str, ...],
+    repeat: int,
+    output: Any,
+    baseline_file: Any,
+    threshold: float,
+) -> None:
+    """Run the benchmarks, then compare them against a baseline if one is given."""
+    report = run(groups or GROUPS, repeat)
+    json.dump(report, output, indent=2)
+    output.write("\n")
+
+    if baseline_file is None:
+        return
+
+    baseline = json.load(baseline_file)
+    comparison = compare(baseline["results"], report["results"], threshold)
+    for name, change, regressed in comparison:
+        marker = "  REGRESSION" if regressed else ""
+        click.echo(f"{name:<45} {change:+7.1%}{marker}", err=True)
+
+    if any(regressed for _, _, regressed in comparison):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
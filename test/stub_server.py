@@ -0,0 +1,407 @@
+"""Local stand-ins for Minecraft servers.
+
+The stubs answer the Java Server List Ping, the legacy ping and the Bedrock RakNet
+unconnected ping on the loopback interface, so pings can be exercised over real
+sockets without network access or a running Minecraft server. Both can be told to
+answer late, drop requests, refuse connections or send oversized status payloads, and
+the Java stub can drip its answers out one byte at a time.
+"""
+
+import base64
+import json
+import random
+import socket
+import socketserver
+import struct
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple, TypeVar
+
+RAKNET_MAGIC = bytes.fromhex("00ffff00fefefefefdfdfdfd12345678")
+
+S = TypeVar("S", bound="_StubServer")
+
+
+def encode_varint(value: int) -> bytes:
+    """Encode an integer as a protocol VarInt."""
+    value &= 0xFFFFFFFF
+    data = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            data.append(byte | 0x80)
+        else:
+            data.append(byte)
+            return bytes(data)
+
+
+def read_varint(stream: Any, first: Optional[int] = None) -> int:
+    """Read a protocol VarInt from a binary stream.
+
+    Args:
+        stream: The stream to read from.
+        first: The first byte of the VarInt, if it was already read.
+
+    Raises:
+        EOFError: If the stream ends before the VarInt does.
+    """
+    value = 0
+    for shift in range(0, 35, 7):
+        if first is not None and shift == 0:
+            byte = first
+        else:
+            data = stream.read(1)
+            if not data:
+                raise EOFError("Connection closed")
+            byte = data[0]
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value
+    raise ValueError("VarInt is too long")
+
+
+def encode_packet(packet_id: int, payload: bytes) -> bytes:
+    """Frame a packet with its length and ID."""
+    body = encode_varint(packet_id) + payload
+    return encode_varint(len(body)) + body
+
+
+class _StubServer(socketserver.BaseServer):
+    """Fault injection and lifecycle shared by the stub servers.
+
+    Attributes:
+        latency: Seconds to wait before every answer.
+        loss: Probability that a request is never answered.
+        refuse: Whether nothing accepts connections or datagrams on the port, so
+            the kernel refuses them.
+        motd_size: Length the MOTD is padded to, to send oversized status payloads.
+        port: The port the server is bound to.
+    """
+
+    daemon_threads = True
+    socket: socket.socket
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        handler: Any,
+        latency: float = 0.0,
+        loss: float = 0.0,
+        refuse: bool = False,
+        motd_size: int = 0,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.latency = latency
+        self.loss = loss
+        self.refuse = refuse
+        self.motd_size = motd_size
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        super().__init__(address, handler)
+        self.port: int = self.socket.getsockname()[1]
+
+    @property
+    def motd(self) -> str:
+        """The MOTD sent in status responses."""
+        return "A BlueBeacon stub server".ljust(self.motd_size, ".")
+
+    def drops_request(self) -> bool:
+        """Decide whether to leave the current request unanswered."""
+        with self._lock:
+            return self._random.random() < self.loss
+
+    def __enter__(self: S) -> S:
+        if not self.refuse:
+            # Poll often, so leaving the context doesn't wait for the default 0.5 s
+            self._thread = threading.Thread(
+                target=self.serve_forever, args=(0.01,), daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        if self._thread is not None:
+            self.shutdown()
+        self.server_close()
+
+
+class JavaStubServer(_StubServer, socketserver.ThreadingTCPServer):
+    """Java Edition stand-in answering the status and legacy pings.
+
+    A refusing stub keeps its port bound without listening, so connections are
+    refused. Only the answers are delayed or dropped, the kernel always accepts
+    connections of a listening stub.
+
+    Attributes:
+        status: The status object sent in response to a status request, without
+            the description and favicon.
+        favicon_size: Number of random bytes in the favicon, 0 for none.
+        drip: Seconds to wait between two bytes of an answer.
+    """
+
+    allow_reuse_address = True
+    # Many pings may connect at the same time
+    request_queue_size = 128
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        favicon_size: int = 0,
+        drip: float = 0.0,
+        **faults: Any,
+    ) -> None:
+        self.status: Dict[str, Any] = {
+            "version": {"name": "1.21.4", "protocol": 769},
+            "players": {"online": 3, "max": 20},
+        }
+        self.favicon_size = favicon_size
+        self.drip = drip
+        super().__init__((host, port), _JavaHandler, **faults)
+
+    def server_activate(self) -> None:
+        if not self.refuse:
+            super().server_activate()
+
+    def status_response(self) -> bytes:
+        """Build the JSON status that answers a status request."""
+        status = {**self.status, "description": {"text": self.motd}}
+        if self.favicon_size:
+            image = base64.b64encode(self._random.randbytes(self.favicon_size))
+            status["favicon"] = "data:image/png;base64," + image.decode()
+        return json.dumps(status).encode()
+
+    def legacy_response(self) -> bytes:
+        """Build the kick packet that answers a legacy ping."""
+        fields = [
+            "\xa71",
+            str(self.status["version"]["protocol"]),
+            self.status["version"]["name"],
+            self.motd,
+            str(self.status["players"]["online"]),
+            str(self.status["players"]["max"]),
+        ]
+        text = "\x00".join(fields)
+        return b"\xff" + struct.pack(">H", len(text)) + text.encode("utf-16-be")
+
+
+class _JavaHandler(socketserver.StreamRequestHandler):
+    server: JavaStubServer
+
+    def handle(self) -> None:
+        try:
+            first = self.rfile.read(1)
+            if not first:
+                return
+            if first == b"\xfe":
+                self.send(self.server.legacy_response())
+                return
+
+            # Handshake, status request and an optional ping, each framed by length
+            length = read_varint(self.rfile, first[0])
+            self.rfile.read(length)
+            while True:
+                packet = self.rfile.read(read_varint(self.rfile))
+                if packet[:1] == b"\x00":
+                    status = self.server.status_response()
+                    self.send(encode_packet(0, encode_varint(len(status)) + status))
+                elif packet[:1] == b"\x01":
+                    self.send(encode_packet(1, packet[1:9]))
+                    return
+                else:
+                    return
+        except (EOFError, ConnectionError):
+            pass
+
+    def send(self, data: bytes) -> None:
+        """Answer the client, applying the faults of the server."""
+        if self.server.drops_request():
+            # Keep the connection open without answering until the client gives up
+            self.rfile.read()
+            return
+
+        time.sleep(self.server.latency)
+        if not self.server.drip:
+            self.wfile.write(data)
+            return
+
+        for i in range(len(data)):
+            self.wfile.write(data[i : i + 1])
+            time.sleep(self.server.drip)
+
+
+class _DatagramStubServer(_StubServer, socketserver.ThreadingUDPServer):
+    """UDP stub server.
+
+    A refusing stub closes its socket right away, so datagrams to the port are
+    answered with an ICMP port unreachable. Its port is free to be taken by others.
+    """
+
+    def __init__(self, address: Tuple[str, int], handler: Any, **faults: Any) -> None:
+        super().__init__(address, handler, **faults)
+        if self.refuse:
+            self.socket.close()
+
+    def server_close(self) -> None:
+        if self.socket.fileno() != -1:
+            super().server_close()
+
+
+class BedrockStubServer(_DatagramStubServer):
+    """Bedrock Edition stand-in answering RakNet unconnected pings.
+
+    Attributes:
+        status: The fields of the server ID string sent in the pong, without the
+            MOTD.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, **faults: Any) -> None:
+        self.status = [
+            "MCPE",
+            "766",
+            "1.21.50",
+            "3",
+            "20",
+            "1234567890",
+            "Bedrock level",
+            "Survival",
+        ]
+        super().__init__((host, port), _BedrockHandler, **faults)
+
+    def pong(self, ping: bytes) -> bytes:
+        """Build the unconnected pong that answers a ping."""
+        server_id = ";".join([self.status[0], self.motd, *self.status[1:]]).encode()
+        return (
+            b"\x1c"
+            + ping[1:9]
+            + struct.pack(">Q", 1234567890)
+            + RAKNET_MAGIC
+            + struct.pack(">H", len(server_id))
+            + server_id
+        )
+
+
+class _BedrockHandler(socketserver.BaseRequestHandler):
+    server: BedrockStubServer
+    request: Tuple[bytes, socket.socket]
+
+    def handle(self) -> None:
+        data, sock = self.request
+        if data[:1] != b"\x01" or len(data) < 9 or self.server.drops_request():
+            return
+
+        time.sleep(self.server.latency)
+        sock.sendto(self.server.pong(data), self.client_address)
+
+
+class QueryStubServer(_DatagramStubServer):
+    """Java Edition stand-in answering the UDP query protocol.
+
+    Like vanilla servers, the stub silently ignores stat requests without a valid
+    challenge token.
+
+    Attributes:
+        players: Names of the players online.
+        handshakes: Number of challenge tokens handed out.
+        stats: Number of stat requests answered.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, **faults: Any) -> None:
+        self.players = ["Alex", "Steve"]
+        self.handshakes = 0
+        self.stats = 0
+        self._tokens: Dict[Any, int] = {}
+        super().__init__((host, port), _QueryHandler, **faults)
+
+    def expire_tokens(self) -> None:
+        """Forget all challenge tokens, like vanilla servers do every 30 seconds."""
+        with self._lock:
+            self._tokens.clear()
+
+    def issue_token(self, client: Any) -> int:
+        """Hand out a new challenge token to a client."""
+        with self._lock:
+            token = self._random.randrange(-(2**31), 2**31)
+            self._tokens[client] = token
+            self.handshakes += 1
+            return token
+
+    def valid_token(self, client: Any, token: int) -> bool:
+        """Check the challenge token of a stat request."""
+        with self._lock:
+            return self._tokens.get(client) == token
+
+    def basic_stat(self) -> bytes:
+        """Build the payload of a basic stat response."""
+        return (
+            b"\x00".join(
+                [
+                    self.motd.encode("latin-1"),
+                    b"SMP",
+                    b"world",
+                    str(len(self.players)).encode(),
+                    b"20",
+                ]
+            )
+            + b"\x00"
+            + struct.pack("<H", 25565)
+            + b"127.0.0.1\x00"
+        )
+
+    def full_stat(self) -> bytes:
+        """Build the payload of a full stat response."""
+        info = {
+            "hostname": self.motd,
+            "gametype": "SMP",
+            "game_id": "MINECRAFT",
+            "version": "1.21.4",
+            "plugins": "Paper on 1.21.4",
+            "map": "world",
+            "numplayers": str(len(self.players)),
+            "maxplayers": "20",
+            "hostport": "25565",
+            "hostip": "127.0.0.1",
+        }
+        fields = b"".join(
+            key.encode() + b"\x00" + value.encode() + b"\x00"
+            for key, value in info.items()
+        )
+        players = b"".join(name.encode() + b"\x00" for name in self.players)
+        return (
+            b"splitnum\x00\x80\x00"
+            + fields
+            + b"\x00\x01player_\x00\x00"
+            + players
+            + b"\x00"
+        )
+
+
+class _QueryHandler(socketserver.BaseRequestHandler):
+    server: QueryStubServer
+    request: Tuple[bytes, socket.socket]
+
+    def handle(self) -> None:
+        data, sock = self.request
+        if data[:2] != b"\xfe\xfd" or len(data) < 7 or self.server.drops_request():
+            return
+
+        packet_type, session = data[2], data[3:7]
+        if packet_type == 9:
+            token = self.server.issue_token(self.client_address)
+            reply = str(token).encode() + b"\x00"
+        elif packet_type == 0 and len(data) >= 11:
+            (token,) = struct.unpack(">i", data[7:11])
+            if not self.server.valid_token(self.client_address, token):
+                return
+            full = len(data) >= 15
+            reply = self.server.full_stat() if full else self.server.basic_stat()
+            with self.server._lock:
+                self.server.stats += 1
+        else:
+            return
+
+        time.sleep(self.server.latency)
+        sock.sendto(bytes([packet_type]) + session + reply, self.client_address)
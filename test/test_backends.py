@@ -0,0 +1,155 @@
+"""Tests for the backends module."""
+
+import ipaddress
+import threading
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+from bluebeacon import state
+from bluebeacon.backends import BackendResult, probe_with_backends, resolve_host
+from bluebeacon.ping import PingResult
+
+
+@pytest.fixture(autouse=True)
+def runtime_dir(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    """Keep resolved addresses inside a temporary runtime directory."""
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    return tmp_path
+
+
+class TestResolveHost:
+    """Tests for the resolve_host function."""
+
+    def test_ip_address(self) -> None:
+        """IP addresses should be returned as they are."""
+        assert resolve_host("192.0.2.1") == ipaddress.IPv4Address("192.0.2.1")
+
+    def test_host_name(self) -> None:
+        """Host names should be resolved."""
+        assert resolve_host("localhost").is_loopback
+
+    def test_unknown_host(self) -> None:
+        """Unknown hosts should raise OSError."""
+        with pytest.raises(OSError):
+            resolve_host("nosuchhost.invalid")
+
+    def test_deadline(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Host names should only be given what is left until the deadline."""
+        timeouts: List[float] = []
+
+        def resolve(host: str, timeout: float) -> ipaddress.IPv4Address:
+            timeouts.append(timeout)
+            return ipaddress.IPv4Address("10.0.0.5")
+
+        monkeypatch.setattr("bluebeacon.resolver.resolve", resolve)
+
+        resolve_host("lobby", time.monotonic() - 1)
+
+        assert timeouts == [0]
+
+    def test_cached(self) -> None:
+        """Resolved host names should be kept for later checks."""
+        resolve_host("localhost")
+
+        assert state.state_file("localhost", "dns").exists()
+
+
+class TestProbeWithBackends:
+    """Tests for the probe_with_backends function."""
+
+    def test_results(self) -> None:
+        """The proxy and every backend should be pinged, backends as Java."""
+        calls: List[Tuple[object, ...]] = []
+
+        def pinger(
+            address: ipaddress.IPv4Address | ipaddress.IPv6Address,
+            port: int,
+            server_type: str,
+        ) -> PingResult:
+            calls.append((address, port, server_type))
+            return PingResult(port != 30067, "java" if port != 30067 else None)
+
+        proxy_result, backend_results = probe_with_backends(
+            (ipaddress.IPv4Address("127.0.0.1"), 25577),
+            "both",
+            [
+                ("lobby", "127.0.0.1", 30066),
+                ("factions", "127.0.0.1", 30067),
+                ("broken", "nosuchhost.invalid", 30068),
+            ],
+            pinger,
+            64,
+        )
+
+        assert proxy_result.success is True
+        assert [backend.success for backend in backend_results] == [
+            True,
+            False,
+            False,
+        ]
+        assert backend_results[2].result is None
+        assert backend_results[2].error
+        assert sorted(calls) == [
+            (ipaddress.IPv4Address("127.0.0.1"), 25577, "both"),
+            (ipaddress.IPv4Address("127.0.0.1"), 30066, "java"),
+            (ipaddress.IPv4Address("127.0.0.1"), 30067, "java"),
+        ]
+
+    def test_concurrent(self) -> None:
+        """All servers should be pinged at the same time."""
+        barrier = threading.Barrier(3, timeout=1)
+
+        def pinger(
+            address: ipaddress.IPv4Address | ipaddress.IPv6Address,
+            port: int,
+            server_type: str,
+        ) -> PingResult:
+            # Only passes once the proxy and both backends are being pinged
+            barrier.wait()
+            return PingResult(True)
+
+        proxy_result, backend_results = probe_with_backends(
+            (ipaddress.IPv4Address("127.0.0.1"), 25577),
+            "java",
+            [("a", "127.0.0.1", 30066), ("b", "127.0.0.1", 30067)],
+            pinger,
+            64,
+        )
+
+        assert proxy_result.success
+        assert all(backend.success for backend in backend_results)
+
+    def test_bounded_concurrency(self) -> None:
+        """No more than ``concurrency`` servers should be pinged at the same time."""
+        lock = threading.Lock()
+        active = 0
+        most_active = 0
+
+        def pinger(
+            address: ipaddress.IPv4Address | ipaddress.IPv6Address,
+            port: int,
+            server_type: str,
+        ) -> PingResult:
+            nonlocal active, most_active
+            with lock:
+                active += 1
+                most_active = max(most_active, active)
+            threading.Event().wait(0.01)
+            with lock:
+                active -= 1
+            return PingResult(True)
+
+        backends = [(str(port), "127.0.0.1", port) for port in range(30066, 30076)]
+        _, backend_results = probe_with_backends(
+            (ipaddress.IPv4Address("127.0.0.1"), 25577), "java", backends, pinger, 2
+        )
+
+        assert len(backend_results) == 10
+        assert most_active == 2
+
+    def test_backend_result_success(self) -> None:
+        """Unresolved backends should not count as responding."""
+        assert not BackendResult("lobby", "lobby", 25565, error="unknown").success
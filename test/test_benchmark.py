@@ -0,0 +1,66 @@
+"""Tests for the benchmark helpers."""
+
+import ipaddress
+from pathlib import Path
+
+import pytest
+
+from bluebeacon import detector
+
+from .benchmark import compare, generate_config, summarize
+
+
+class TestGenerateConfig:
+    """Tests for the generated configs."""
+
+    @pytest.mark.parametrize("config_format", ["ini", "yaml", "toml"])
+    def test_parses(self, config_format: str, tmp_path: Path) -> None:
+        """Generated configs should be read in their own format."""
+        path = generate_config(config_format, 300, tmp_path)
+
+        server = detector.read_server_config(path)
+
+        assert server.format == config_format
+        assert server.port in (25565, 25577)
+
+    @pytest.mark.parametrize("config_format", ["yaml", "toml"])
+    def test_backends(self, config_format: str, tmp_path: Path) -> None:
+        """Generated proxy configs should list the requested number of backends."""
+        path = generate_config(config_format, 300, tmp_path)
+
+        backends = detector.parse_proxy_backends(path)
+
+        assert len(backends) == 300
+        assert backends[299] == ("server-299", "10.0.1.43", 25565)
+        assert ipaddress.ip_address(backends[0][1])
+
+
+class TestCompare:
+    """Tests for the compare function."""
+
+    def test_slower_median_is_regression(self) -> None:
+        """A median more than the threshold above the baseline is a regression."""
+        baseline = {"parsing": summarize([1.0, 1.0], "s")}
+        current = {"parsing": summarize([1.2, 1.2], "s")}
+
+        [(name, change, regressed)] = compare(baseline, current, 0.1)
+
+        assert name == "parsing"
+        assert change == pytest.approx(0.2)
+        assert regressed
+
+    def test_lower_throughput_is_regression(self) -> None:
+        """For throughput, a lower median counts as slower."""
+        baseline = {"pings": summarize([1000.0, 1000.0], "pings/s", True)}
+        current = {"pings": summarize([950.0, 950.0], "pings/s", True)}
+
+        [(_, change, regressed)] = compare(baseline, current, 0.1)
+
+        assert change == pytest.approx(1000 / 950 - 1)
+        assert not regressed
+
+    def test_new_benchmarks_skipped(self) -> None:
+        """Benchmarks missing from the baseline can't be compared."""
+        current = {"parsing": summarize([1.0, 1.0], "s")}
+
+        assert compare({}, current, 0.1) == []
@@ -0,0 +1,219 @@
+"""Tests for the cache module."""
+
+import ipaddress
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from bluebeacon import state
+from bluebeacon.cache import (
+    CACHE_VERSION,
+    file_key,
+    load,
+    load_geyser,
+    store,
+    store_geyser,
+)
+from bluebeacon.detector import GeyserConfig, ServerConfig
+
+
+@pytest.fixture(autouse=True)
+def runtime_dir(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    """Keep cache files inside a temporary runtime directory."""
+    directory = tmp_path / "runtime"
+    directory.mkdir()
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(directory))
+    return directory
+
+
+@pytest.fixture
+def config_file(tmp_path: Path) -> Path:
+    """Create a server.properties file."""
+    path = tmp_path / "server.properties"
+    path.write_text("server-ip=127.0.0.1\nserver-port=25565\n")
+    return path
+
+
+class TestFileKey:
+    """Tests for the file_key function."""
+
+    def test_file_key(self, config_file: Path) -> None:
+        """The key should consist of path, inode, size and mtime."""
+        stat = config_file.stat()
+        assert file_key(config_file) == (
+            str(config_file),
+            stat.st_ino,
+            stat.st_size,
+            stat.st_mtime_ns,
+        )
+
+    def test_file_key_missing_file(self, tmp_path: Path) -> None:
+        """A missing file should not have a key."""
+        assert file_key(tmp_path / "missing.properties") is None
+
+    def test_file_key_changes_with_content(self, config_file: Path) -> None:
+        """Changing the file should change its key."""
+        key = file_key(config_file)
+        config_file.write_text("server-ip=127.0.0.1\nserver-port=25566\n")
+        os.utime(config_file, ns=(0, 0))
+        assert file_key(config_file) != key
+
+
+class TestLoadStore:
+    """Tests for the load and store functions."""
+
+    def test_round_trip_ipv4(self, config_file: Path) -> None:
+        """A stored entry should be loaded again."""
+        key = file_key(config_file)
+        assert key is not None
+        server = ServerConfig(ipaddress.IPv4Address("127.0.0.1"), 25565, "ini")
+
+        store(key, server)
+
+        assert load(key) == server
+
+    def test_round_trip_edition(self, config_file: Path) -> None:
+        """The inferred edition should be cached as well."""
+        key = file_key(config_file)
+        assert key is not None
+        server = ServerConfig(
+            ipaddress.IPv4Address("127.0.0.1"), 19132, "ini", "bedrock"
+        )
+
+        store(key, server)
+
+        assert load(key) == server
+
+    def test_round_trip_host_name(self, config_file: Path) -> None:
+        """The host name a proxy binds to should be cached with its address."""
+        key = file_key(config_file)
+        assert key is not None
+        server = ServerConfig(
+            ipaddress.IPv4Address("10.0.0.5"), 25577, "toml", "java", "mc.internal"
+        )
+
+        store(key, server)
+
+        assert load(key) == server
+
+    def test_round_trip_query_port(self, config_file: Path) -> None:
+        """The query port should be cached, so query checks don't parse the config."""
+        key = file_key(config_file)
+        assert key is not None
+        server = ServerConfig(
+            ipaddress.IPv4Address("127.0.0.1"), 25565, "ini", "java", None, 25585
+        )
+
+        store(key, server)
+
+        assert load(key) == server
+
+    def test_round_trip_ipv6(self, config_file: Path) -> None:
+        """IPv6 addresses should keep their type."""
+        key = file_key(config_file)
+        assert key is not None
+        server = ServerConfig(ipaddress.IPv6Address("::1"), 25565, "toml")
+
+        store(key, server)
+
+        assert load(key) == server
+
+    def test_load_without_entry(self, config_file: Path) -> None:
+        """Loading without a stored entry should return None."""
+        key = file_key(config_file)
+        assert key is not None
+        assert load(key) is None
+
+    def test_load_changed_file(self, config_file: Path) -> None:
+        """An entry for an older version of the file should be ignored."""
+        key = file_key(config_file)
+        assert key is not None
+        store(key, ServerConfig(ipaddress.IPv4Address("127.0.0.1"), 25565, "ini"))
+
+        path, inode, size, mtime_ns = key
+        assert load((path, inode, size, mtime_ns + 1)) is None
+        assert load((path, inode, size + 1, mtime_ns)) is None
+        assert load((path, inode + 1, size, mtime_ns)) is None
+
+    def test_load_other_version(self, config_file: Path) -> None:
+        """Entries written by another cache version should be ignored."""
+        key = file_key(config_file)
+        assert key is not None
+        entry = {
+            "version": CACHE_VERSION + 1,
+            "key": list(key),
+            "address": "127.0.0.1",
+            "port": 25565,
+            "format": "ini",
+        }
+        state.state_file(key[0], "cache").write_text(json.dumps(entry))
+
+        assert load(key) is None
+
+    @pytest.mark.parametrize(
+        "content",
+        [
+            "",
+            "not json",
+            "[]",
+            '{"version": 1}',
+        ],
+    )
+    def test_load_corrupted(self, config_file: Path, content: str) -> None:
+        """Corrupted entries should be ignored."""
+        key = file_key(config_file)
+        assert key is not None
+        state.state_file(key[0], "cache").write_text(content)
+
+        assert load(key) is None
+
+    def test_load_invalid_address(self, config_file: Path) -> None:
+        """Entries with an invalid address should be ignored."""
+        key = file_key(config_file)
+        assert key is not None
+        entry = {
+            "version": CACHE_VERSION,
+            "key": list(key),
+            "address": "not an address",
+            "port": 25565,
+            "format": "ini",
+        }
+        state.state_file(key[0], "cache").write_text(json.dumps(entry))
+
+        assert load(key) is None
+
+    def test_store_unwritable(
+        self, config_file: Path, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+    ) -> None:
+        """Failing to write the cache should raise OSError."""
+        monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path / "missing"))
+        key = file_key(config_file)
+        assert key is not None
+
+        with pytest.raises(OSError):
+            store(key, ServerConfig(ipaddress.IPv4Address("127.0.0.1"), 25565, "ini"))
+
+
+class TestGeyserCache:
+    """Tests for the load_geyser and store_geyser functions."""
+
+    def test_round_trip(self, tmp_path: Path) -> None:
+        """A stored Geyser config should be loaded again."""
+        geyser_config = tmp_path / "config.yml"
+        geyser_config.write_text("bedrock:\n  port: 19133\n")
+        key = file_key(geyser_config)
+        assert key is not None
+
+        store_geyser(key, GeyserConfig(19133, False))
+
+        assert load_geyser(key) == GeyserConfig(19133, False)
+
+    def test_load_server_entry(self, config_file: Path) -> None:
+        """An entry of a server config should not be loaded as Geyser config."""
+        key = file_key(config_file)
+        assert key is not None
+        store(key, ServerConfig(ipaddress.IPv4Address("127.0.0.1"), 25565, "ini"))
+
+        assert load_geyser(key) is None
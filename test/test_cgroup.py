@@ -0,0 +1,69 @@
+"""Tests for the cgroup module."""
+
+from pathlib import Path
+
+import pytest
+
+from bluebeacon.cgroup import MAX_PRESSURE, CpuSample, sample
+
+CPU_STAT = b"""usage_usec 8323710
+user_usec 5911206
+system_usec 2412504
+nr_periods 1204
+nr_throttled 37
+throttled_usec 912345
+"""
+
+CPU_PRESSURE = b"""some avg10=12.50 avg60=3.10 avg300=0.80 total=1234567
+full avg10=8.00 avg60=1.00 avg300=0.20 total=234567
+"""
+
+
+class TestSample:
+    """Tests for reading the statistics of the cgroup."""
+
+    def test_sample(self, tmp_path: Path) -> None:
+        """The throttling counters and the pressure should be read."""
+        (tmp_path / "cpu.stat").write_bytes(CPU_STAT)
+        (tmp_path / "cpu.pressure").write_bytes(CPU_PRESSURE)
+
+        assert sample(tmp_path) == CpuSample(37, 912345, 12.5)
+
+    def test_without_pressure(self, tmp_path: Path) -> None:
+        """Without PSI the pressure should be unknown."""
+        (tmp_path / "cpu.stat").write_bytes(CPU_STAT)
+
+        assert sample(tmp_path) == CpuSample(37, 912345, None)
+
+    def test_without_cpu_controller(self, tmp_path: Path) -> None:
+        """Without the cpu controller there is no quota to be throttled by."""
+        (tmp_path / "cpu.stat").write_bytes(b"usage_usec 100\nuser_usec 50\n")
+
+        assert sample(tmp_path) == CpuSample(0, 0, None)
+
+    def test_without_cgroup_v2(self, tmp_path: Path) -> None:
+        """Without a cgroup v2 there should be no sample."""
+        assert sample(tmp_path) is None
+
+
+class TestCpuSample:
+    """Tests for judging the samples."""
+
+    @pytest.mark.parametrize(
+        ("pressure", "factor"),
+        [(None, 1.0), (0.0, 1.0), (50.0, 2.0), (MAX_PRESSURE, 4.0), (100.0, 4.0)],
+    )
+    def test_timeout_factor(self, pressure: float, factor: float) -> None:
+        """Timeouts should be stretched by the share of time tasks can run."""
+        assert CpuSample(0, 0, pressure).timeout_factor() == factor
+
+    def test_throttled_periods(self) -> None:
+        """A new throttled period should count as throttled."""
+        assert CpuSample(38, 1000).throttled_since(CpuSample(37, 0))
+        assert not CpuSample(37, 0).throttled_since(CpuSample(37, 0))
+
+    def test_pressure(self) -> None:
+        """High pressure in either sample should count as throttled."""
+        assert CpuSample(37, 0, 1.0).throttled_since(CpuSample(37, 0, 20.0))
+        assert CpuSample(37, 0, 20.0).throttled_since(CpuSample(37, 0, 1.0))
+        assert not CpuSample(37, 0, 5.0).throttled_since(CpuSample(37, 0, 5.0))
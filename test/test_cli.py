@@ -1,12 +1,36 @@
 """Tests for the CLI module."""
 
 import ipaddress
+import json
+import time
 from pathlib import Path
+from typing import Any, List
 
+import pytest
 from click.testing import CliRunner
 from pytest_mock import MockerFixture, MockType
 
-from bluebeacon import cli
+from bluebeacon import cgroup, cli, detector, ping, query, statusfile
+
+from .stub_server import QueryStubServer
+
+
+@pytest.fixture(autouse=True)
+def isolated_runtime_dir(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Keep the state files of the checks out of the real runtime directory."""
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+
+
+@pytest.fixture(autouse=True)
+def unknown_listeners(mocker: MockerFixture) -> MockType:
+    """Let the listener check find no socket tables, as outside of Linux."""
+    return mocker.patch("bluebeacon.listeners.is_listening", return_value=None)
+
+
+@pytest.fixture(autouse=True)
+def unthrottled(mocker: MockerFixture) -> MockType:
+    """Let the checks find no cgroup v2, so the CPU quota of the host doesn't count."""
+    return mocker.patch("bluebeacon.cgroup.sample", return_value=None)
 
 
 class TestCli:
@@ -38,13 +62,15 @@ class TestCli:
         mock_find_config = mocker.patch("bluebeacon.detector.find_server_config")
         mock_find_config.return_value = Path("/mock/path/server.properties")
 
-        # Mock the detector.parse_server_config function to return address and port
-        mock_parse_config = mocker.patch("bluebeacon.detector.parse_server_config")
-        mock_parse_config.return_value = (ipaddress.IPv4Address("127.0.0.1"), 25565)
+        # Mock the detector.read_server_config function to return address, port and format
+        mock_parse_config = mocker.patch("bluebeacon.detector.read_server_config")
+        mock_parse_config.return_value = detector.ServerConfig(
+            ipaddress.IPv4Address("127.0.0.1"), 25565, "ini"
+        )
 
-        # Mock the ping.ping_server function to return True
-        mock_ping = mocker.patch("bluebeacon.ping.ping_server")
-        mock_ping.return_value = True
+        # Mock the ping.probe_server function to return True
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(True)
 
         # Run the CLI
         runner = CliRunner()
@@ -60,13 +86,15 @@ class TestCli:
         mock_find_config = mocker.patch("bluebeacon.detector.find_server_config")
         mock_find_config.return_value = Path("/mock/path/server.properties")
 
-        # Mock the detector.parse_server_config function to return address and port
-        mock_parse_config = mocker.patch("bluebeacon.detector.parse_server_config")
-        mock_parse_config.return_value = (ipaddress.IPv4Address("127.0.0.1"), 25565)
+        # Mock the detector.read_server_config function to return address, port and format
+        mock_parse_config = mocker.patch("bluebeacon.detector.read_server_config")
+        mock_parse_config.return_value = detector.ServerConfig(
+            ipaddress.IPv4Address("127.0.0.1"), 25565, "ini"
+        )
 
-        # Mock the ping.ping_server function to return True
-        mock_ping = mocker.patch("bluebeacon.ping.ping_server")
-        mock_ping.return_value = True
+        # Mock the ping.probe_server function to return True
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(True)
 
         # Run the CLI with a specific path
         test_path = "test_config_path"
@@ -115,13 +143,15 @@ class TestCli:
         mock_find_config = mocker.patch("bluebeacon.detector.find_server_config")
         mock_find_config.return_value = Path("/mock/path/server.properties")
 
-        # Mock the detector.parse_server_config function to return address and port
-        mock_parse_config = mocker.patch("bluebeacon.detector.parse_server_config")
-        mock_parse_config.return_value = (ipaddress.IPv4Address("127.0.0.1"), 25565)
+        # Mock the detector.read_server_config function to return address, port and format
+        mock_parse_config = mocker.patch("bluebeacon.detector.read_server_config")
+        mock_parse_config.return_value = detector.ServerConfig(
+            ipaddress.IPv4Address("127.0.0.1"), 25565, "ini"
+        )
 
-        # Mock the ping.ping_server function to return True
-        mock_ping = mocker.patch("bluebeacon.ping.ping_server")
-        mock_ping.return_value = True
+        # Mock the ping.probe_server function to return True
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(True)
 
         # Run the CLI
         runner = CliRunner()
@@ -129,7 +159,9 @@ class TestCli:
 
         # Verify the result and the mocks
         assert result.exit_code == 0
-        mock_parse_config.assert_called_once_with(Path("/mock/path/server.properties"))
+        mock_parse_config.assert_called_once_with(
+            Path("/mock/path/server.properties"), None
+        )
 
     def test_main_failure_parse_config(self, mocker: MockerFixture) -> None:
         """Test the main function when config parsing fails."""
@@ -137,8 +169,8 @@ class TestCli:
         mock_find_config = mocker.patch("bluebeacon.detector.find_server_config")
         mock_find_config.return_value = Path("/mock/path/server.properties")
 
-        # Mock the detector.parse_server_config function to raise ValueError
-        mock_parse_config = mocker.patch("bluebeacon.detector.parse_server_config")
+        # Mock the detector.read_server_config function to raise ValueError
+        mock_parse_config = mocker.patch("bluebeacon.detector.read_server_config")
         error_message = "Unsupported server config file format"
         mock_parse_config.side_effect = ValueError(error_message)
 
@@ -149,7 +181,9 @@ class TestCli:
         # Verify the result and the mocks
         assert f"Error: {error_message}" in result.output
         assert result.exit_code == 2
-        mock_parse_config.assert_called_once_with(Path("/mock/path/server.properties"))
+        mock_parse_config.assert_called_once_with(
+            Path("/mock/path/server.properties"), None
+        )
 
     def test_main_server_reachable(self, mocker: MockerFixture) -> None:
         """Test the main function when server is unreachable."""
@@ -157,13 +191,15 @@ class TestCli:
         mock_find_config = mocker.patch("bluebeacon.detector.find_server_config")
         mock_find_config.return_value = Path("/mock/path/server.properties")
 
-        # Mock the detector.parse_server_config function to return address and port
-        mock_parse_config = mocker.patch("bluebeacon.detector.parse_server_config")
-        mock_parse_config.return_value = (ipaddress.IPv4Address("127.0.0.1"), 25565)
+        # Mock the detector.read_server_config function to return address, port and format
+        mock_parse_config = mocker.patch("bluebeacon.detector.read_server_config")
+        mock_parse_config.return_value = detector.ServerConfig(
+            ipaddress.IPv4Address("127.0.0.1"), 25565, "ini"
+        )
 
-        # Mock the ping.ping_server function to return False (server unreachable)
-        mock_ping = mocker.patch("bluebeacon.ping.ping_server")
-        mock_ping.return_value = True
+        # Mock the ping.probe_server function to return False (server unreachable)
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(True)
 
         # Run the CLI
         runner = CliRunner()
@@ -172,7 +208,14 @@ class TestCli:
         # Verify the result and the mocks
         assert result.exit_code == 0
         mock_ping.assert_called_once_with(
-            ipaddress.IPv4Address("127.0.0.1"), 25565, "both"
+            ipaddress.IPv4Address("127.0.0.1"),
+            25565,
+            "both",
+            depth="status",
+            timeout=0.25,
+            query_port=None,
+            bedrock_port=None,
+            deadline=None,
         )
 
     def test_main_server_unreachable(self, mocker: MockerFixture) -> None:
@@ -181,13 +224,15 @@ class TestCli:
         mock_find_config = mocker.patch("bluebeacon.detector.find_server_config")
         mock_find_config.return_value = Path("/mock/path/server.properties")
 
-        # Mock the detector.parse_server_config function to return address and port
-        mock_parse_config = mocker.patch("bluebeacon.detector.parse_server_config")
-        mock_parse_config.return_value = (ipaddress.IPv4Address("127.0.0.1"), 25565)
+        # Mock the detector.read_server_config function to return address, port and format
+        mock_parse_config = mocker.patch("bluebeacon.detector.read_server_config")
+        mock_parse_config.return_value = detector.ServerConfig(
+            ipaddress.IPv4Address("127.0.0.1"), 25565, "ini"
+        )
 
-        # Mock the ping.ping_server function to return False (server unreachable)
-        mock_ping = mocker.patch("bluebeacon.ping.ping_server")
-        mock_ping.return_value = False
+        # Mock the ping.probe_server function to return False (server unreachable)
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(False)
 
         # Run the CLI
         runner = CliRunner()
@@ -196,7 +241,14 @@ class TestCli:
         # Verify the result and the mocks
         assert result.exit_code == 1
         mock_ping.assert_called_once_with(
-            ipaddress.IPv4Address("127.0.0.1"), 25565, "both"
+            ipaddress.IPv4Address("127.0.0.1"),
+            25565,
+            "both",
+            depth="status",
+            timeout=0.25,
+            query_port=None,
+            bedrock_port=None,
+            deadline=None,
         )
 
 
@@ -205,10 +257,12 @@ class TestCliServerTypeFlags:
     def _common_mocks(mocker: MockerFixture) -> MockType:
         mock_find_config = mocker.patch("bluebeacon.detector.find_server_config")
         mock_find_config.return_value = Path("/mock/path/server.properties")
-        mock_parse_config = mocker.patch("bluebeacon.detector.parse_server_config")
-        mock_parse_config.return_value = (ipaddress.IPv4Address("127.0.0.1"), 25565)
-        mock_ping = mocker.patch("bluebeacon.ping.ping_server")
-        mock_ping.return_value = True
+        mock_parse_config = mocker.patch("bluebeacon.detector.read_server_config")
+        mock_parse_config.return_value = detector.ServerConfig(
+            ipaddress.IPv4Address("127.0.0.1"), 25565, "ini"
+        )
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(True)
 
         return mock_ping
 
@@ -218,7 +272,14 @@ class TestCliServerTypeFlags:
         result = runner.invoke(cli.main, ["--java"])
         assert result.exit_code == 0
         mock_ping.assert_called_once_with(
-            ipaddress.IPv4Address("127.0.0.1"), 25565, "java"
+            ipaddress.IPv4Address("127.0.0.1"),
+            25565,
+            "java",
+            depth="status",
+            timeout=0.25,
+            query_port=None,
+            bedrock_port=None,
+            deadline=None,
         )
 
     def test_flag_bedrock(self, mocker: MockerFixture) -> None:
@@ -227,7 +288,14 @@ class TestCliServerTypeFlags:
         result = runner.invoke(cli.main, ["--bedrock"])
         assert result.exit_code == 0
         mock_ping.assert_called_once_with(
-            ipaddress.IPv4Address("127.0.0.1"), 25565, "bedrock"
+            ipaddress.IPv4Address("127.0.0.1"),
+            25565,
+            "bedrock",
+            depth="status",
+            timeout=0.25,
+            query_port=None,
+            bedrock_port=None,
+            deadline=None,
         )
 
     def test_flag_both(self, mocker: MockerFixture) -> None:
@@ -236,7 +304,14 @@ class TestCliServerTypeFlags:
         result = runner.invoke(cli.main, ["--both"])
         assert result.exit_code == 0
         mock_ping.assert_called_once_with(
-            ipaddress.IPv4Address("127.0.0.1"), 25565, "both"
+            ipaddress.IPv4Address("127.0.0.1"),
+            25565,
+            "both",
+            depth="status",
+            timeout=0.25,
+            query_port=None,
+            bedrock_port=None,
+            deadline=None,
         )
 
     def test_flag_none(self, mocker: MockerFixture) -> None:
@@ -245,5 +320,1512 @@ class TestCliServerTypeFlags:
         result = runner.invoke(cli.main, [])
         assert result.exit_code == 0
         mock_ping.assert_called_once_with(
-            ipaddress.IPv4Address("127.0.0.1"), 25565, "both"
+            ipaddress.IPv4Address("127.0.0.1"),
+            25565,
+            "both",
+            depth="status",
+            timeout=0.25,
+            query_port=None,
+            bedrock_port=None,
+            deadline=None,
+        )
+
+
+class TestCliAdaptiveTimeout:
+    """Tests for the timeout learned from recent round-trip times."""
+
+    @staticmethod
+    def _common_mocks(mocker: MockerFixture) -> None:
+        mock_find_config = mocker.patch("bluebeacon.detector.find_server_config")
+        mock_find_config.return_value = Path("/mock/path/server.properties")
+        mock_parse_config = mocker.patch("bluebeacon.detector.read_server_config")
+        mock_parse_config.return_value = detector.ServerConfig(
+            ipaddress.IPv4Address("127.0.0.1"), 25565, "ini"
+        )
+
+    def test_timeout_follows_latency(self, mocker: MockerFixture) -> None:
+        self._common_mocks(mocker)
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(True, "java", 0.001)
+
+        runner = CliRunner()
+        for _ in range(10):
+            result = runner.invoke(cli.main, [])
+            assert result.exit_code == 0
+
+        timeouts = [call.kwargs["timeout"] for call in mock_ping.call_args_list]
+        assert timeouts[0] == 0.25
+        assert timeouts[-1] == cli.DEFAULT_TIMEOUT_MIN
+
+    def test_timeout_bounds(self, mocker: MockerFixture) -> None:
+        self._common_mocks(mocker)
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(False, error="timeout")
+
+        runner = CliRunner()
+        for _ in range(10):
+            result = runner.invoke(
+                cli.main, ["--timeout-min", "0.1", "--timeout-max", "0.5"]
+            )
+            assert result.exit_code == 1
+
+        timeouts = [call.kwargs["timeout"] for call in mock_ping.call_args_list]
+        assert timeouts[0] == 0.25
+        assert timeouts[-1] == 0.5
+
+    def test_timeout_min_above_max(self, mocker: MockerFixture) -> None:
+        self._common_mocks(mocker)
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+
+        runner = CliRunner()
+        result = runner.invoke(
+            cli.main, ["--timeout-min", "0.5", "--timeout-max", "0.1"]
+        )
+
+        assert result.exit_code == 2
+        assert "--timeout-min" in result.output
+        mock_ping.assert_not_called()
+
+
+class TestCliLatencyPolicy:
+    """Tests for the latency objective of checks."""
+
+    @pytest.fixture(autouse=True)
+    def server(self, mocker: MockerFixture) -> None:
+        mock_find_config = mocker.patch("bluebeacon.detector.find_server_config")
+        mock_find_config.return_value = Path("/mock/path/server.properties")
+        mock_parse_config = mocker.patch("bluebeacon.detector.read_server_config")
+        mock_parse_config.return_value = detector.ServerConfig(
+            ipaddress.IPv4Address("127.0.0.1"), 25565, "ini"
+        )
+
+    @pytest.mark.parametrize(
+        "latency, exit_code, degraded", [(0.002, 0, False), (0.04, 3, True)]
+    )
+    def test_max_latency(
+        self, mocker: MockerFixture, latency: float, exit_code: int, degraded: bool
+    ) -> None:
+        """A server slower than --max-latency should be degraded."""
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(True, "java", latency)
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["--json", "--max-latency", "0.02"])
+
+        assert result.exit_code == exit_code
+        assert json.loads(result.output)["degraded"] is degraded
+
+    def test_down_is_failure(self, mocker: MockerFixture) -> None:
+        """A server that doesn't respond should fail, not be degraded."""
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(False, error="timeout")
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["--max-latency", "0.02"])
+
+        assert result.exit_code == 1
+
+    def test_percentile(self, mocker: MockerFixture) -> None:
+        """With a percentile, slow recent checks should degrade fast ones."""
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        options = [
+            "--max-latency",
+            "0.02",
+            "--latency-percentile",
+            "75",
+            "--latency-window",
+            "4",
+        ]
+
+        runner = CliRunner()
+        exit_codes = []
+        for latency in [0.04, 0.001, 0.001, 0.001, 0.001]:
+            mock_ping.return_value = ping.PingResult(True, "java", latency)
+            exit_codes.append(runner.invoke(cli.main, options).exit_code)
+
+        # The slow check is the p75 until the window holds three fast checks
+        assert exit_codes == [3, 3, 3, 0, 0]
+
+    def test_percentile_requires_max_latency(self, mocker: MockerFixture) -> None:
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["--latency-percentile", "95"])
+
+        assert result.exit_code == 2
+        assert "--latency-percentile" in result.output
+        mock_ping.assert_not_called()
+
+
+class TestCliFlapDamping:
+    """Tests for absorbing single failed checks."""
+
+    @pytest.fixture(autouse=True)
+    def server(self, mocker: MockerFixture) -> None:
+        mock_find_config = mocker.patch("bluebeacon.detector.find_server_config")
+        mock_find_config.return_value = Path("/mock/path/server.properties")
+        mock_parse_config = mocker.patch("bluebeacon.detector.read_server_config")
+        mock_parse_config.return_value = detector.ServerConfig(
+            ipaddress.IPv4Address("127.0.0.1"), 25565, "ini"
+        )
+
+    def test_failures_absorbed(self, mocker: MockerFixture) -> None:
+        """Only the third failure in a row should fail the check."""
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(False, error="timeout")
+
+        runner = CliRunner()
+        exit_codes = [
+            runner.invoke(cli.main, ["--failures", "3"]).exit_code for _ in range(4)
+        ]
+
+        assert exit_codes == [0, 0, 1, 1]
+
+    def test_success_ends_streak(self, mocker: MockerFixture) -> None:
+        """A successful check should start the count over."""
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        down = ping.PingResult(False, error="timeout")
+        up = ping.PingResult(True, "java", 0.001)
+
+        runner = CliRunner()
+        exit_codes = []
+        for outcome in [down, up, down, down]:
+            mock_ping.return_value = outcome
+            exit_codes.append(runner.invoke(cli.main, ["--failures", "2"]).exit_code)
+
+        assert exit_codes == [0, 0, 0, 1]
+
+    def test_failure_window(self, mocker: MockerFixture) -> None:
+        """Failures further apart than the window should not add up."""
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(False, error="timeout")
+        mock_time = mocker.patch("bluebeacon.damping.time.time")
+
+        runner = CliRunner()
+        exit_codes = []
+        for now in [100, 200, 205]:
+            mock_time.return_value = now
+            result = runner.invoke(
+                cli.main, ["--failures", "2", "--failure-window", "30"]
+            )
+            exit_codes.append(result.exit_code)
+
+        assert exit_codes == [0, 0, 1]
+
+    def test_json(self, mocker: MockerFixture) -> None:
+        """The JSON output should report the raw result and the streak."""
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(False, error="timeout")
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["--json", "--failures", "2"])
+
+        assert result.exit_code == 0
+        output = json.loads(result.output)
+        assert output["success"] is False
+        assert output["consecutive_failures"] == 1
+
+    def test_default_fails_at_once(self, mocker: MockerFixture) -> None:
+        """Without --failures a failed check should fail and keep no state."""
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(False, error="timeout")
+        mock_streak = mocker.patch("bluebeacon.damping.FailureStreak.for_server")
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["--json"])
+
+        assert result.exit_code == 1
+        assert "consecutive_failures" not in json.loads(result.output)
+        mock_streak.assert_not_called()
+
+
+class TestCliBackends:
+    """Tests for checking the backends of a proxy."""
+
+    @pytest.fixture
+    def velocity_config(self, tmp_path: Path) -> Path:
+        path = tmp_path / "velocity.toml"
+        path.write_text(
+            'bind = "0.0.0.0:25577"\n'
+            "[servers]\n"
+            'lobby = "127.0.0.1:30066"\n'
+            'factions = "127.0.0.1:30067"\n'
+            'try = ["lobby"]\n'
+        )
+        return path
+
+    @staticmethod
+    def _mock_ping(mocker: MockerFixture, down_ports: List[int]) -> MockType:
+        def probe(address: object, port: int, *args: object, **kwargs: object) -> Any:
+            if port in down_ports:
+                return ping.PingResult(False, error="refused")
+            return ping.PingResult(True, "java", 0.002)
+
+        return mocker.patch("bluebeacon.ping.probe_server", side_effect=probe)
+
+    def test_backends_reported(
+        self, mocker: MockerFixture, velocity_config: Path
+    ) -> None:
+        mock_ping = self._mock_ping(mocker, [30067])
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["--backends", str(velocity_config)])
+
+        assert result.exit_code == 0
+        assert result.output.splitlines() == [
+            "proxy\t127.0.0.1:25577\tup (2.0 ms)",
+            "lobby\t127.0.0.1:30066\tup (2.0 ms)",
+            "factions\t127.0.0.1:30067\tdown (refused)",
+        ]
+        mock_ping.assert_any_call(
+            ipaddress.IPv4Address("127.0.0.1"),
+            30066,
+            "java",
+            depth="status",
+            timeout=0.25,
+            query_port=None,
+            bedrock_port=None,
+            deadline=None,
+        )
+
+    def test_proxy_query_port(self, mocker: MockerFixture, tmp_path: Path) -> None:
+        """The proxy should be queried on its query port, not its game port."""
+        config_file = tmp_path / "velocity.toml"
+        config_file.write_text(
+            'bind = "0.0.0.0:25577"\n'
+            "[query]\nenabled = true\nport = 25578\n"
+            '[servers]\nlobby = "127.0.0.1:30066"\n'
+        )
+        mock_ping = self._mock_ping(mocker, [])
+
+        runner = CliRunner()
+        result = runner.invoke(
+            cli.main, ["--backends", "--depth", "query", str(config_file)]
+        )
+
+        assert result.exit_code == 0
+        query_ports = {
+            call.args[1]: call.kwargs["query_port"] for call in mock_ping.call_args_list
+        }
+        assert query_ports == {25577: 25578, 30066: None}
+        depths = {
+            call.args[1]: call.kwargs["depth"] for call in mock_ping.call_args_list
+        }
+        assert depths == {25577: "query", 30066: "status"}
+
+    def test_proxy_geyser(
+        self, mocker: MockerFixture, velocity_config: Path, unknown_listeners: MockType
+    ) -> None:
+        """The proxy should be pinged like a single check, with the port of Geyser."""
+        geyser_config = velocity_config.parent / "plugins" / "Geyser-Velocity"
+        geyser_config.mkdir(parents=True)
+        (geyser_config / "config.yml").write_text("bedrock:\n  port: 19133\n")
+        mock_ping = self._mock_ping(mocker, [])
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["--backends", str(velocity_config)])
+
+        assert result.exit_code == 0
+        mock_ping.assert_any_call(
+            ipaddress.IPv4Address("127.0.0.1"),
+            25577,
+            "both",
+            depth="status",
+            timeout=0.25,
+            query_port=None,
+            bedrock_port=19133,
+            deadline=None,
+        )
+        # Only the proxy runs in this container
+        assert {call.args[1] for call in unknown_listeners.call_args_list} == {
+            25577,
+            19133,
+        }
+
+    def test_proxy_failures_absorbed(
+        self, mocker: MockerFixture, velocity_config: Path
+    ) -> None:
+        """--failures should absorb short streaks of the proxy like of a server."""
+        self._mock_ping(mocker, [25577])
+
+        runner = CliRunner()
+        results = [
+            runner.invoke(
+                cli.main,
+                ["--failures", "3", "--backends", "--json", str(velocity_config)],
+            )
+            for _ in range(3)
+        ]
+
+        assert [result.exit_code for result in results] == [0, 0, 1]
+        assert [
+            json.loads(result.output)["consecutive_failures"] for result in results
+        ] == [1, 2, 3]
+
+    def test_proxy_degraded(self, mocker: MockerFixture, velocity_config: Path) -> None:
+        """A slow proxy should be degraded like a single server."""
+        self._mock_ping(mocker, [])
+
+        runner = CliRunner()
+        result = runner.invoke(
+            cli.main,
+            ["--backends", "--json", "--max-latency", "0.001", str(velocity_config)],
+        )
+
+        assert result.exit_code == cli.EXIT_DEGRADED
+        output = json.loads(result.output)
+        assert output["degraded"] is True
+        assert [backend["degraded"] for backend in output["backends"]] == [
+            False,
+            False,
+        ]
+
+    @pytest.mark.parametrize(
+        "down_ports, min_backends, exit_code",
+        [
+            ([], 2, 0),
+            ([30067], 1, 0),
+            ([30067], 2, 1),
+            ([25577], 0, 1),
+        ],
+    )
+    def test_min_backends(
+        self,
+        mocker: MockerFixture,
+        velocity_config: Path,
+        down_ports: List[int],
+        min_backends: int,
+        exit_code: int,
+    ) -> None:
+        self._mock_ping(mocker, down_ports)
+
+        runner = CliRunner()
+        result = runner.invoke(
+            cli.main, ["--min-backends", str(min_backends), str(velocity_config)]
+        )
+
+        assert result.exit_code == exit_code
+        assert len(result.output.splitlines()) == 3
+
+    def test_without_backends_option(
+        self, mocker: MockerFixture, velocity_config: Path
+    ) -> None:
+        mock_ping = self._mock_ping(mocker, [])
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, [str(velocity_config)])
+
+        assert result.exit_code == 0
+        assert result.output == ""
+        mock_ping.assert_called_once()
+
+
+class TestCliJson:
+    """Tests for the --json output of the check command."""
+
+    @pytest.fixture
+    def config_file(self, tmp_path: Path) -> Path:
+        path = tmp_path / "server.properties"
+        path.write_text("server-ip=127.0.0.1\nserver-port=25565\n")
+        return path
+
+    def test_json_success(self, mocker: MockerFixture, config_file: Path) -> None:
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(
+            True,
+            "java",
+            0.0012345,
+            version="1.21.4",
+            protocol_version=769,
+            players_online=3,
+            players_max=20,
+        )
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["--json", str(config_file)])
+
+        assert result.exit_code == 0
+        assert json.loads(result.output) == {
+            "config_file": str(config_file),
+            "config_format": "ini",
+            "address": "127.0.0.1",
+            "port": 25565,
+            "success": True,
+            "protocol": "java",
+            "latency_ms": 1.234,
+            "error": None,
+            "version": "1.21.4",
+            "protocol_version": 769,
+            "players_online": 3,
+            "players_max": 20,
+            "degraded": False,
+            "throttled": False,
+        }
+
+    def test_json_cached_config(self, mocker: MockerFixture, config_file: Path) -> None:
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(True, "java", 0.001)
+
+        runner = CliRunner()
+        first = runner.invoke(cli.main, ["--json", str(config_file)])
+        second = runner.invoke(cli.main, ["--json", str(config_file)])
+
+        assert json.loads(first.output) == json.loads(second.output)
+
+    def test_json_failure(self, mocker: MockerFixture, config_file: Path) -> None:
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(False, error="refused")
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["--json", str(config_file)])
+
+        assert result.exit_code == 1
+        payload = json.loads(result.output)
+        assert payload["success"] is False
+        assert payload["error"] == "refused"
+        assert payload["latency_ms"] is None
+
+    def test_json_config_error(self, tmp_path: Path) -> None:
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["--json", str(tmp_path)])
+
+        assert result.exit_code == 2
+        payload = json.loads(result.output)
+        assert payload["success"] is False
+        assert "No valid server configuration found" in payload["error"]
+
+    def test_json_backends(self, mocker: MockerFixture, tmp_path: Path) -> None:
+        config_file = tmp_path / "velocity.toml"
+        config_file.write_text(
+            'bind = "0.0.0.0:25577"\n'
+            "[servers]\n"
+            'lobby = "127.0.0.1:30066"\n'
+            'broken = "nosuchhost.invalid:30067"\n'
+        )
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(True, "java", 0.001)
+
+        runner = CliRunner()
+        result = runner.invoke(
+            cli.main, ["--json", "--min-backends", "1", str(config_file)]
+        )
+
+        assert result.exit_code == 0
+        payload = json.loads(result.output)
+        assert payload["config_format"] == "toml"
+        assert payload["success"] is True
+        assert payload["healthy"] is True
+        assert payload["backends_up"] == 1
+        assert [backend["name"] for backend in payload["backends"]] == [
+            "lobby",
+            "broken",
+        ]
+        assert payload["backends"][0]["success"] is True
+        assert payload["backends"][1]["success"] is False
+        assert payload["backends"][1]["error"]
+
+
+class TestCliListenerCheck:
+    """Tests for the listener check before pinging."""
+
+    @pytest.fixture(autouse=True)
+    def server(self, mocker: MockerFixture) -> None:
+        mock_find_config = mocker.patch("bluebeacon.detector.find_server_config")
+        mock_find_config.return_value = Path("/mock/path/server.properties")
+        mock_parse_config = mocker.patch("bluebeacon.detector.read_server_config")
+        mock_parse_config.return_value = detector.ServerConfig(
+            ipaddress.IPv4Address("127.0.0.1"), 25565, "ini"
+        )
+
+    def test_nothing_listening(
+        self, mocker: MockerFixture, unknown_listeners: MockType
+    ) -> None:
+        """Without a listener the check should fail without pinging."""
+        unknown_listeners.return_value = False
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["--json"])
+
+        assert result.exit_code == 1
+        assert json.loads(result.output)["error"] == "not listening"
+        mock_ping.assert_not_called()
+
+    def test_pings_listening_edition(
+        self, mocker: MockerFixture, unknown_listeners: MockType
+    ) -> None:
+        """Only the edition with a listener should be pinged."""
+        unknown_listeners.side_effect = lambda address, port, transport: (
+            transport == "tcp"
+        )
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(True, "java", 0.001)
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, [])
+
+        assert result.exit_code == 0
+        mock_ping.assert_called_once_with(
+            ipaddress.IPv4Address("127.0.0.1"),
+            25565,
+            "java",
+            depth="status",
+            timeout=0.25,
+            query_port=None,
+            bedrock_port=None,
+            deadline=None,
+        )
+
+    def test_disabled(self, mocker: MockerFixture, unknown_listeners: MockType) -> None:
+        """--no-listener-check should ping without reading the socket tables."""
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(True, "java", 0.001)
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["--no-listener-check"])
+
+        assert result.exit_code == 0
+        unknown_listeners.assert_not_called()
+        mock_ping.assert_called_once()
+
+
+class TestCliQuery:
+    """Tests for the query depths."""
+
+    def test_query_port_read(self, mocker: MockerFixture, tmp_path: Path) -> None:
+        """The query port should be read from the config and passed to the ping."""
+        config_file = tmp_path / "server.properties"
+        config_file.write_text(
+            "server-ip=127.0.0.1\nserver-port=25565\n"
+            "enable-query=true\nquery.port=25585\n"
+        )
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(True, "java", 0.001)
+
+        runner = CliRunner()
+        result = runner.invoke(
+            cli.main, ["--java", "--depth", "query", str(config_file)]
+        )
+
+        assert result.exit_code == 0
+        mock_ping.assert_called_once_with(
+            ipaddress.IPv4Address("127.0.0.1"),
+            25565,
+            "java",
+            depth="query",
+            timeout=0.25,
+            query_port=25585,
+            bedrock_port=None,
+            deadline=None,
+        )
+
+    def test_query_port_cached(self, mocker: MockerFixture, tmp_path: Path) -> None:
+        """Once precomputed, the query port should come from the config cache."""
+        config_file = tmp_path / "server.properties"
+        config_file.write_text(
+            "server-ip=127.0.0.1\nserver-port=25565\n"
+            "enable-query=true\nquery.port=25585\n"
+        )
+        runner = CliRunner()
+        assert (
+            runner.invoke(cli.main, ["--precompute", str(config_file)]).exit_code == 0
+        )
+        mock_parse = mocker.patch("bluebeacon.detector.parse_query_port")
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(True, "java", 0.001)
+
+        result = runner.invoke(
+            cli.main, ["--java", "--depth", "query", str(config_file)]
+        )
+
+        assert result.exit_code == 0
+        assert mock_ping.call_args.kwargs["query_port"] == 25585
+        mock_parse.assert_not_called()
+
+    def test_query_disabled(self, mocker: MockerFixture, tmp_path: Path) -> None:
+        """A query depth should be an error if the query protocol is disabled."""
+        config_file = tmp_path / "server.properties"
+        config_file.write_text("server-ip=127.0.0.1\nserver-port=25565\n")
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["--depth", "query-full", str(config_file)])
+
+        assert result.exit_code == 2
+        assert "query protocol is not enabled" in result.output
+        mock_ping.assert_not_called()
+
+    def test_query_stub(self, tmp_path: Path) -> None:
+        """A full query of a real server should report its players in JSON."""
+        with QueryStubServer() as server:
+            config_file = tmp_path / "server.properties"
+            config_file.write_text(
+                "server-ip=127.0.0.1\nserver-port=25565\n"
+                f"enable-query=true\nquery.port={server.port}\n"
+            )
+
+            runner = CliRunner()
+            result = runner.invoke(
+                cli.main,
+                ["--java", "--json", "--depth", "query-full", str(config_file)],
+            )
+            query.clear_sessions()
+
+        assert result.exit_code == 0
+        output = json.loads(result.output)
+        assert output["version"] == "1.21.4"
+        assert (output["players_online"], output["players_max"]) == (2, 20)
+
+
+class TestCliDeadline:
+    """Tests for reporting the result within --deadline."""
+
+    def test_ping_deadline(self, mocker: MockerFixture) -> None:
+        """The ping should be given the deadline, less the margin for reporting."""
+        start = time.monotonic()
+        mocker.patch("bluebeacon.cli.process_start", return_value=start)
+        mocker.patch("bluebeacon.detector.find_server_config").return_value = Path(
+            "/mock/path/server.properties"
+        )
+        mocker.patch("bluebeacon.detector.read_server_config").return_value = (
+            detector.ServerConfig(ipaddress.IPv4Address("127.0.0.1"), 25565, "ini")
+        )
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(True, "java", 0.001)
+
+        runner = CliRunner()
+        result = runner.invoke(
+            cli.main, ["--java", "--no-listener-check", "--deadline", "0.9"]
+        )
+
+        assert result.exit_code == 0
+        deadline = mock_ping.call_args.kwargs["deadline"]
+        assert deadline == pytest.approx(start + 0.9 - cli.DEADLINE_MARGIN)
+
+    def test_budget_used_up(self, mocker: MockerFixture, tmp_path: Path) -> None:
+        """A check that used up its budget before pinging should report a timeout."""
+        config_file = tmp_path / "server.properties"
+        config_file.write_text("server-ip=127.0.0.1\nserver-port=25565\n")
+        mocker.patch("bluebeacon.cli.process_start", return_value=time.monotonic() - 5)
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+
+        runner = CliRunner()
+        result = runner.invoke(
+            cli.main,
+            ["--json", "--no-listener-check", "--deadline", "0.9", str(config_file)],
+        )
+
+        assert result.exit_code == 1
+        assert json.loads(result.output)["error"] == "timeout"
+        mock_ping.assert_not_called()
+
+    def test_resolve_within_budget(self, mocker: MockerFixture, tmp_path: Path) -> None:
+        """Resolving the host name of a proxy should only get what is left."""
+        config_file = tmp_path / "velocity.toml"
+        config_file.write_text('bind = "mc.internal:25577"\n')
+        mocker.patch("bluebeacon.cli.process_start", return_value=time.monotonic() - 5)
+        mock_resolve = mocker.patch("bluebeacon.resolver.resolve")
+        mock_resolve.side_effect = OSError("Could not resolve mc.internal")
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["--deadline", "0.9", str(config_file)])
+
+        assert result.exit_code == 2
+        mock_resolve.assert_called_once_with("mc.internal", 0.0)
+
+    def test_process_start(self) -> None:
+        """The start of the process should include the startup of pytest."""
+        assert time.monotonic() - cli.process_start() > 0.05
+
+
+class TestCliThrottling:
+    """Tests for allowing for the CPU quota of the container."""
+
+    @pytest.fixture(autouse=True)
+    def server(self, mocker: MockerFixture) -> None:
+        mock_find_config = mocker.patch("bluebeacon.detector.find_server_config")
+        mock_find_config.return_value = Path("/mock/path/server.properties")
+        mock_parse_config = mocker.patch("bluebeacon.detector.read_server_config")
+        mock_parse_config.return_value = detector.ServerConfig(
+            ipaddress.IPv4Address("127.0.0.1"), 25565, "ini"
         )
+
+    def test_timeout_scaled(self, mocker: MockerFixture, unthrottled: MockType) -> None:
+        """The timeout should be stretched by the share of time the CPU is starved."""
+        unthrottled.return_value = cgroup.CpuSample(0, 0, pressure=50.0)
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(True, "java", 0.001)
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["--json", "--timeout-max", "1"])
+
+        assert result.exit_code == 0
+        assert mock_ping.call_args.kwargs["timeout"] == 0.5
+        assert json.loads(result.output)["throttled"] is True
+
+    def test_scaled_timeout_bounded(
+        self, mocker: MockerFixture, unthrottled: MockType
+    ) -> None:
+        """The stretched timeout should stay within --timeout-max."""
+        unthrottled.return_value = cgroup.CpuSample(0, 0, pressure=75.0)
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(True, "java", 0.001)
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, [])
+
+        assert result.exit_code == 0
+        assert mock_ping.call_args.kwargs["timeout"] == cli.DEFAULT_TIMEOUT_MAX
+
+    def test_throttled_failure_deferred(
+        self, mocker: MockerFixture, unthrottled: MockType
+    ) -> None:
+        """A failure while throttled should only fail once the next check confirms it."""
+        unthrottled.side_effect = [
+            cgroup.CpuSample(nr_throttled, 0) for nr_throttled in [0, 1, 1, 2]
+        ]
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(False, error="timeout")
+
+        runner = CliRunner()
+        outputs = [runner.invoke(cli.main, ["--json"]) for _ in range(2)]
+
+        assert [output.exit_code for output in outputs] == [0, 1]
+        assert all(json.loads(output.output)["throttled"] for output in outputs)
+
+    def test_success_ends_throttled_streak(
+        self, mocker: MockerFixture, unthrottled: MockType
+    ) -> None:
+        """A success between two throttled failures should start the count over."""
+        unthrottled.side_effect = [
+            cgroup.CpuSample(nr_throttled, 0) for nr_throttled in [0, 1, 1, 1, 1, 2]
+        ]
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        down = ping.PingResult(False, error="timeout")
+        up = ping.PingResult(True, "java", 0.001)
+
+        runner = CliRunner()
+        exit_codes = []
+        for outcome in [down, up, down]:
+            mock_ping.return_value = outcome
+            exit_codes.append(runner.invoke(cli.main, []).exit_code)
+
+        assert exit_codes == [0, 0, 0]
+
+    def test_unthrottled_failure(
+        self, mocker: MockerFixture, unthrottled: MockType
+    ) -> None:
+        """Without throttling during the ping a failure should fail at once."""
+        unthrottled.return_value = cgroup.CpuSample(5, 1000, pressure=1.0)
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(False, error="timeout")
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["--json"])
+
+        assert result.exit_code == 1
+        assert json.loads(result.output)["throttled"] is False
+
+
+class TestCliEditionInference:
+    """Tests for pinging only the edition the server config belongs to."""
+
+    @pytest.fixture
+    def config_file(self, tmp_path: Path) -> Path:
+        """Create the server.properties of a Bedrock Dedicated Server."""
+        config_file = tmp_path / "server.properties"
+        config_file.write_text(
+            "server-name=Dedicated Server\nserver-port=19132\nserver-portv6=19133\n"
+        )
+        return config_file
+
+    def test_inferred(self, mocker: MockerFixture, config_file: Path) -> None:
+        """A Bedrock Dedicated Server should only be pinged as Bedrock."""
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(True, "bedrock", 0.001)
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["--no-listener-check", str(config_file)])
+
+        assert result.exit_code == 0
+        mock_ping.assert_called_once_with(
+            ipaddress.IPv4Address("127.0.0.1"),
+            19132,
+            "bedrock",
+            depth="status",
+            timeout=0.25,
+            query_port=None,
+            bedrock_port=None,
+            deadline=None,
+        )
+
+    @pytest.mark.parametrize("flag", ["java", "both"])
+    def test_flag_wins(
+        self, mocker: MockerFixture, config_file: Path, flag: str
+    ) -> None:
+        """An explicit edition flag should override the inferred edition."""
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(True, "java", 0.001)
+
+        runner = CliRunner()
+        runner.invoke(cli.main, [f"--{flag}", "--no-listener-check", str(config_file)])
+
+        assert mock_ping.call_args.args[2] == flag
+
+
+class TestCliGeyser:
+    """Tests for pinging Bedrock on the port of Geyser."""
+
+    @pytest.fixture
+    def config_file(self, tmp_path: Path) -> Path:
+        """Create a Paper server with Geyser listening on port 19133."""
+        config_file = tmp_path / "server.properties"
+        config_file.write_text("server-ip=127.0.0.1\nserver-port=25565\n")
+        geyser_config = tmp_path / "plugins" / "Geyser-Spigot" / "config.yml"
+        geyser_config.parent.mkdir(parents=True)
+        geyser_config.write_text("bedrock:\n  port: 19133\n")
+        return config_file
+
+    def test_bedrock_port(self, mocker: MockerFixture, config_file: Path) -> None:
+        """Bedrock should be pinged on the port from the Geyser config."""
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(True, "java", 0.001)
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, [str(config_file)])
+
+        assert result.exit_code == 0
+        mock_ping.assert_called_once_with(
+            ipaddress.IPv4Address("127.0.0.1"),
+            25565,
+            "both",
+            depth="status",
+            timeout=0.25,
+            query_port=None,
+            bedrock_port=19133,
+            deadline=None,
+        )
+
+    def test_java_only(self, mocker: MockerFixture, config_file: Path) -> None:
+        """The Geyser config should not be read if Bedrock isn't pinged."""
+        mock_parse = mocker.patch("bluebeacon.detector.parse_geyser_config")
+        mocker.patch("bluebeacon.ping.probe_server").return_value = ping.PingResult(
+            True, "java", 0.001
+        )
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["--java", str(config_file)])
+
+        assert result.exit_code == 0
+        mock_parse.assert_not_called()
+
+    def test_cached(self, mocker: MockerFixture, config_file: Path) -> None:
+        """The Geyser config should only be parsed again once it changes."""
+        parse = mocker.spy(detector, "parse_geyser_config")
+        mocker.patch("bluebeacon.ping.probe_server").return_value = ping.PingResult(
+            True, "java", 0.001
+        )
+
+        runner = CliRunner()
+        runner.invoke(cli.main, [str(config_file)])
+        result = runner.invoke(cli.main, [str(config_file)])
+
+        assert result.exit_code == 0
+        assert parse.call_count == 1
+
+    def test_invalid(self, mocker: MockerFixture, config_file: Path) -> None:
+        """An unreadable Geyser config should be an error."""
+        geyser_config = config_file.parent / "plugins" / "Geyser-Spigot" / "config.yml"
+        geyser_config.write_text("bedrock:\n  port: bedrock\n")
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, [str(config_file)])
+
+        assert result.exit_code == 2
+        assert "Could not read Geyser config" in result.output
+        mock_ping.assert_not_called()
+
+
+class TestCliServe:
+    """Tests for the serve command."""
+
+    def test_serve_resolves_config_once(
+        self, mocker: MockerFixture, tmp_path: Path
+    ) -> None:
+        mock_find_config = mocker.patch("bluebeacon.detector.find_server_config")
+        mock_find_config.return_value = Path("/mock/path/server.properties")
+        mock_parse_config = mocker.patch("bluebeacon.detector.read_server_config")
+        mock_parse_config.return_value = detector.ServerConfig(
+            ipaddress.IPv4Address("127.0.0.1"), 25565, "ini"
+        )
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(True)
+        mock_serve = mocker.patch("bluebeacon.daemon.serve")
+
+        socket_path = tmp_path / "bluebeacon.sock"
+        runner = CliRunner()
+        result = runner.invoke(
+            cli.main,
+            ["serve", "--java", "--socket", str(socket_path), "--interval", "2"],
+        )
+
+        assert result.exit_code == 0
+        mock_parse_config.assert_called_once_with(
+            Path("/mock/path/server.properties"), None
+        )
+        probe, called_socket_path, interval = mock_serve.call_args.args
+        assert called_socket_path == socket_path
+        assert interval == 2
+
+        # The probe handed to the daemon pings with the resolved settings
+        assert probe() is True
+        mock_ping.assert_called_once_with(
+            ipaddress.IPv4Address("127.0.0.1"),
+            25565,
+            "java",
+            depth="status",
+            timeout=0.25,
+            query_port=None,
+            bedrock_port=None,
+            deadline=None,
+        )
+
+    def test_serve_metrics(self, mocker: MockerFixture, tmp_path: Path) -> None:
+        mock_find_config = mocker.patch("bluebeacon.detector.find_server_config")
+        mock_find_config.return_value = Path("/mock/path/server.properties")
+        mock_parse_config = mocker.patch("bluebeacon.detector.read_server_config")
+        mock_parse_config.return_value = detector.ServerConfig(
+            ipaddress.IPv4Address("127.0.0.1"), 25565, "ini"
+        )
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(True, "java", 0.002)
+        mock_start = mocker.patch("bluebeacon.metrics.start_server")
+        mock_serve = mocker.patch("bluebeacon.daemon.serve")
+
+        runner = CliRunner()
+        result = runner.invoke(
+            cli.main,
+            ["serve", "--socket", str(tmp_path / "s"), "--metrics-port", "9225"],
+        )
+
+        assert result.exit_code == 0
+        address, metrics = mock_start.call_args.args
+        assert address == ("0.0.0.0", 9225)
+
+        # Every probe of the daemon updates the exported metrics
+        probe = mock_serve.call_args.args[0]
+        assert probe() is True
+        assert b'bluebeacon_up{server="127.0.0.1:25565"} 1' in metrics.render()
+
+    def test_serve_metrics_port_in_use(
+        self, mocker: MockerFixture, tmp_path: Path
+    ) -> None:
+        mock_find_config = mocker.patch("bluebeacon.detector.find_server_config")
+        mock_find_config.return_value = Path("/mock/path/server.properties")
+        mock_parse_config = mocker.patch("bluebeacon.detector.read_server_config")
+        mock_parse_config.return_value = detector.ServerConfig(
+            ipaddress.IPv4Address("127.0.0.1"), 25565, "ini"
+        )
+        mock_start = mocker.patch("bluebeacon.metrics.start_server")
+        mock_start.side_effect = OSError("Address already in use")
+        mock_serve = mocker.patch("bluebeacon.daemon.serve")
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["serve", "--metrics-port", "9225"])
+
+        assert "Error: Cannot serve metrics on port 9225" in result.output
+        assert result.exit_code == 2
+        mock_serve.assert_not_called()
+
+    def test_serve_status_file(self, mocker: MockerFixture, tmp_path: Path) -> None:
+        mock_find_config = mocker.patch("bluebeacon.detector.find_server_config")
+        mock_find_config.return_value = Path("/mock/path/server.properties")
+        mock_parse_config = mocker.patch("bluebeacon.detector.read_server_config")
+        mock_parse_config.return_value = detector.ServerConfig(
+            ipaddress.IPv4Address("127.0.0.1"), 25565, "ini"
+        )
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(True, "java", 0.002)
+        mock_serve = mocker.patch("bluebeacon.daemon.serve")
+        status_file = tmp_path / "bluebeacon.status"
+
+        runner = CliRunner()
+        result = runner.invoke(
+            cli.main,
+            [
+                "serve",
+                "--socket",
+                str(tmp_path / "s"),
+                "--status-file",
+                str(status_file),
+            ],
+        )
+
+        assert result.exit_code == 0
+        assert statusfile.read_status_file(status_file) is None
+
+        # Every probe of the daemon updates the status file
+        probe = mock_serve.call_args.args[0]
+        assert probe() is True
+        record = statusfile.read_status_file(status_file)
+        assert record is not None
+        assert (record.success, record.latency) == (True, 0.002)
+
+    def test_serve_probe_error(self, mocker: MockerFixture, tmp_path: Path) -> None:
+        """A probe that raises should publish a failure before the error."""
+        mock_find_config = mocker.patch("bluebeacon.detector.find_server_config")
+        mock_find_config.return_value = Path("/mock/path/server.properties")
+        mock_parse_config = mocker.patch("bluebeacon.detector.read_server_config")
+        mock_parse_config.return_value = detector.ServerConfig(
+            ipaddress.IPv4Address("127.0.0.1"), 25565, "ini"
+        )
+        mocker.patch("bluebeacon.ping.probe_server").side_effect = RuntimeError("bug")
+        mock_serve = mocker.patch("bluebeacon.daemon.serve")
+        status_file = tmp_path / "bluebeacon.status"
+
+        runner = CliRunner()
+        result = runner.invoke(
+            cli.main,
+            [
+                "serve",
+                "--socket",
+                str(tmp_path / "s"),
+                "--status-file",
+                str(status_file),
+            ],
+        )
+        assert result.exit_code == 0
+
+        probe = mock_serve.call_args.args[0]
+        with pytest.raises(RuntimeError):
+            probe()
+        record = statusfile.read_status_file(status_file)
+        assert record is not None
+        assert (record.success, record.error) == (False, "error")
+
+    def test_serve_status_file_unwritable(
+        self, mocker: MockerFixture, tmp_path: Path
+    ) -> None:
+        mock_find_config = mocker.patch("bluebeacon.detector.find_server_config")
+        mock_find_config.return_value = Path("/mock/path/server.properties")
+        mock_parse_config = mocker.patch("bluebeacon.detector.read_server_config")
+        mock_parse_config.return_value = detector.ServerConfig(
+            ipaddress.IPv4Address("127.0.0.1"), 25565, "ini"
+        )
+        mock_serve = mocker.patch("bluebeacon.daemon.serve")
+        status_file = tmp_path / "missing" / "bluebeacon.status"
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["serve", "--status-file", str(status_file)])
+
+        assert f"Error: Cannot create status file {status_file}" in result.output
+        assert result.exit_code == 2
+        mock_serve.assert_not_called()
+
+    def test_serve_config_not_found(self, mocker: MockerFixture) -> None:
+        mock_find_config = mocker.patch("bluebeacon.detector.find_server_config")
+        mock_find_config.side_effect = FileNotFoundError("Invalid path")
+        mock_serve = mocker.patch("bluebeacon.daemon.serve")
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["serve"])
+
+        assert "Error: Invalid path" in result.output
+        assert result.exit_code == 2
+        mock_serve.assert_not_called()
+
+
+class TestCliFleet:
+    """Tests for the fleet command."""
+
+    @pytest.fixture
+    def fleet_root(self, tmp_path: Path) -> Path:
+        root = tmp_path / "volumes"
+        for name, port in [("a", 25565), ("b", 25566)]:
+            (root / name).mkdir(parents=True)
+            (root / name / "server.properties").write_text(
+                f"server-ip=127.0.0.1\nserver-port={port}\n"
+            )
+        return root
+
+    def test_fleet_all_up(self, mocker: MockerFixture, fleet_root: Path) -> None:
+        mock_ping = mocker.patch("bluebeacon.ping.async_probe_server")
+        mock_ping.return_value = ping.PingResult(True, "java", 0.001)
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["fleet", "--java", str(fleet_root)])
+
+        assert result.exit_code == 0
+        assert result.output.splitlines() == [
+            f"{fleet_root / 'a'}\t127.0.0.1:25565\tup (1.0 ms)",
+            f"{fleet_root / 'b'}\t127.0.0.1:25566\tup (1.0 ms)",
+        ]
+        assert mock_ping.call_count == 2
+
+    def test_fleet_server_down(self, mocker: MockerFixture, fleet_root: Path) -> None:
+        mock_ping = mocker.patch("bluebeacon.ping.async_probe_server")
+        mock_ping.side_effect = [
+            ping.PingResult(True, "java", 0.001),
+            ping.PingResult(False, error="refused"),
+        ]
+
+        runner = CliRunner()
+        result = runner.invoke(
+            cli.main, ["fleet", "--concurrency", "1", str(fleet_root)]
+        )
+
+        assert result.exit_code == 1
+        assert result.output.splitlines()[1].endswith("\tdown (refused)")
+
+    def test_fleet_config_error(self, mocker: MockerFixture, fleet_root: Path) -> None:
+        mock_ping = mocker.patch("bluebeacon.ping.async_probe_server")
+        mock_ping.return_value = ping.PingResult(False, error="timeout")
+        (fleet_root / "c").mkdir()
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["fleet", str(fleet_root)])
+
+        assert result.exit_code == 2
+        assert result.output.splitlines()[2].startswith(
+            f"{fleet_root / 'c'}\t-\terror: No valid server configuration found"
+        )
+        assert mock_ping.call_count == 2
+
+    def test_fleet_no_servers(self, tmp_path: Path) -> None:
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["fleet", str(tmp_path / "*")])
+
+        assert result.exit_code == 2
+        assert "Error: No servers found" in result.output
+
+    def test_fleet_missing_root(self, tmp_path: Path) -> None:
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["fleet", str(tmp_path / "missing")])
+
+        assert result.exit_code == 2
+        assert result.output.startswith("Error: ")
+
+
+class TestCliStats:
+    """Tests for the stats command."""
+
+    @pytest.fixture(autouse=True)
+    def server(self, mocker: MockerFixture) -> None:
+        mock_find_config = mocker.patch("bluebeacon.detector.find_server_config")
+        mock_find_config.return_value = Path("/mock/path/server.properties")
+        mock_parse_config = mocker.patch("bluebeacon.detector.read_server_config")
+        mock_parse_config.return_value = detector.ServerConfig(
+            ipaddress.IPv4Address("127.0.0.1"), 25565, "ini"
+        )
+
+    def test_stats_of_checks(self, mocker: MockerFixture) -> None:
+        """Every check should be recorded and summarized."""
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        runner = CliRunner()
+        for outcome in [
+            ping.PingResult(True, "java", 0.001),
+            ping.PingResult(True, "java", 0.003),
+            ping.PingResult(False, error="timeout"),
+        ]:
+            mock_ping.return_value = outcome
+            runner.invoke(cli.main, ["--java"])
+
+        result = runner.invoke(cli.main, ["stats"])
+
+        assert result.exit_code == 0
+        lines = result.output.splitlines()
+        assert lines[0] == "server\t127.0.0.1:25565"
+        assert lines[1].startswith("checks\t3 over ")
+        assert lines[2:] == [
+            "success\t66.7%",
+            "p50\t1.0 ms",
+            "p95\t3.0 ms",
+            "p99\t3.0 ms",
+            "errors\ttimeout 1",
+        ]
+
+    def test_stats_not_listening(self, unknown_listeners: MockType) -> None:
+        """Checks failing the listener check should be recorded too."""
+        unknown_listeners.return_value = False
+
+        runner = CliRunner()
+        runner.invoke(cli.main, [])
+        result = runner.invoke(cli.main, ["stats", "--json"])
+
+        stats = json.loads(result.output)
+        assert stats["checks"] == 1
+        assert stats["errors"] == {"not listening": 1}
+
+    def test_stats_json(self, mocker: MockerFixture) -> None:
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(True, "java", 0.0025)
+
+        runner = CliRunner()
+        runner.invoke(cli.main, ["--java"])
+        result = runner.invoke(cli.main, ["stats", "--json"])
+
+        assert result.exit_code == 0
+        stats = json.loads(result.output)
+        assert stats["checks"] == 1
+        assert stats["success_rate"] == 1.0
+        assert stats["p50_ms"] == stats["p99_ms"] == 2.5
+        assert stats["errors"] == {}
+
+    def test_stats_without_checks(self) -> None:
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["stats"])
+
+        assert result.exit_code == 0
+        assert result.output == "server\t127.0.0.1:25565\nchecks\t0\n"
+
+    def test_stats_config_not_found(self, mocker: MockerFixture) -> None:
+        mock_find_config = mocker.patch("bluebeacon.detector.find_server_config")
+        mock_find_config.side_effect = FileNotFoundError("Invalid path")
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["stats"])
+
+        assert "Error: Invalid path" in result.output
+        assert result.exit_code == 2
+
+
+class TestCliClient:
+    """Tests for the client command."""
+
+    def test_client_success(self, mocker: MockerFixture) -> None:
+        mock_read = mocker.patch("bluebeacon.daemon.read_status")
+        mock_read.return_value = (True, time.time())
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["client", "--socket", "/mock/bb.sock"])
+
+        assert result.exit_code == 0
+        mock_read.assert_called_once_with(Path("/mock/bb.sock"))
+
+    def test_client_server_unreachable(self, mocker: MockerFixture) -> None:
+        mock_read = mocker.patch("bluebeacon.daemon.read_status")
+        mock_read.return_value = (False, time.time())
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["client"])
+
+        assert result.exit_code == 1
+
+    def test_client_no_result_yet(self, mocker: MockerFixture) -> None:
+        mock_read = mocker.patch("bluebeacon.daemon.read_status")
+        mock_read.return_value = None
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["client"])
+
+        assert result.exit_code == 1
+
+    def test_client_stale_result(self, mocker: MockerFixture) -> None:
+        mock_read = mocker.patch("bluebeacon.daemon.read_status")
+        mock_read.return_value = (True, time.time() - 60)
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["client", "--max-age", "30"])
+
+        assert result.exit_code == 1
+
+    @pytest.mark.parametrize(
+        "success, age, exit_code", [(True, 0, 0), (False, 0, 1), (True, 60, 1)]
+    )
+    def test_client_status_file(
+        self,
+        mocker: MockerFixture,
+        tmp_path: Path,
+        success: bool,
+        age: float,
+        exit_code: int,
+    ) -> None:
+        mock_read = mocker.patch("bluebeacon.daemon.read_status")
+        writer = statusfile.StatusFileWriter(tmp_path / "bluebeacon.status")
+        writer.publish(ping.PingResult(success), timestamp=time.time() - age)
+        writer.close()
+
+        runner = CliRunner()
+        result = runner.invoke(
+            cli.main, ["client", "--status-file", str(writer.path), "--max-age", "30"]
+        )
+
+        assert result.exit_code == exit_code
+        mock_read.assert_not_called()
+
+    def test_client_status_file_no_result_yet(self, tmp_path: Path) -> None:
+        writer = statusfile.StatusFileWriter(tmp_path / "bluebeacon.status")
+        writer.close()
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["client", "--status-file", str(writer.path)])
+
+        assert result.exit_code == 1
+
+    def test_client_status_file_missing(self, tmp_path: Path) -> None:
+        runner = CliRunner()
+        result = runner.invoke(
+            cli.main, ["client", "--status-file", str(tmp_path / "missing")]
+        )
+
+        assert "Error:" in result.output
+        assert result.exit_code == 2
+
+    def test_client_prober_not_running(self, mocker: MockerFixture) -> None:
+        mock_read = mocker.patch("bluebeacon.daemon.read_status")
+        mock_read.side_effect = FileNotFoundError("No such file or directory")
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["client"])
+
+        assert "Error: No such file or directory" in result.output
+        assert result.exit_code == 2
+
+
+class TestCliConfigCache:
+    """Tests for caching the parsed server config."""
+
+    @pytest.fixture(autouse=True)
+    def runtime_dir(self, monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+        directory = tmp_path / "runtime"
+        directory.mkdir()
+        monkeypatch.setenv("XDG_RUNTIME_DIR", str(directory))
+        return directory
+
+    @pytest.fixture
+    def config_file(self, tmp_path: Path) -> Path:
+        path = tmp_path / "server.properties"
+        path.write_text("server-ip=127.0.0.1\nserver-port=25565\n")
+        return path
+
+    def test_second_check_skips_parsing(
+        self, mocker: MockerFixture, config_file: Path
+    ) -> None:
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(True)
+        spy_parse = mocker.spy(detector, "read_server_config")
+
+        runner = CliRunner()
+        first = runner.invoke(cli.main, [str(config_file)])
+        second = runner.invoke(cli.main, [str(config_file)])
+
+        assert first.exit_code == 0
+        assert second.exit_code == 0
+        spy_parse.assert_called_once_with(config_file, None)
+        assert mock_ping.call_count == 2
+        mock_ping.assert_called_with(
+            ipaddress.IPv4Address("127.0.0.1"),
+            25565,
+            "java",
+            depth="status",
+            timeout=0.25,
+            query_port=None,
+            bedrock_port=None,
+            deadline=None,
+        )
+
+    def test_changed_config_is_parsed_again(
+        self, mocker: MockerFixture, config_file: Path
+    ) -> None:
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(True)
+
+        runner = CliRunner()
+        runner.invoke(cli.main, [str(config_file)])
+        config_file.write_text("server-ip=127.0.0.1\nserver-port=25566\n")
+        result = runner.invoke(cli.main, [str(config_file)])
+
+        assert result.exit_code == 0
+        mock_ping.assert_called_with(
+            ipaddress.IPv4Address("127.0.0.1"),
+            25566,
+            "java",
+            depth="status",
+            timeout=0.25,
+            query_port=None,
+            bedrock_port=None,
+            deadline=None,
+        )
+
+    def test_host_name_resolved_again(
+        self, mocker: MockerFixture, tmp_path: Path
+    ) -> None:
+        """A cached proxy config should still follow its host name to a new address."""
+        config_file = tmp_path / "velocity.toml"
+        config_file.write_text('bind = "mc.internal:25577"\n')
+        mock_resolve = mocker.patch("bluebeacon.resolver.resolve")
+        mock_resolve.side_effect = [
+            ipaddress.IPv4Address("10.0.0.5"),
+            ipaddress.IPv4Address("10.0.0.6"),
+        ]
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+        mock_ping.return_value = ping.PingResult(True)
+        spy_parse = mocker.spy(detector, "read_server_config")
+
+        runner = CliRunner()
+        runner.invoke(cli.main, ["--no-listener-check", str(config_file)])
+        result = runner.invoke(cli.main, ["--no-listener-check", str(config_file)])
+
+        assert result.exit_code == 0
+        spy_parse.assert_called_once_with(config_file, None)
+        assert mock_ping.call_args.args[:2] == (
+            ipaddress.IPv4Address("10.0.0.6"),
+            25577,
+        )
+
+    def test_host_name_unresolvable(
+        self, mocker: MockerFixture, tmp_path: Path
+    ) -> None:
+        """A host name that can't be resolved should be an error."""
+        config_file = tmp_path / "velocity.toml"
+        config_file.write_text('bind = "mc.internal:25577"\n')
+        mocker.patch("bluebeacon.resolver.resolve").side_effect = OSError(
+            "Could not resolve mc.internal"
+        )
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, [str(config_file)])
+
+        assert result.exit_code == 2
+        assert "Could not resolve mc.internal" in result.output
+        mock_ping.assert_not_called()
+
+    def test_precompute(
+        self, mocker: MockerFixture, config_file: Path, runtime_dir: Path
+    ) -> None:
+        mock_ping = mocker.patch("bluebeacon.ping.probe_server")
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["--precompute", str(config_file)])
+
+        assert result.exit_code == 0
+        mock_ping.assert_not_called()
+        assert len(list(runtime_dir.glob("*.cache"))) == 1
+
+    def test_precompute_unwritable_cache(
+        self,
+        mocker: MockerFixture,
+        config_file: Path,
+        monkeypatch: pytest.MonkeyPatch,
+        tmp_path: Path,
+    ) -> None:
+        monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path / "missing"))
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["--precompute", str(config_file)])
+
+        assert "Error: Could not write config cache" in result.output
+        assert result.exit_code == 2
+
+    def test_precompute_invalid_config(
+        self, mocker: MockerFixture, config_file: Path
+    ) -> None:
+        config_file.write_text("motd=A Minecraft Server\n")
+
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ["--precompute", str(config_file)])
+
+        assert "Error: Unsupported server config file format" in result.output
+        assert result.exit_code == 2
@@ -0,0 +1,162 @@
+"""Tests for the daemon module."""
+
+import threading
+from pathlib import Path
+from typing import Iterator, Tuple
+
+import pytest
+
+from bluebeacon.daemon import Prober, StatusServer, default_socket_path, read_status
+
+
+@pytest.fixture
+def status_server(tmp_path: Path) -> Iterator[Tuple[StatusServer, Prober]]:
+    """Run a StatusServer with a controllable prober in a background thread."""
+    prober = Prober(lambda: True, interval=60)
+    server = StatusServer(tmp_path / "bluebeacon.sock", prober)
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+
+    yield server, prober
+
+    server.shutdown()
+    server.server_close()
+    thread.join(timeout=1)
+
+
+class TestDefaultSocketPath:
+    """Tests for the default_socket_path function."""
+
+    def test_uses_xdg_runtime_dir(
+        self, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+    ) -> None:
+        """$XDG_RUNTIME_DIR should be preferred when it is set."""
+        monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+        assert default_socket_path() == tmp_path / "bluebeacon.sock"
+
+    def test_falls_back_to_tempdir(
+        self, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+    ) -> None:
+        """The temporary directory should be used without $XDG_RUNTIME_DIR."""
+        monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+        monkeypatch.setattr("tempfile.gettempdir", lambda: str(tmp_path))
+        assert default_socket_path() == tmp_path / "bluebeacon.sock"
+
+
+class TestProber:
+    """Tests for the Prober class."""
+
+    def test_no_result_before_first_probe(self) -> None:
+        """A fresh prober should not report any result."""
+        prober = Prober(lambda: True, interval=5)
+        assert prober.result is None
+
+    @pytest.mark.parametrize("outcome", [True, False])
+    def test_run_once_stores_result(self, outcome: bool) -> None:
+        """run_once should store the outcome together with a timestamp."""
+        prober = Prober(lambda: outcome, interval=5)
+
+        assert prober.run_once() is outcome
+
+        assert prober.result is not None
+        success, timestamp = prober.result
+        assert success is outcome
+        assert timestamp > 0
+
+    def test_probe_error_is_failure(self, capsys: pytest.CaptureFixture[str]) -> None:
+        """An exception in the probe should count as a failure and be reported."""
+
+        def probe() -> bool:
+            raise OSError("Could not resolve mc.internal")
+
+        prober = Prober(probe, interval=5)
+
+        assert prober.run_once() is False
+        assert prober.result is not None
+        assert prober.result[0] is False
+        assert "Could not resolve mc.internal" in capsys.readouterr().err
+
+    def test_run_survives_probe_error(self) -> None:
+        """run should keep probing after a probe raised."""
+        stop = threading.Event()
+        calls: list[int] = []
+
+        def probe() -> bool:
+            calls.append(1)
+            if len(calls) == 3:
+                stop.set()
+            raise RuntimeError("corrupt history")
+
+        Prober(probe, interval=0).run(stop)
+
+        assert len(calls) == 3
+
+    def test_run_stops_when_event_is_set(self) -> None:
+        """run should keep probing until the stop event is set."""
+        stop = threading.Event()
+        calls: list[int] = []
+
+        def probe() -> bool:
+            calls.append(1)
+            if len(calls) == 3:
+                stop.set()
+            return True
+
+        Prober(probe, interval=0).run(stop)
+
+        assert len(calls) == 3
+
+
+class TestStatusServer:
+    """Tests for the StatusServer class together with read_status."""
+
+    def test_read_status_before_first_probe(
+        self, status_server: Tuple[StatusServer, Prober]
+    ) -> None:
+        """Without a completed probe read_status should return None."""
+        server, _ = status_server
+        assert read_status(server.socket_path) is None
+
+    def test_read_status_success(
+        self, status_server: Tuple[StatusServer, Prober]
+    ) -> None:
+        """read_status should return the latest result of the prober."""
+        server, prober = status_server
+        prober.run_once()
+        assert prober.result is not None
+
+        result = read_status(server.socket_path)
+
+        assert result is not None
+        assert result[0] is True
+        assert result[1] == pytest.approx(prober.result[1], abs=0.001)
+
+    def test_read_status_failure(
+        self, status_server: Tuple[StatusServer, Prober]
+    ) -> None:
+        """A failed probe should be reported as such."""
+        server, _ = status_server
+        server.prober = Prober(lambda: False, interval=5)
+        server.prober.run_once()
+
+        result = read_status(server.socket_path)
+
+        assert result is not None
+        assert result[0] is False
+
+    def test_replaces_stale_socket(self, tmp_path: Path) -> None:
+        """A socket file left behind by a previous run should be replaced."""
+        socket_path = tmp_path / "bluebeacon.sock"
+        socket_path.touch()
+
+        server = StatusServer(socket_path, Prober(lambda: True, interval=5))
+        server.server_close()
+
+        assert not socket_path.exists()
+
+    def test_read_status_no_server(self, tmp_path: Path) -> None:
+        """read_status should raise OSError when no prober is listening."""
+        with pytest.raises(OSError):
+            read_status(tmp_path / "missing.sock")
@@ -0,0 +1,95 @@
+"""Tests for the damping module."""
+
+import ipaddress
+from pathlib import Path
+
+import pytest
+
+from bluebeacon.damping import MAX_FAILURES, FailureStreak
+
+LOCALHOST = ipaddress.IPv4Address("127.0.0.1")
+
+
+@pytest.fixture(autouse=True)
+def runtime_dir(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    """Keep streak files inside a temporary runtime directory."""
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    return tmp_path
+
+
+class TestFailureStreak:
+    """Tests for the FailureStreak class."""
+
+    def test_consecutive_failures(self) -> None:
+        """Failures should add up until a check succeeds."""
+        streak = FailureStreak.for_server(LOCALHOST, 25565)
+
+        assert streak.record(False, 60, now=100) == 1
+        assert streak.record(False, 60, now=105) == 2
+        assert streak.record(True, 60, now=110) == 0
+        assert streak.record(False, 60, now=115) == 1
+
+    def test_window(self) -> None:
+        """Failures older than the window should be forgotten."""
+        streak = FailureStreak.for_server(LOCALHOST, 25565)
+
+        streak.record(False, 10, now=100)
+        streak.record(False, 10, now=105)
+
+        assert streak.record(False, 10, now=112) == 2
+        assert streak.record(False, 10, now=200) == 1
+
+    def test_kept_between_runs(self) -> None:
+        """The streak should be saved and loaded again."""
+        streak = FailureStreak.for_server(LOCALHOST, 25565)
+        streak.record(False, 60, now=100)
+        streak.save()
+
+        streak = FailureStreak.for_server(LOCALHOST, 25565)
+
+        assert streak.record(False, 60, now=105) == 2
+
+    def test_separate_servers(self) -> None:
+        """Every server should have its own streak."""
+        streak = FailureStreak.for_server(LOCALHOST, 25565)
+        streak.record(False, 60, now=100)
+        streak.save()
+
+        other = FailureStreak.for_server(LOCALHOST, 25566)
+
+        assert other.record(False, 60, now=105) == 1
+
+    def test_success_writes_nothing(self) -> None:
+        """Successes without a streak to end should not touch the disk."""
+        streak = FailureStreak.for_server(LOCALHOST, 25565)
+        streak.record(True, 60)
+        streak.save()
+
+        assert not streak.path.exists()
+
+    def test_success_clears_file(self) -> None:
+        """A success should end a saved streak."""
+        streak = FailureStreak.for_server(LOCALHOST, 25565)
+        streak.record(False, 60, now=100)
+        streak.save()
+        streak.record(True, 60, now=105)
+        streak.save()
+
+        assert streak.path.read_bytes() == b""
+
+    def test_bounded(self) -> None:
+        """The streak should keep at most MAX_FAILURES failures."""
+        streak = FailureStreak.for_server(LOCALHOST, 25565)
+        for i in range(MAX_FAILURES + 10):
+            count = streak.record(False, 3600, now=100 + i)
+
+        assert count == MAX_FAILURES
+
+    def test_load_corrupt(self) -> None:
+        """A file that isn't a whole number of doubles should be ignored."""
+        path = FailureStreak.for_server(LOCALHOST, 25565).path
+        path.write_bytes(b"\x00" * 7)
+
+        streak = FailureStreak.for_server(LOCALHOST, 25565)
+
+        assert streak.record(False, 60) == 1
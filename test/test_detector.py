@@ -2,20 +2,29 @@
 
 import ipaddress
 from pathlib import Path
-from typing import Callable
-from unittest.mock import mock_open, patch
+from typing import Callable, Iterator, Optional
+from unittest.mock import DEFAULT, MagicMock, mock_open, patch
 
 import pytest
+from pytest_mock import MockerFixture
 
 # noinspection PyProtectedMember
 # For testing purposes
 from bluebeacon.detector import (
+    GeyserConfig,
+    _guess_config_format,
     _parse_ini_config,
     _parse_toml_config,
     _parse_yaml_config,
+    find_geyser_config,
     find_server_config,
+    parse_geyser_config,
+    parse_proxy_backends,
+    parse_query_port,
     parse_server_config,
+    read_server_config,
 )
+from bluebeacon.resolver import RESOLVE_TIMEOUT
 
 
 @pytest.fixture
@@ -124,10 +133,7 @@ class TestParseIniConfig:
     def test_parse_valid_ini_config(self) -> None:
         """Test parsing a valid INI config file."""
         config_content = "server-ip=192.168.1.10\nserver-port=25565"
-        mock_file = mock_open(read_data=config_content)
-
-        with patch("pathlib.Path.open", mock_file):
-            result = _parse_ini_config(Path("server.properties"))
+        result = _parse_ini_config(config_content.encode())
 
         assert result is not None
         ip, port = result
@@ -137,23 +143,41 @@ class TestParseIniConfig:
     def test_parse_ini_config_ipv6(self) -> None:
         """Test parsing an INI config file with IPv6 address."""
         config_content = "server-ip=2001:db8::1\nserver-port=25565"
-        mock_file = mock_open(read_data=config_content)
-
-        with patch("pathlib.Path.open", mock_file):
-            result = _parse_ini_config(Path("server.properties"))
+        result = _parse_ini_config(config_content.encode())
 
         assert result is not None
         ip, port = result
         assert ip == ipaddress.IPv6Address("2001:db8::1")
         assert port == 25565
 
+    def test_parse_ini_config_empty_ip(self) -> None:
+        """An empty server-ip, the default of Java servers, should be the wildcard."""
+        result = _parse_ini_config(b"server-ip=\nserver-port=25565\n")
+
+        assert result == (ipaddress.IPv4Address("0.0.0.0"), 25565)
+
+    @pytest.mark.parametrize(
+        "config_content, port",
+        [
+            (
+                "server-name=Dedicated Server\nserver-port=19134\nserver-portv6=19135",
+                19134,
+            ),
+            ("server-name=Dedicated Server\nserver-portv6=19133", 19132),
+        ],
+    )
+    def test_parse_ini_bedrock_dedicated_server(
+        self, config_content: str, port: int
+    ) -> None:
+        """Bedrock Dedicated Server has no server-ip and listens on every address."""
+        result = _parse_ini_config(config_content.encode())
+
+        assert result == (ipaddress.IPv4Address("0.0.0.0"), port)
+
     def test_parse_ini_missing_fields(self) -> None:
         """Test parsing an INI file with missing fields."""
         config_content = "server-name=MyServer\ndifficulty=hard"
-        mock_file = mock_open(read_data=config_content)
-
-        with patch("pathlib.Path.open", mock_file):
-            result = _parse_ini_config(Path("server.properties"))
+        result = _parse_ini_config(config_content.encode())
 
         assert result is None
 
@@ -161,10 +185,7 @@ class TestParseIniConfig:
         """Test parsing an invalid INI file."""
         # Create invalid content that will cause javaproperties to raise an exception
         config_content = "server-ip=192.168.1.10\\uXYZ"  # Invalid unicode escape
-        mock_file = mock_open(read_data=config_content)
-
-        with patch("pathlib.Path.open", mock_file):
-            result = _parse_ini_config(Path("server.properties"))
+        result = _parse_ini_config(config_content.encode())
 
         assert result is None
 
@@ -179,10 +200,7 @@ class TestParseYamlConfig:
           - host: 192.168.1.20:25566
             motd: My Minecraft Server
         """
-        mock_file = mock_open(read_data=config_content)
-
-        with patch("pathlib.Path.open", mock_file):
-            result = _parse_yaml_config(Path("config.yml"))
+        result = _parse_yaml_config(config_content.encode())
 
         assert result is not None
         ip, port = result
@@ -196,26 +214,27 @@ class TestParseYamlConfig:
           - host: '[2001:db8::1]:25566'
             motd: My Minecraft Server
         """
-        mock_file = mock_open(read_data=config_content)
-
-        with patch("pathlib.Path.open", mock_file):
-            result = _parse_yaml_config(Path("config.yml"))
+        result = _parse_yaml_config(config_content.encode())
 
         assert result is not None
         ip, port = result
         assert ip == ipaddress.IPv6Address("2001:db8::1")
         assert port == 25566
 
+    def test_parse_yaml_config_host_name(self) -> None:
+        """A listener on a host name should keep the name for resolving."""
+        config_content = "listeners:\n  - host: mc.internal:25565\n"
+        result = _parse_yaml_config(config_content.encode())
+
+        assert result == ("mc.internal", 25565)
+
     def test_parse_yaml_missing_fields(self) -> None:
         """Test parsing a YAML file with missing fields."""
         config_content = """
         motd: My Minecraft Server
         max-players: 20
         """
-        mock_file = mock_open(read_data=config_content)
-
-        with patch("pathlib.Path.open", mock_file):
-            result = _parse_yaml_config(Path("config.yml"))
+        result = _parse_yaml_config(config_content.encode())
 
         assert result is None
 
@@ -227,10 +246,7 @@ class TestParseYamlConfig:
           - host: 192.168.1.20:25566
             - invalid indentation
         """
-        mock_file = mock_open(read_data=config_content)
-
-        with patch("pathlib.Path.open", mock_file):
-            result = _parse_yaml_config(Path("config.yml"))
+        result = _parse_yaml_config(config_content.encode())
 
         assert result is None
 
@@ -244,10 +260,7 @@ class TestParseTomlConfig:
         bind = "192.168.1.30:25567"
         motd = "My Velocity Server"
         """
-        mock_file = mock_open(read_data=config_content.encode())
-
-        with patch("pathlib.Path.open", mock_file):
-            result = _parse_toml_config(Path("velocity.toml"))
+        result = _parse_toml_config(config_content.encode())
 
         assert result is not None
         ip, port = result
@@ -260,26 +273,32 @@ class TestParseTomlConfig:
         bind = "[2001:db8::1]:25567"
         motd = "My Velocity Server"
         """
-        mock_file = mock_open(read_data=config_content.encode())
-
-        with patch("pathlib.Path.open", mock_file):
-            result = _parse_toml_config(Path("velocity.toml"))
+        result = _parse_toml_config(config_content.encode())
 
         assert result is not None
         ip, port = result
         assert ip == ipaddress.IPv6Address("2001:db8::1")
         assert port == 25567
 
+    @pytest.mark.parametrize("host", ["localhost", "minecraft_proxy", "mc.internal."])
+    def test_parse_toml_config_host_name(self, host: str) -> None:
+        """Host names, including Docker container names, should be accepted."""
+        result = _parse_toml_config(f'bind = "{host}:25577"'.encode())
+
+        assert result == (host, 25577)
+
+    def test_parse_toml_config_invalid_host(self) -> None:
+        """A host that is neither an address nor a host name should be rejected."""
+        with pytest.raises(ValueError, match="Invalid host"):
+            _parse_toml_config(b'bind = "mc server:25577"')
+
     def test_parse_toml_missing_fields(self) -> None:
         """Test parsing a TOML file with missing fields."""
         config_content = """
         motd = "My Velocity Server"
         player-limit = 100
         """
-        mock_file = mock_open(read_data=config_content.encode())
-
-        with patch("pathlib.Path.open", mock_file):
-            result = _parse_toml_config(Path("velocity.toml"))
+        result = _parse_toml_config(config_content.encode())
 
         assert result is None
 
@@ -290,10 +309,7 @@ class TestParseTomlConfig:
         bind = "192.168.1.30:25567"
         motd = "My Velocity Server
         """  # Missing closing quote
-        mock_file = mock_open(read_data=config_content.encode())
-
-        with patch("pathlib.Path.open", mock_file):
-            result = _parse_toml_config(Path("velocity.toml"))
+        result = _parse_toml_config(config_content.encode())
 
         assert result is None
 
@@ -301,16 +317,23 @@ class TestParseTomlConfig:
 class TestParseServerConfig:
     """Tests for the parse_server_config function."""
 
+    @pytest.fixture(autouse=True)
+    def mock_config_file(self) -> Iterator[MagicMock]:
+        """Provide empty contents for config files that only exist in name."""
+        mock_file = mock_open(read_data=b"")
+        with patch("pathlib.Path.open", mock_file):
+            yield mock_file
+
     def test_parse_ini_config(self) -> None:
         """Test parsing a server.properties file."""
         config_file = Path("server.properties")
         expected_result = (ipaddress.ip_address("192.168.1.10"), 25565)
 
-        with patch("bluebeacon.detector._parse_ini_config") as mock_ini:
+        with patch("bluebeacon.detector._ini_address") as mock_ini:
             mock_ini.return_value = expected_result
-            with patch("bluebeacon.detector._parse_yaml_config") as mock_yaml:
+            with patch("bluebeacon.detector._yaml_address") as mock_yaml:
                 mock_yaml.return_value = None
-                with patch("bluebeacon.detector._parse_toml_config") as mock_toml:
+                with patch("bluebeacon.detector._toml_address") as mock_toml:
                     mock_toml.return_value = None
                     result = parse_server_config(config_file)
 
@@ -322,11 +345,11 @@ class TestParseServerConfig:
         ip_addr = ipaddress.IPv4Address("192.168.1.20")
         expected_result = (ip_addr, 25566)
 
-        with patch("bluebeacon.detector._parse_ini_config") as mock_ini:
+        with patch("bluebeacon.detector._ini_address") as mock_ini:
             mock_ini.return_value = None
-            with patch("bluebeacon.detector._parse_yaml_config") as mock_yaml:
+            with patch("bluebeacon.detector._yaml_address") as mock_yaml:
                 mock_yaml.return_value = expected_result
-                with patch("bluebeacon.detector._parse_toml_config") as mock_toml:
+                with patch("bluebeacon.detector._toml_address") as mock_toml:
                     mock_toml.return_value = None
                     result = parse_server_config(config_file)
 
@@ -337,11 +360,11 @@ class TestParseServerConfig:
         config_file = Path("velocity.toml")
         expected_result = (ipaddress.ip_address("192.168.1.30"), 25567)
 
-        with patch("bluebeacon.detector._parse_ini_config") as mock_ini:
+        with patch("bluebeacon.detector._ini_address") as mock_ini:
             mock_ini.return_value = None
-            with patch("bluebeacon.detector._parse_yaml_config") as mock_yaml:
+            with patch("bluebeacon.detector._yaml_address") as mock_yaml:
                 mock_yaml.return_value = None
-                with patch("bluebeacon.detector._parse_toml_config") as mock_toml:
+                with patch("bluebeacon.detector._toml_address") as mock_toml:
                     mock_toml.return_value = expected_result
                     result = parse_server_config(config_file)
 
@@ -351,11 +374,11 @@ class TestParseServerConfig:
         """Test parsing an unsupported config file format."""
         config_file = Path("unknown.cfg")
 
-        with patch("bluebeacon.detector._parse_ini_config") as mock_ini:
+        with patch("bluebeacon.detector._ini_address") as mock_ini:
             mock_ini.return_value = None
-            with patch("bluebeacon.detector._parse_yaml_config") as mock_yaml:
+            with patch("bluebeacon.detector._yaml_address") as mock_yaml:
                 mock_yaml.return_value = None
-                with patch("bluebeacon.detector._parse_toml_config") as mock_toml:
+                with patch("bluebeacon.detector._toml_address") as mock_toml:
                     mock_toml.return_value = None
 
                     with pytest.raises(ValueError) as excinfo:
@@ -393,7 +416,7 @@ class TestParseServerConfig:
         return_result = (ipaddress.ip_address("0.0.0.0"), 25565)
         localhost = ipaddress.IPv4Address("127.0.0.1")
 
-        with patch("bluebeacon.detector._parse_ini_config") as mock_ini:
+        with patch("bluebeacon.detector._ini_address") as mock_ini:
             mock_ini.return_value = return_result
             result = parse_server_config(config_file)
 
@@ -407,10 +430,413 @@ class TestParseServerConfig:
         return_result = (ipaddress.ip_address("::"), 25565)
         localhost = ipaddress.IPv6Address("::1")
 
-        with patch("bluebeacon.detector._parse_ini_config") as mock_ini:
+        with patch("bluebeacon.detector._ini_address") as mock_ini:
             mock_ini.return_value = return_result
             result = parse_server_config(config_file)
 
         # Verify the result
         assert result[0] == localhost
         assert result[1] == 25565
+
+    def test_reads_file_once(self, mock_config_file: MagicMock) -> None:
+        """The file should be read once and shared by all readers."""
+        config_file = Path("server.properties")
+
+        with patch("bluebeacon.detector._ini_address") as mock_ini:
+            mock_ini.return_value = None
+            with patch("bluebeacon.detector._yaml_address") as mock_yaml:
+                mock_yaml.return_value = None
+                with patch("bluebeacon.detector._toml_address") as mock_toml:
+                    mock_toml.return_value = None
+                    with pytest.raises(ValueError):
+                        parse_server_config(config_file)
+
+        mock_config_file.assert_called_once_with("rb")
+        mock_ini.assert_called_once_with({})
+        mock_yaml.assert_called_once_with({})
+        mock_toml.assert_called_once_with({})
+
+    @pytest.mark.parametrize(
+        "file_name, expected_reader",
+        [
+            ("server.properties", "_ini_address"),
+            ("config.yml", "_yaml_address"),
+            ("velocity.toml", "_toml_address"),
+        ],
+    )
+    def test_guessed_reader_first(self, file_name: str, expected_reader: str) -> None:
+        """The reader matching the file name should be used without trying others."""
+        expected_result = (ipaddress.ip_address("192.168.1.40"), 25568)
+        with patch.multiple(
+            "bluebeacon.detector",
+            _ini_address=DEFAULT,
+            _yaml_address=DEFAULT,
+            _toml_address=DEFAULT,
+        ) as readers:
+            for name, reader in readers.items():
+                reader.return_value = (
+                    expected_result
+                    if name == expected_reader
+                    else (ipaddress.ip_address("10.0.0.1"), 1)
+                )
+            result = parse_server_config(Path(file_name))
+
+        assert result == expected_result
+        for name, reader in readers.items():
+            if name == expected_reader:
+                reader.assert_called_once()
+            else:
+                reader.assert_not_called()
+
+    def test_falls_back_to_other_readers(self) -> None:
+        """If the guessed reader fails, the remaining ones should be tried."""
+        config_file = Path("config.yml")
+        expected_result = (ipaddress.ip_address("192.168.1.30"), 25567)
+
+        with patch("bluebeacon.detector._ini_address") as mock_ini:
+            mock_ini.return_value = None
+            with patch("bluebeacon.detector._yaml_address") as mock_yaml:
+                mock_yaml.return_value = None
+                with patch("bluebeacon.detector._toml_address") as mock_toml:
+                    mock_toml.return_value = expected_result
+                    result = parse_server_config(config_file)
+
+        assert result == expected_result
+        mock_yaml.assert_called_once()
+        mock_ini.assert_called_once()
+
+
+class TestParseServerConfigFiles:
+    """Tests for parse_server_config with real files."""
+
+    @pytest.mark.parametrize(
+        "file_name, content, expected_result",
+        [
+            (
+                "server.properties",
+                "motd=A Minecraft Server\nserver-ip=192.168.1.10\nserver-port=25565\n",
+                (ipaddress.ip_address("192.168.1.10"), 25565),
+            ),
+            (
+                "config.yml",
+                "listeners:\n- host: 0.0.0.0:25577\n  motd: A Proxy\n",
+                (ipaddress.ip_address("127.0.0.1"), 25577),
+            ),
+            (
+                "velocity.toml",
+                'config-version = "2.7"\nbind = "[::]:25577"\n',
+                (ipaddress.ip_address("::1"), 25577),
+            ),
+            (
+                "proxy.conf",
+                '[servers]\nlobby = "127.0.0.1:30066"\n',
+                None,
+            ),
+        ],
+    )
+    def test_parse_file(
+        self,
+        temp_dir: Path,
+        file_name: str,
+        content: str,
+        expected_result: object,
+    ) -> None:
+        """Each supported format should be parsed from disk."""
+        config_file = temp_dir / file_name
+        config_file.write_text(content)
+
+        if expected_result is None:
+            with pytest.raises(ValueError):
+                parse_server_config(config_file)
+        else:
+            assert parse_server_config(config_file) == expected_result
+
+
+class TestReadServerConfigEdition:
+    """Tests for the edition inferred by read_server_config."""
+
+    @pytest.mark.parametrize(
+        "file_name, content, edition",
+        [
+            ("server.properties", "server-ip=\nserver-port=25565\n", "java"),
+            (
+                "server.properties",
+                "server-name=Dedicated Server\nlevel-seed=\n"
+                "server-port=19132\nserver-portv6=19133\n",
+                "bedrock",
+            ),
+            ("config.yml", "listeners:\n- host: 0.0.0.0:25577\n", "java"),
+            ("velocity.toml", 'bind = "0.0.0.0:25577"\n', "java"),
+        ],
+    )
+    def test_edition(
+        self, temp_dir: Path, file_name: str, content: str, edition: str
+    ) -> None:
+        """Proxies and Java servers should be Java, BDS configs Bedrock."""
+        config_file = temp_dir / file_name
+        config_file.write_text(content)
+
+        server = read_server_config(config_file)
+
+        assert server.edition == edition
+        assert server.address == ipaddress.IPv4Address("127.0.0.1")
+
+    def test_query_port(self, temp_dir: Path) -> None:
+        """The query port should be read along with the address."""
+        config_file = temp_dir / "velocity.toml"
+        config_file.write_text(
+            'bind = "0.0.0.0:25577"\n[query]\nenabled = true\nport = 25578\n'
+        )
+
+        assert read_server_config(config_file).query_port == 25578
+
+    def test_invalid_query_port(self, temp_dir: Path) -> None:
+        """An invalid query port should only matter to the query depths."""
+        config_file = temp_dir / "server.properties"
+        config_file.write_text(
+            "server-ip=\nserver-port=25565\nenable-query=true\nquery.port=x\n"
+        )
+
+        assert read_server_config(config_file).query_port is None
+
+    def test_parsed_once(self, temp_dir: Path, mocker: MockerFixture) -> None:
+        """The edition should be inferred without parsing the file again."""
+        import javaproperties
+
+        loads = mocker.spy(javaproperties, "loads")
+        config_file = temp_dir / "server.properties"
+        config_file.write_text("server-port=19132\nserver-portv6=19133\n")
+
+        assert read_server_config(config_file).edition == "bedrock"
+        assert loads.call_count == 1
+
+
+class TestReadServerConfigHostName:
+    """Tests for read_server_config with proxies binding to host names."""
+
+    def test_resolved(self, temp_dir: Path, mocker: MockerFixture) -> None:
+        """The host name should be resolved and kept next to the address."""
+        mock_resolve = mocker.patch("bluebeacon.resolver.resolve")
+        mock_resolve.return_value = ipaddress.IPv4Address("10.0.0.5")
+        config_file = temp_dir / "velocity.toml"
+        config_file.write_text('bind = "mc.internal:25577"\n')
+
+        server = read_server_config(config_file)
+
+        mock_resolve.assert_called_once_with("mc.internal", RESOLVE_TIMEOUT)
+        assert server.address == ipaddress.IPv4Address("10.0.0.5")
+        assert server.host == "mc.internal"
+
+    def test_unresolvable(self, temp_dir: Path, mocker: MockerFixture) -> None:
+        """A host name that can't be resolved should raise OSError."""
+        mocker.patch("bluebeacon.resolver.resolve").side_effect = OSError(
+            "Could not resolve mc.internal"
+        )
+        config_file = temp_dir / "velocity.toml"
+        config_file.write_text('bind = "mc.internal:25577"\n')
+
+        with pytest.raises(OSError, match="Could not resolve"):
+            read_server_config(config_file)
+
+
+class TestParseProxyBackends:
+    """Tests for the parse_proxy_backends function."""
+
+    def test_velocity(self, temp_dir: Path) -> None:
+        """Velocity backends should be read from [servers], skipping "try"."""
+        config_file = temp_dir / "velocity.toml"
+        config_file.write_text(
+            'bind = "0.0.0.0:25577"\n'
+            "[servers]\n"
+            'lobby = "127.0.0.1:30066"\n'
+            'factions = "factions"\n'
+            'minigames = "[::1]:30068"\n'
+            'try = ["lobby", "factions"]\n'
+        )
+
+        assert parse_proxy_backends(config_file) == [
+            ("lobby", "127.0.0.1", 30066),
+            ("factions", "factions", 25565),
+            ("minigames", "::1", 30068),
+        ]
+
+    def test_bungee(self, temp_dir: Path) -> None:
+        """BungeeCord backends should be read from the servers section."""
+        config_file = temp_dir / "config.yml"
+        config_file.write_text(
+            "servers:\n"
+            "  lobby:\n"
+            "    motd: Lobby\n"
+            "    address: localhost:25566\n"
+            "    restricted: false\n"
+            "  broken: {}\n"
+            "listeners:\n"
+            "- host: 0.0.0.0:25577\n"
+        )
+
+        assert parse_proxy_backends(config_file) == [("lobby", "localhost", 25566)]
+
+    def test_not_a_proxy(self, temp_dir: Path) -> None:
+        """Server configs without backends should return an empty list."""
+        config_file = temp_dir / "server.properties"
+        config_file.write_text("server-ip=127.0.0.1\nserver-port=25565\n")
+
+        assert parse_proxy_backends(config_file) == []
+
+    def test_invalid_port(self, temp_dir: Path) -> None:
+        """A backend with an invalid port should raise ValueError."""
+        config_file = temp_dir / "velocity.toml"
+        config_file.write_text('[servers]\nlobby = "127.0.0.1:lobby"\n')
+
+        with pytest.raises(ValueError, match="Invalid backend address"):
+            parse_proxy_backends(config_file)
+
+
+class TestParseQueryPort:
+    """Tests for the parse_query_port function."""
+
+    @pytest.mark.parametrize(
+        "file_name, content, expected",
+        [
+            ("server.properties", "enable-query=true\nquery.port=25585\n", 25585),
+            ("server.properties", "enable-query=true\n", 25565),
+            ("server.properties", "enable-query=false\nquery.port=25585\n", None),
+            ("server.properties", "server-port=25565\n", None),
+            ("velocity.toml", "[query]\nenabled = true\nport = 25578\n", 25578),
+            ("velocity.toml", "[query]\nenabled = true\n", 25577),
+            ("velocity.toml", "[query]\nenabled = false\nport = 25578\n", None),
+            (
+                "config.yml",
+                "listeners:\n- host: 0.0.0.0:25577\n"
+                "  query_enabled: true\n  query_port: 25578\n",
+                25578,
+            ),
+            (
+                "config.yml",
+                "listeners:\n- host: 0.0.0.0:25577\n  query_enabled: false\n",
+                None,
+            ),
+            ("config.yml", "servers: {}\n", None),
+        ],
+    )
+    def test_parse_query_port(
+        self, temp_dir: Path, file_name: str, content: str, expected: Optional[int]
+    ) -> None:
+        """The query port should only be returned if the query protocol is enabled."""
+        config_file = temp_dir / file_name
+        config_file.write_text(content)
+
+        assert parse_query_port(config_file) == expected
+
+    def test_invalid_port(self, temp_dir: Path) -> None:
+        """An invalid query port should raise ValueError."""
+        config_file = temp_dir / "server.properties"
+        config_file.write_text("enable-query=true\nquery.port=query\n")
+
+        with pytest.raises(ValueError):
+            parse_query_port(config_file)
+
+
+class TestGeyserConfig:
+    """Tests for the find_geyser_config and parse_geyser_config functions."""
+
+    @pytest.mark.parametrize(
+        "directory",
+        [
+            "plugins/Geyser-Spigot",
+            "plugins/Geyser-Velocity",
+            "config/Geyser-Fabric",
+        ],
+    )
+    def test_find(self, temp_dir: Path, directory: str) -> None:
+        """The Geyser config should be found in the plugins or mods directory."""
+        config_file = temp_dir / "server.properties"
+        config_file.touch()
+        geyser_config = temp_dir / directory / "config.yml"
+        geyser_config.parent.mkdir(parents=True)
+        geyser_config.touch()
+
+        assert find_geyser_config(config_file) == geyser_config
+
+    def test_find_without_geyser(self, temp_dir: Path) -> None:
+        """Servers without Geyser should have no Geyser config."""
+        config_file = temp_dir / "server.properties"
+        config_file.touch()
+        (temp_dir / "plugins" / "floodgate").mkdir(parents=True)
+        (temp_dir / "plugins" / "floodgate" / "config.yml").touch()
+
+        assert find_geyser_config(config_file) is None
+
+    @pytest.mark.parametrize(
+        "content, expected",
+        [
+            (
+                "bedrock:\n  address: 0.0.0.0\n  port: 19133\n",
+                GeyserConfig(19133, False),
+            ),
+            ("bedrock:\n  clone-remote-port: true\n", GeyserConfig(19132, True)),
+            ("remote:\n  port: 25565\n", GeyserConfig(19132, False)),
+        ],
+    )
+    def test_parse(self, temp_dir: Path, content: str, expected: GeyserConfig) -> None:
+        """The Bedrock port should default to 19132, as in Geyser."""
+        geyser_config = temp_dir / "config.yml"
+        geyser_config.write_text(content)
+
+        assert parse_geyser_config(geyser_config) == expected
+
+    def test_bedrock_port(self) -> None:
+        """A cloned port should be the port of the Java server."""
+        assert GeyserConfig(19132, False).bedrock_port(25565) == 19132
+        assert GeyserConfig(19132, True).bedrock_port(25565) == 25565
+
+    @pytest.mark.parametrize(
+        "content", ["bedrock:\n  port: 70000\n", "bedrock:\n  port: [\n"]
+    )
+    def test_parse_invalid(self, temp_dir: Path, content: str) -> None:
+        """An invalid port or YAML should raise ValueError."""
+        geyser_config = temp_dir / "config.yml"
+        geyser_config.write_text(content)
+
+        with pytest.raises(ValueError):
+            parse_geyser_config(geyser_config)
+
+
+class TestGuessConfigFormat:
+    """Tests for the _guess_config_format function."""
+
+    @pytest.mark.parametrize(
+        "file_name, expected_format",
+        [
+            ("server.properties", "ini"),
+            ("config.yml", "yaml"),
+            ("velocity.toml", "toml"),
+            ("custom.PROPERTIES", "ini"),
+            ("bungee.yaml", "yaml"),
+            ("proxy.toml", "toml"),
+        ],
+    )
+    def test_guess_by_name(self, file_name: str, expected_format: str) -> None:
+        """The file name or extension should decide without looking at the data."""
+        assert _guess_config_format(Path(file_name), b"") == expected_format
+
+    @pytest.mark.parametrize(
+        "content, expected_format",
+        [
+            (b"#Minecraft server properties\nserver-port=25565\n", "ini"),
+            (b"! comment\n\nserver-ip = 0.0.0.0\n", "ini"),
+            (b'# Velocity\nbind = "0.0.0.0:25577"\n', "toml"),
+            (b'[servers]\nlobby = "127.0.0.1:30066"\n', "toml"),
+            (b"listeners:\n- host: 0.0.0.0:25577\n", "yaml"),
+            (b"---\nlisteners: []\n", "yaml"),
+            (b"- item\n", "yaml"),
+            (b"host: 'a=b'\n", "yaml"),
+            (b"\n# only comments\n", None),
+            (b"just some words\n", None),
+        ],
+    )
+    def test_guess_by_content(
+        self, content: bytes, expected_format: Optional[str]
+    ) -> None:
+        """Files with an unknown name should be recognised by their first line."""
+        assert _guess_config_format(Path("unknown.cfg"), content) == expected_format
@@ -0,0 +1,202 @@
+"""Tests for the fleet module."""
+
+import asyncio
+import ipaddress
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+from pytest_mock import MockerFixture
+
+from bluebeacon import detector
+from bluebeacon.fleet import FleetServer, discover, probe_all, resolve, resolve_all
+from bluebeacon.ping import PingResult
+
+
+@pytest.fixture(autouse=True)
+def runtime_dir(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    """Keep cache and history files inside a temporary runtime directory."""
+    directory = tmp_path / "runtime"
+    directory.mkdir()
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(directory))
+    return directory
+
+
+@pytest.fixture
+def fleet_root(tmp_path: Path) -> Path:
+    """Create a root with two servers, a directory without config and a file."""
+    root = tmp_path / "volumes"
+    for name, port in [("b", 25566), ("a", 25565)]:
+        (root / name).mkdir(parents=True)
+        (root / name / "server.properties").write_text(
+            f"server-ip=127.0.0.1\nserver-port={port}\n"
+        )
+    (root / "empty").mkdir()
+    (root / "notes.txt").write_text("not a server")
+    return root
+
+
+class TestDiscover:
+    """Tests for the discover function."""
+
+    def test_root_directory(self, fleet_root: Path) -> None:
+        """All subdirectories of a root should be listed, sorted by path."""
+        assert discover(str(fleet_root)) == [
+            fleet_root / "a",
+            fleet_root / "b",
+            fleet_root / "empty",
+        ]
+
+    def test_glob(self, fleet_root: Path) -> None:
+        """A glob pattern should list whatever it matches."""
+        assert discover(str(fleet_root / "*" / "server.properties")) == [
+            fleet_root / "a" / "server.properties",
+            fleet_root / "b" / "server.properties",
+        ]
+
+    def test_missing_root(self, tmp_path: Path) -> None:
+        """A missing root should raise OSError."""
+        with pytest.raises(OSError):
+            discover(str(tmp_path / "missing"))
+
+
+class TestResolve:
+    """Tests for the resolve and resolve_all functions."""
+
+    def test_resolve(self, fleet_root: Path) -> None:
+        """A server directory should resolve to the address and port of its config."""
+        assert resolve(fleet_root / "a") == FleetServer(
+            fleet_root / "a",
+            ipaddress.IPv4Address("127.0.0.1"),
+            25565,
+            server_type="java",
+        )
+
+    def test_resolve_query_port(self, fleet_root: Path) -> None:
+        """With query, the query port should be read as well."""
+        config_file = fleet_root / "a" / "server.properties"
+        config_file.write_text(
+            "server-ip=127.0.0.1\nserver-port=25565\n"
+            "enable-query=true\nquery.port=25585\n"
+        )
+
+        assert resolve(fleet_root / "a", query=True).query_port == 25585
+
+    def test_resolve_geyser(self, fleet_root: Path) -> None:
+        """Servers running Geyser should get the Bedrock port of its config."""
+        geyser_config = fleet_root / "a" / "plugins" / "Geyser-Spigot" / "config.yml"
+        geyser_config.parent.mkdir(parents=True)
+        geyser_config.write_text("bedrock:\n  port: 19133\n")
+
+        assert resolve(fleet_root / "a").bedrock_port == 19133
+        assert resolve(fleet_root / "a").server_type == "both"
+        assert resolve(fleet_root / "b").bedrock_port is None
+        assert resolve(fleet_root / "a").query_port is None
+
+    def test_resolve_query_disabled(self, fleet_root: Path) -> None:
+        """With query, a server with the query protocol disabled is an error."""
+        server = resolve(fleet_root / "b", query=True)
+
+        assert server.address is None
+        assert server.error is not None
+        assert "query protocol is not enabled" in server.error
+
+    def test_resolve_missing_config(self, fleet_root: Path) -> None:
+        """A directory without config should resolve to an error."""
+        server = resolve(fleet_root / "empty")
+
+        assert server.address is None
+        assert server.error is not None
+        assert "No valid server configuration" in server.error
+
+    def test_resolve_uses_cache(self, fleet_root: Path, mocker: MockerFixture) -> None:
+        """An unchanged config should only be parsed once."""
+        spy_parse = mocker.spy(detector, "read_server_config")
+
+        first = resolve(fleet_root / "a")
+        second = resolve(fleet_root / "a")
+
+        assert first == second
+        spy_parse.assert_called_once()
+
+    def test_resolve_all_keeps_order(self, fleet_root: Path) -> None:
+        """resolve_all should return one entry per path, in the same order."""
+        paths = discover(str(fleet_root))
+
+        servers = resolve_all(paths, workers=2)
+
+        assert [server.path for server in servers] == paths
+        assert [server.port for server in servers] == [25565, 25566, None]
+
+
+class TestProbeAll:
+    """Tests for the probe_all coroutine."""
+
+    def test_bounded_concurrency(self, mocker: MockerFixture) -> None:
+        """No more than the given number of pings should run at the same time."""
+        running = 0
+        peak = 0
+
+        async def probe(*args: Any, **kwargs: Any) -> PingResult:
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return PingResult(True, "java", 0.001)
+
+        mocker.patch("bluebeacon.ping.async_probe_server", probe)
+        servers = [
+            FleetServer(Path(str(port)), ipaddress.IPv4Address("127.0.0.1"), port)
+            for port in range(25565, 25575)
+        ]
+
+        results = asyncio.run(probe_all(servers, "both", "status", 0.05, 0.3, 3))
+
+        assert peak == 3
+        assert all(result is not None and result.success for result in results)
+
+    def test_unresolved_servers(self, mocker: MockerFixture) -> None:
+        """Servers without an address should not be pinged."""
+        mock_probe = mocker.patch(
+            "bluebeacon.ping.async_probe_server",
+            return_value=PingResult(False, error="refused"),
+        )
+        servers = [
+            FleetServer(Path("a"), error="No valid server configuration found"),
+            FleetServer(Path("b"), ipaddress.IPv4Address("127.0.0.1"), 25565),
+        ]
+
+        results: List[Any] = asyncio.run(
+            probe_all(servers, "java", "connect", 0.05, 0.3, 8)
+        )
+
+        assert results == [None, PingResult(False, error="refused")]
+        mock_probe.assert_called_once_with(
+            ipaddress.IPv4Address("127.0.0.1"),
+            25565,
+            "java",
+            depth="connect",
+            timeout=0.25,
+            query_port=None,
+            bedrock_port=None,
+        )
+
+    def test_inferred_editions(self, mocker: MockerFixture) -> None:
+        """Without a server type, each server should be pinged as inferred."""
+        mock_probe = mocker.patch(
+            "bluebeacon.ping.async_probe_server",
+            return_value=PingResult(True, "bedrock", 0.001),
+        )
+        servers = [
+            FleetServer(
+                Path("a"),
+                ipaddress.IPv4Address("127.0.0.1"),
+                19132,
+                server_type="bedrock",
+            )
+        ]
+
+        asyncio.run(probe_all(servers, None, "connect", 0.05, 0.3, 8))
+
+        assert mock_probe.call_args.args[2] == "bedrock"
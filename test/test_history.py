@@ -0,0 +1,156 @@
+"""Tests for the history module."""
+
+import ipaddress
+import os
+from pathlib import Path
+
+import pytest
+
+from bluebeacon.history import (
+    HEADER,
+    RECORD,
+    SLOTS,
+    ProbeHistory,
+    ProbeRecord,
+    summarize,
+)
+from bluebeacon.ping import PingResult
+
+
+@pytest.fixture(autouse=True)
+def runtime_dir(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    """Keep history files inside a temporary runtime directory."""
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    return tmp_path
+
+
+def history(slots: int = SLOTS) -> ProbeHistory:
+    """Create a history of a test server."""
+    server = ProbeHistory.for_server(ipaddress.IPv4Address("127.0.0.1"), 25565)
+    return ProbeHistory(server.path, slots)
+
+
+class TestProbeHistory:
+    """Tests for appending to and reading the ring buffer."""
+
+    def test_read_missing(self) -> None:
+        """Without a file the history should be empty."""
+        assert history().read() == []
+
+    def test_round_trip(self) -> None:
+        """Appended outcomes should be read back oldest first."""
+        probes = history()
+        # Exactly representable, as round-trip times are stored as 32-bit floats
+        probes.append(PingResult(True, "java", 0.0625), timestamp=1.0)
+        probes.append(PingResult(True, "bedrock", 0.125), timestamp=2.0)
+        probes.append(PingResult(False, error="timeout"), timestamp=3.0)
+        probes.append(PingResult(False, error="not listening"), timestamp=4.0)
+
+        assert probes.read() == [
+            ProbeRecord(1.0, "java", 0.0625, None),
+            ProbeRecord(2.0, "bedrock", 0.125, None),
+            ProbeRecord(3.0, None, None, "timeout"),
+            ProbeRecord(4.0, None, None, "not listening"),
+        ]
+
+    def test_constant_size(self) -> None:
+        """The file should keep its size however many outcomes are appended."""
+        probes = history(slots=4)
+        probes.append(PingResult(True, "java", 0.001))
+        size = probes.path.stat().st_size
+
+        for _ in range(10):
+            probes.append(PingResult(True, "java", 0.001))
+
+        assert size == probes.path.stat().st_size == HEADER.size + 4 * RECORD.size
+
+    def test_ring_keeps_newest(self) -> None:
+        """A full history should drop the oldest outcomes."""
+        probes = history(slots=4)
+        for i in range(10):
+            probes.append(PingResult(True, "java", 0.001), timestamp=float(i))
+
+        assert [record.timestamp for record in probes.read()] == [6, 7, 8, 9]
+
+    def test_shared_by_depths(self) -> None:
+        """Servers should have one history for all editions and depths."""
+        address = ipaddress.IPv4Address("127.0.0.1")
+
+        assert ProbeHistory.for_server(address, 25565).path == history().path
+        assert ProbeHistory.for_server(address, 25566).path != history().path
+
+    @pytest.mark.parametrize(
+        "content",
+        [
+            b"",
+            b"garbage",
+            HEADER.pack(b"BBPH", 99, SLOTS, 0) + bytes(SLOTS * RECORD.size),
+        ],
+    )
+    def test_replaces_unusable_file(self, content: bytes) -> None:
+        """Files that aren't histories of this format should be replaced."""
+        probes = history()
+        probes.path.write_bytes(content)
+
+        assert probes.read() == []
+
+        probes.append(PingResult(True, "java", 0.001), timestamp=1.0)
+
+        assert len(probes.read()) == 1
+
+    def test_other_slot_count(self) -> None:
+        """A history with another number of slots should be started over."""
+        history(slots=4).append(PingResult(True, "java", 0.001))
+        probes = history(slots=8)
+
+        assert probes.read() == []
+
+        probes.append(PingResult(True, "java", 0.001))
+
+        assert probes.path.stat().st_size == HEADER.size + 8 * RECORD.size
+
+    @pytest.mark.skipif(os.getuid() != 0, reason="requires root to chown")
+    def test_ignores_foreign_file(self) -> None:
+        """Histories owned by another user should not be trusted."""
+        probes = history()
+        probes.append(PingResult(True, "java", 0.001))
+        os.chown(probes.path, 12345, 12345)
+
+        assert probes.read() == []
+
+
+class TestSummarize:
+    """Tests for the summarize function."""
+
+    def test_empty(self) -> None:
+        """Without outcomes there should be no rates or percentiles."""
+        assert summarize([]) == {
+            "checks": 0,
+            "first": None,
+            "last": None,
+            "success_rate": None,
+            "p50": None,
+            "p95": None,
+            "p99": None,
+            "errors": {},
+        }
+
+    def test_summary(self) -> None:
+        """Percentiles should only cover successful pings."""
+        records = [
+            ProbeRecord(float(i), "java", (i + 1) / 1000, None) for i in range(98)
+        ]
+        records += [
+            ProbeRecord(98.0, None, None, "timeout"),
+            ProbeRecord(99.0, None, None, "refused"),
+        ]
+
+        summary = summarize(records)
+
+        assert summary["checks"] == 100
+        assert (summary["first"], summary["last"]) == (0.0, 99.0)
+        assert summary["success_rate"] == 0.98
+        assert summary["p50"] == 0.049
+        assert summary["p95"] == 0.094
+        assert summary["p99"] == 0.098
+        assert summary["errors"] == {"timeout": 1, "refused": 1}
@@ -0,0 +1,177 @@
+"""Tests for the latency module."""
+
+import array
+from pathlib import Path
+
+import pytest
+
+from bluebeacon import state
+from bluebeacon.latency import HISTORY_SIZE, LatencyHistory, LatencyPolicy
+from bluebeacon.ping import DEFAULT_TIMEOUT, PingResult
+
+
+@pytest.fixture(autouse=True)
+def runtime_dir(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    """Keep history files inside a temporary runtime directory."""
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    return tmp_path
+
+
+def history(*samples: float) -> LatencyHistory:
+    """Create a history with the given round-trip times."""
+    return LatencyHistory(state.state_file("server", "rtt"), array.array("f", samples))
+
+
+class TestLoadSave:
+    """Tests for loading and saving the history."""
+
+    def test_load_missing(self) -> None:
+        """Without a file the history should be empty."""
+        assert len(LatencyHistory.load("server").samples) == 0
+
+    def test_round_trip(self) -> None:
+        """Saved samples should be loaded again in the same order."""
+        history(0.01, 0.02, 0.03).save()
+
+        loaded = LatencyHistory.load("server")
+
+        assert list(loaded.samples) == pytest.approx([0.01, 0.02, 0.03])
+
+    def test_compact_file(self) -> None:
+        """Each sample should take four bytes on disk."""
+        history(0.01, 0.02).save()
+        assert state.state_file("server", "rtt").stat().st_size == 8
+
+    def test_separate_servers(self) -> None:
+        """Different keys should not share their history."""
+        history(0.01).save()
+        assert len(LatencyHistory.load("other").samples) == 0
+
+    def test_load_corrupt(self) -> None:
+        """A truncated file should be ignored."""
+        state.state_file("server", "rtt").write_bytes(b"\x00\x01\x02")
+        assert len(LatencyHistory.load("server").samples) == 0
+
+
+class TestRecord:
+    """Tests for adding ping outcomes to the history."""
+
+    def test_add_keeps_newest(self) -> None:
+        """The history should drop the oldest samples once it is full."""
+        samples = history()
+        for i in range(HISTORY_SIZE + 5):
+            samples.add(i)
+
+        assert len(samples.samples) == HISTORY_SIZE
+        assert samples.samples[0] == 5
+        assert samples.samples[-1] == HISTORY_SIZE + 4
+
+    def test_record_success(self) -> None:
+        """Successful pings should add their latency."""
+        samples = history()
+        samples.record(PingResult(True, "java", 0.02), 0.1)
+        assert list(samples.samples) == pytest.approx([0.02])
+
+    def test_record_timeout(self) -> None:
+        """Timeouts should add twice the timeout to back off."""
+        samples = history()
+        samples.record(PingResult(False, error="timeout"), 0.1)
+        assert list(samples.samples) == pytest.approx([0.2])
+
+    @pytest.mark.parametrize("error", ["refused", "error"])
+    def test_record_other_failure(self, error: str) -> None:
+        """Other failures should not change the history."""
+        samples = history()
+        samples.record(PingResult(False, error=error), 0.1)
+        assert len(samples.samples) == 0
+
+
+class TestTimeout:
+    """Tests for deriving the timeout from the history."""
+
+    def test_no_history(self) -> None:
+        """Without samples the default timeout should be used."""
+        assert history().timeout(0.05, 0.3) == DEFAULT_TIMEOUT
+
+    def test_no_history_clamped(self) -> None:
+        """The default timeout should respect the bounds as well."""
+        assert history().timeout(0.05, 0.1) == 0.1
+
+    def test_single_sample(self) -> None:
+        """A single sample should allow for twice its value as variation."""
+        assert history(0.02).timeout(0.01, 1) == pytest.approx(0.06)
+
+    def test_stable_latency(self) -> None:
+        """A stable latency should shrink the timeout to the lower bound."""
+        assert history(*[0.001] * HISTORY_SIZE).timeout(0.05, 0.3) == 0.05
+
+    def test_jittery_latency(self) -> None:
+        """A varying latency should result in a longer timeout than a stable one."""
+        stable = history(*[0.05] * 16).timeout(0.01, 1)
+        jittery = history(*[0.02, 0.08] * 8).timeout(0.01, 1)
+        assert jittery > stable
+
+    def test_timeouts_back_off(self) -> None:
+        """Repeated timeouts should raise the timeout up to the upper bound."""
+        samples = history(*[0.01] * HISTORY_SIZE)
+        timeouts = []
+        for _ in range(8):
+            timeout = samples.timeout(0.01, 0.3)
+            timeouts.append(timeout)
+            samples.record(PingResult(False, error="timeout"), timeout)
+
+        assert timeouts == sorted(timeouts)
+        assert samples.timeout(0.01, 0.3) == 0.3
+
+
+class TestPercentile:
+    """Tests for the percentile of the history."""
+
+    def test_no_history(self) -> None:
+        """Without samples there should be no percentile."""
+        assert history().percentile(95, 10) is None
+
+    @pytest.mark.parametrize(
+        "percent, expected", [(50, 0.005), (90, 0.009), (95, 0.01), (100, 0.01)]
+    )
+    def test_nearest_rank(self, percent: float, expected: float) -> None:
+        """The percentile should be the sample at the nearest rank."""
+        samples = [i / 1000 for i in range(10, 0, -1)]
+
+        assert history(*samples).percentile(percent, 10) == pytest.approx(expected)
+
+    def test_small_percentile(self) -> None:
+        """A percentile below the first rank should be the smallest sample."""
+        assert history(0.002, 0.001).percentile(1, 10) == pytest.approx(0.001)
+
+    def test_window(self) -> None:
+        """Only the latest samples of the window should count."""
+        assert history(0.5, 0.001, 0.002).percentile(100, 2) == pytest.approx(0.002)
+
+
+class TestLatencyPolicy:
+    """Tests for the latency objective."""
+
+    def test_latest_latency(self) -> None:
+        """Without a percentile, only the latest ping should be judged."""
+        policy = LatencyPolicy(0.05)
+        slow_history = history(0.5, 0.5)
+
+        assert not policy.degraded(PingResult(True, "java", 0.01), slow_history)
+        assert policy.degraded(PingResult(True, "java", 0.06), history())
+
+    def test_percentile(self) -> None:
+        """With a percentile, the recent pings in the window should be judged."""
+        policy = LatencyPolicy(0.05, percentile=90, window=10)
+        result = PingResult(True, "java", 0.01)
+
+        assert not policy.degraded(result, history(*[0.5] + [0.01] * 9))
+        assert policy.degraded(result, history(*[0.5] * 2 + [0.01] * 8))
+        # Slow pings that dropped out of the window don't count
+        assert not policy.degraded(result, history(*[0.5] * 5 + [0.01] * 10))
+
+    def test_failure_not_degraded(self) -> None:
+        """Failed pings should be down, not degraded."""
+        policy = LatencyPolicy(0.05, percentile=95)
+
+        assert not policy.degraded(PingResult(False, error="timeout"), history(0.6))
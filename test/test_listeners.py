@@ -0,0 +1,146 @@
+"""Tests for the listeners module."""
+
+import ipaddress
+import os
+import socket
+from pathlib import Path
+from typing import Dict
+
+import pytest
+
+from bluebeacon import listeners
+from bluebeacon.listeners import is_listening, listening_server_type
+
+HEADER = (
+    "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt"
+    "   uid  timeout inode\n"
+)
+
+# 127.0.0.1:25565 listening, 0.0.0.0:19132 unconnected UDP, [::]:25566 listening
+# and a connection from 127.0.0.1:25567 to 127.0.0.1:25565
+TABLES = {
+    "tcp": HEADER
+    + "   0: 0100007F:63DD 00000000:0000 0A 00000000:00000000 00:00000000 00000000"
+    "  1000        0 1 1 0000000000000000 100 0 0 10 0\n"
+    + "   1: 0100007F:63DF 0100007F:63DD 01 00000000:00000000 00:00000000 00000000"
+    "  1000        0 2 1 0000000000000000 20 4 30 10 -1\n",
+    "tcp6": HEADER
+    + "   0: 00000000000000000000000000000000:63DE 00000000000000000000000000000000"
+    ":0000 0A 00000000:00000000 00:00000000 00000000  1000        0 3 1"
+    " 0000000000000000 100 0 0 10 0\n",
+    "udp": HEADER
+    + "   0: 00000000:4ABC 00000000:0000 07 00000000:00000000 00:00000000 00000000"
+    "  1000        0 4 2 0000000000000000 0\n",
+    "udp6": HEADER,
+}
+
+LOCALHOST = ipaddress.IPv4Address("127.0.0.1")
+
+
+@pytest.fixture
+def tables(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Dict[str, Path]:
+    """Replace the socket tables of the kernel with the ones above."""
+    paths = {}
+    for name, content in TABLES.items():
+        paths[name] = tmp_path / name
+        paths[name].write_text(content)
+    monkeypatch.setattr(
+        listeners,
+        "PROC_NET_FILES",
+        {
+            "tcp": (str(paths["tcp"]), str(paths["tcp6"])),
+            "udp": (str(paths["udp"]), str(paths["udp6"])),
+        },
+    )
+    return paths
+
+
+class TestIsListening:
+    """Tests for the is_listening function."""
+
+    @pytest.mark.usefixtures("tables")
+    @pytest.mark.parametrize(
+        "address, port, transport, expected",
+        [
+            ("127.0.0.1", 25565, "tcp", True),
+            ("0.0.0.0", 25565, "tcp", True),
+            ("127.0.0.2", 25565, "tcp", False),
+            ("127.0.0.1", 25565, "udp", False),
+            # Only the local end of a connection counts, and only if it listens
+            ("127.0.0.1", 25567, "tcp", False),
+            # Sockets bound to the wildcard address listen on every address
+            ("127.0.0.1", 25566, "tcp", True),
+            ("::1", 25566, "tcp", True),
+            ("10.1.2.3", 19132, "udp", True),
+            ("127.0.0.1", 19133, "udp", False),
+        ],
+    )
+    def test_is_listening(
+        self, address: str, port: int, transport: str, expected: bool
+    ) -> None:
+        """Listeners should be matched by port, state and address."""
+        assert is_listening(ipaddress.ip_address(address), port, transport) is expected
+
+    def test_missing_ipv6_tables(self, tables: Dict[str, Path]) -> None:
+        """Missing IPv6 tables should not hide the IPv4 listeners."""
+        tables["tcp6"].unlink()
+
+        assert is_listening(LOCALHOST, 25565, "tcp") is True
+        assert is_listening(LOCALHOST, 25566, "tcp") is False
+
+    def test_no_tables(self, tables: Dict[str, Path]) -> None:
+        """Without any table the answer should be unknown."""
+        tables["udp"].unlink()
+        tables["udp6"].unlink()
+
+        assert is_listening(LOCALHOST, 19132, "udp") is None
+
+    @pytest.mark.skipif(
+        not os.path.exists("/proc/net/tcp"), reason="requires /proc/net"
+    )
+    def test_real_socket(self) -> None:
+        """A listening socket of this process should be found in the real table."""
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+
+            assert is_listening(LOCALHOST, port, "tcp") is False
+
+            sock.listen()
+
+            assert is_listening(LOCALHOST, port, "tcp") is True
+
+
+class TestListeningServerType:
+    """Tests for the listening_server_type function."""
+
+    @pytest.mark.usefixtures("tables")
+    @pytest.mark.parametrize(
+        "port, server_type, expected",
+        [
+            (25565, "both", "java"),
+            (25565, "java", "java"),
+            (25565, "bedrock", None),
+            (19132, "both", "bedrock"),
+            (19133, "both", None),
+        ],
+    )
+    def test_listening_server_type(
+        self, port: int, server_type: str, expected: str
+    ) -> None:
+        """Only the editions with a listener should be kept."""
+        assert listening_server_type(LOCALHOST, port, server_type) == expected
+
+    @pytest.mark.usefixtures("tables")
+    def test_bedrock_port(self) -> None:
+        """Bedrock should be checked on its own port, like Geyser's."""
+        assert listening_server_type(LOCALHOST, 25565, "both", 19132) == "both"
+        assert listening_server_type(LOCALHOST, 25565, "both", 19133) == "java"
+
+    def test_unknown_kept(self, tables: Dict[str, Path]) -> None:
+        """Editions whose listener can't be checked should be kept."""
+        tables["udp"].unlink()
+        tables["udp6"].unlink()
+
+        assert listening_server_type(LOCALHOST, 25565, "both") == "both"
+        assert listening_server_type(LOCALHOST, 25566, "bedrock") == "bedrock"
@@ -0,0 +1,164 @@
+"""Tests for the metrics module."""
+
+import time
+import urllib.error
+import urllib.request
+from typing import Iterator, List
+
+import pytest
+
+from bluebeacon.metrics import CONTENT_TYPE, Metrics, MetricsServer, start_server
+from bluebeacon.ping import PingResult
+
+
+@pytest.fixture
+def metrics() -> Metrics:
+    """Metrics of a server on the default port."""
+    return Metrics("127.0.0.1:25565")
+
+
+@pytest.fixture
+def server(metrics: Metrics) -> Iterator[MetricsServer]:
+    """Serve the metrics on a free port of the loopback interface."""
+    server = start_server(("127.0.0.1", 0), metrics)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def lines(metrics: Metrics) -> List[str]:
+    """Return the rendered metrics without comments."""
+    return [
+        line
+        for line in metrics.render().decode().splitlines()
+        if not line.startswith("#")
+    ]
+
+
+class TestMetrics:
+    """Tests for the Metrics class."""
+
+    def test_before_first_probe(self, metrics: Metrics) -> None:
+        """Only the empty histogram should be exported before the first probe."""
+        rendered = lines(metrics)
+
+        assert not any(line.startswith("bluebeacon_up") for line in rendered)
+        assert (
+            'bluebeacon_probe_duration_seconds_count{server="127.0.0.1:25565"} 0'
+            in rendered
+        )
+
+    def test_success(self, metrics: Metrics) -> None:
+        """A successful status probe should export the server as up with its players."""
+        metrics.observe(
+            PingResult(True, "java", 0.003, players_online=3, players_max=20)
+        )
+
+        rendered = lines(metrics)
+
+        assert 'bluebeacon_up{server="127.0.0.1:25565"} 1' in rendered
+        assert 'bluebeacon_players_online{server="127.0.0.1:25565"} 3' in rendered
+        assert 'bluebeacon_players_max{server="127.0.0.1:25565"} 20' in rendered
+        assert 'bluebeacon_consecutive_failures{server="127.0.0.1:25565"} 0' in rendered
+
+    def test_histogram(self, metrics: Metrics) -> None:
+        """Latencies should be counted in every bucket whose bound they don't exceed."""
+        metrics.observe(PingResult(True, "java", 0.003))
+        metrics.observe(PingResult(True, "java", 0.2))
+        metrics.observe(PingResult(False, error="timeout"))
+
+        rendered = lines(metrics)
+        prefix = 'bluebeacon_probe_duration_seconds_bucket{server="127.0.0.1:25565"'
+
+        assert f'{prefix},le="0.001"}} 0' in rendered
+        assert f'{prefix},le="0.005"}} 1' in rendered
+        assert f'{prefix},le="0.25"}} 2' in rendered
+        assert f'{prefix},le="+Inf"}} 2' in rendered
+        assert (
+            'bluebeacon_probe_duration_seconds_sum{server="127.0.0.1:25565"} 0.203'
+            in rendered
+        )
+        assert (
+            'bluebeacon_probe_duration_seconds_count{server="127.0.0.1:25565"} 2'
+            in rendered
+        )
+
+    def test_exact_values(
+        self, metrics: Metrics, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Timestamps and large counts should not be rounded."""
+        timestamp = time.time()
+        monkeypatch.setattr("bluebeacon.metrics.time.time", lambda: timestamp)
+        metrics.observe(PingResult(True, "java", 0.003))
+        # As if after more than a million probes
+        metrics._latency_count = 1234567
+        metrics._bucket_counts[-1] = 1234567
+
+        rendered = lines(metrics)
+        labels = '{server="127.0.0.1:25565"}'
+
+        assert f"bluebeacon_last_probe_timestamp_seconds{labels} {timestamp!r}" in (
+            rendered
+        )
+        assert f"bluebeacon_probe_duration_seconds_count{labels} 1234567" in rendered
+        assert (
+            'bluebeacon_probe_duration_seconds_bucket{server="127.0.0.1:25565",le="1"}'
+            " 1234567" in rendered
+        )
+
+    def test_consecutive_failures(self, metrics: Metrics) -> None:
+        """Failures should be counted until the next success."""
+        metrics.observe(PingResult(False, error="refused"))
+        metrics.observe(PingResult(False, error="timeout"))
+
+        assert 'bluebeacon_consecutive_failures{server="127.0.0.1:25565"} 2' in lines(
+            metrics
+        )
+        assert 'bluebeacon_up{server="127.0.0.1:25565"} 0' in lines(metrics)
+
+        metrics.observe(PingResult(True, "java", 0.001))
+
+        assert 'bluebeacon_consecutive_failures{server="127.0.0.1:25565"} 0' in lines(
+            metrics
+        )
+
+    def test_render_cached_until_next_probe(self, metrics: Metrics) -> None:
+        """Scrapes between two probes should reuse the rendered text."""
+        metrics.observe(PingResult(True, "java", 0.001))
+
+        first = metrics.render()
+
+        assert metrics.render() is first
+
+        metrics.observe(PingResult(False, error="refused"))
+
+        assert metrics.render() is not first
+
+    def test_label_escaping(self) -> None:
+        """Quotes and backslashes in the server label should be escaped."""
+        metrics = Metrics('a"b\\c')
+
+        assert metrics.labels == 'server="a\\"b\\\\c"'
+
+
+class TestMetricsServer:
+    """Tests for the HTTP server."""
+
+    def test_scrape(self, metrics: Metrics, server: MetricsServer) -> None:
+        """GET /metrics should return the rendered metrics."""
+        metrics.observe(PingResult(True, "java", 0.001))
+        port = server.server_address[1]
+
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            assert response.status == 200
+            assert response.headers["Content-Type"] == CONTENT_TYPE
+            assert response.read() == metrics.render()
+
+    def test_unknown_path(self, server: MetricsServer) -> None:
+        """Other paths should not be found."""
+        port = server.server_address[1]
+
+        with pytest.raises(urllib.error.HTTPError) as exc_info:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/")
+
+        assert exc_info.value.code == 404
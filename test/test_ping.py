@@ -1,16 +1,48 @@
 """Tests for the ping module."""
 
+import asyncio
+import errno
 import ipaddress
-from unittest.mock import MagicMock, patch
+import socket
+import threading
+import time
+from types import SimpleNamespace
+from typing import Iterator, Tuple
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from bluebeacon.ping import ping_server
+from bluebeacon import query
+from bluebeacon.ping import (
+    PingResult,
+    async_ping_server,
+    async_probe_server,
+    is_refusal,
+    ping_server,
+    probe_server,
+)
+
+from .stub_server import BedrockStubServer, JavaStubServer, QueryStubServer
+
+LOCALHOST = ipaddress.IPv4Address("127.0.0.1")
+
+
+@pytest.fixture(autouse=True)
+def query_sessions() -> Iterator[None]:
+    """Close the query sessions cached by a test."""
+    yield
+    query.clear_sessions()
 
 
 class TestPingServer:
     """Tests for the ping_server function."""
 
+    @pytest.fixture(autouse=True)
+    def raknet_reachable(self) -> Iterator[MagicMock]:
+        """Let the RakNet check preceding a Bedrock status request succeed."""
+        with patch("bluebeacon.ping._raknet_ping") as mock_raknet_ping:
+            yield mock_raknet_ping
+
     def test_ping_server_java_success(self) -> None:
         """Test ping_server when Java server responds successfully."""
         # Mock JavaServer to return a successful status
@@ -234,3 +266,810 @@ class TestPingServer:
             assert not t.is_alive(), "Ping thread did not finish after release"
 
         assert result_container == [False]
+
+
+@pytest.fixture
+def tcp_server() -> Iterator[Tuple[socket.socket, int]]:
+    """Listen on a free local TCP port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        sock.listen()
+        yield sock, sock.getsockname()[1]
+
+
+@pytest.fixture
+def udp_server() -> Iterator[Tuple[socket.socket, int]]:
+    """Bind a free local UDP port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        sock.settimeout(1)
+        yield sock, sock.getsockname()[1]
+
+
+def closed_port(kind: socket.SocketKind) -> int:
+    """Return a local port that nothing is listening on."""
+    with socket.socket(socket.AF_INET, kind) as sock:
+        sock.bind(("127.0.0.1", 0))
+        port: int = sock.getsockname()[1]
+    return port
+
+
+class TestPingServerDepth:
+    """Tests for the connect and legacy probe depths against local sockets."""
+
+    def test_invalid_depth(self) -> None:
+        """An unknown depth should be rejected."""
+        with pytest.raises(ValueError, match="Invalid probe depth"):
+            ping_server(ipaddress.IPv4Address("127.0.0.1"), 25565, "java", "deep")
+
+    def test_connect_java_success(self, tcp_server: Tuple[socket.socket, int]) -> None:
+        """A listening TCP socket is enough for the connect depth."""
+        _, port = tcp_server
+
+        with patch("bluebeacon.ping.JavaServer") as mock_java_class:
+            result = ping_server(
+                ipaddress.IPv4Address("127.0.0.1"), port, "java", "connect"
+            )
+
+        assert result is True
+        mock_java_class.assert_not_called()
+
+    def test_connect_java_closed_port(self) -> None:
+        """Without a listener the connect depth should fail."""
+        port = closed_port(socket.SOCK_STREAM)
+        result = ping_server(
+            ipaddress.IPv4Address("127.0.0.1"), port, "java", "connect"
+        )
+        assert result is False
+
+    def test_legacy_java_success(self, tcp_server: Tuple[socket.socket, int]) -> None:
+        """A kick packet in reply to the legacy ping counts as success."""
+        sock, port = tcp_server
+        received: list[bytes] = []
+
+        def answer() -> None:
+            connection, _ = sock.accept()
+            with connection:
+                received.append(connection.recv(2))
+                connection.sendall(b"\xff\x00\x03\x00A\x00B\x00C")
+
+        thread = threading.Thread(target=answer, daemon=True)
+        thread.start()
+        result = ping_server(ipaddress.IPv4Address("127.0.0.1"), port, "java", "legacy")
+        thread.join(timeout=1)
+
+        assert result is True
+        assert received == [b"\xfe\x01"]
+
+    def test_legacy_java_unexpected_response(
+        self, tcp_server: Tuple[socket.socket, int]
+    ) -> None:
+        """A reply that is not a kick packet counts as failure."""
+        sock, port = tcp_server
+
+        def answer() -> None:
+            for _ in range(3):
+                connection, _ = sock.accept()
+                with connection:
+                    connection.recv(2)
+                    connection.sendall(b"HTTP/1.1 400 Bad Request\r\n")
+
+        thread = threading.Thread(target=answer, daemon=True)
+        thread.start()
+        result = ping_server(ipaddress.IPv4Address("127.0.0.1"), port, "java", "legacy")
+        thread.join(timeout=1)
+
+        assert result is False
+
+    @pytest.mark.parametrize("depth", ["connect", "legacy"])
+    def test_raknet_bedrock_success(
+        self, udp_server: Tuple[socket.socket, int], depth: str
+    ) -> None:
+        """An unconnected pong counts as success without being parsed."""
+        sock, port = udp_server
+        received: list[bytes] = []
+
+        def answer() -> None:
+            data, address = sock.recvfrom(2048)
+            received.append(data)
+            sock.sendto(b"\x1c" + b"\x00" * 32, address)
+
+        thread = threading.Thread(target=answer, daemon=True)
+        thread.start()
+        with patch("bluebeacon.ping.BedrockServer") as mock_bedrock_class:
+            result = ping_server(
+                ipaddress.IPv4Address("127.0.0.1"), port, "bedrock", depth
+            )
+        thread.join(timeout=1)
+
+        assert result is True
+        assert received[0][0] == 0x01
+        mock_bedrock_class.assert_not_called()
+
+    def test_raknet_bedrock_unexpected_response(
+        self, udp_server: Tuple[socket.socket, int]
+    ) -> None:
+        """A datagram that is not an unconnected pong counts as failure."""
+        sock, port = udp_server
+
+        def answer() -> None:
+            for _ in range(3):
+                _, address = sock.recvfrom(2048)
+                sock.sendto(b"\x00", address)
+
+        thread = threading.Thread(target=answer, daemon=True)
+        thread.start()
+        result = ping_server(
+            ipaddress.IPv4Address("127.0.0.1"), port, "bedrock", "connect"
+        )
+        thread.join(timeout=1)
+
+        assert result is False
+
+
+class TestPingServerRefusal:
+    """Tests for failing fast when nothing is listening."""
+
+    def test_connect_refused_single_attempt(self) -> None:
+        """A refused connection should not be retried."""
+        port = closed_port(socket.SOCK_STREAM)
+
+        with patch(
+            "bluebeacon.ping._connect", side_effect=ConnectionRefusedError
+        ) as mock_connect:
+            result = ping_server(
+                ipaddress.IPv4Address("127.0.0.1"), port, "java", "connect"
+            )
+
+        assert result is False
+        mock_connect.assert_called_once()
+
+    def test_timeout_uses_all_attempts(self) -> None:
+        """Timeouts should be retried until the attempts are used up."""
+        with patch(
+            "bluebeacon.ping._connect", side_effect=TimeoutError
+        ) as mock_connect:
+            result = ping_server(
+                ipaddress.IPv4Address("127.0.0.1"), 25565, "java", "connect"
+            )
+
+        assert result is False
+        assert mock_connect.call_count == 3
+
+    def test_bedrock_status_closed_port(self) -> None:
+        """A closed UDP port should fail the Bedrock status check immediately."""
+        port = closed_port(socket.SOCK_DGRAM)
+
+        start = time.monotonic()
+        with patch("bluebeacon.ping.BedrockServer") as mock_bedrock_class:
+            result = ping_server(ipaddress.IPv4Address("127.0.0.1"), port, "bedrock")
+        elapsed = time.monotonic() - start
+
+        assert result is False
+        # Far less than a single 250 ms timeout
+        assert elapsed < 0.1
+        mock_bedrock_class.return_value.status.assert_not_called()
+
+    def test_both_closed_ports_fail_fast(self) -> None:
+        """Without any listener the whole check should end without a timeout."""
+        port = closed_port(socket.SOCK_STREAM)
+
+        start = time.monotonic()
+        result = ping_server(ipaddress.IPv4Address("127.0.0.1"), port, "both")
+        elapsed = time.monotonic() - start
+
+        assert result is False
+        assert elapsed < 0.1
+
+
+class TestProbeServer:
+    """Tests for the details reported by probe_server."""
+
+    def test_success_reports_protocol_and_latency(
+        self, tcp_server: Tuple[socket.socket, int]
+    ) -> None:
+        """A successful probe should report who answered and how fast."""
+        _, port = tcp_server
+
+        result = probe_server(
+            ipaddress.IPv4Address("127.0.0.1"), port, "java", "connect"
+        )
+
+        assert result.success is True
+        assert result.protocol == "java"
+        assert result.latency is not None
+        assert 0 <= result.latency < 0.25
+        assert result.error is None
+
+    def test_status_details(self) -> None:
+        """A full status should fill in the details the server reported."""
+        response = SimpleNamespace(
+            version=SimpleNamespace(name="1.21.4", protocol=769),
+            players=SimpleNamespace(online=3, max=20),
+        )
+
+        with patch("bluebeacon.ping.JavaServer") as mock_java_class:
+            mock_java_class.return_value.status.return_value = response
+            result = probe_server(ipaddress.IPv4Address("127.0.0.1"), 25565, "java")
+
+        assert result.success is True
+        assert result.version == "1.21.4"
+        assert result.protocol_version == 769
+        assert result.players_online == 3
+        assert result.players_max == 20
+
+    def test_from_response_without_status(self) -> None:
+        """Probes that don't request the status should leave the details empty."""
+        assert PingResult.from_response("java", 0.01, None) == PingResult(
+            True, "java", 0.01
+        )
+
+    def test_passes_timeout(self) -> None:
+        """The timeout should be handed to every attempt."""
+        with patch("bluebeacon.ping._connect") as mock_connect:
+            probe_server(
+                ipaddress.IPv4Address("127.0.0.1"), 25565, "java", "connect", 0.05
+            )
+
+        mock_connect.assert_called_once_with(
+            ipaddress.IPv4Address("127.0.0.1"), 25565, 0.05
+        )
+
+    def test_refused(self) -> None:
+        """Refused probes should be reported as such."""
+        port = closed_port(socket.SOCK_STREAM)
+
+        result = probe_server(ipaddress.IPv4Address("127.0.0.1"), port, "both")
+
+        assert result == PingResult(False, error="refused")
+
+    def test_timeout_wins_over_refusal(self) -> None:
+        """A timeout of any probe should be reported, as a longer one may help."""
+        with (
+            patch("bluebeacon.ping._connect", side_effect=TimeoutError),
+            patch("bluebeacon.ping._raknet_ping", side_effect=ConnectionRefusedError),
+        ):
+            result = probe_server(
+                ipaddress.IPv4Address("127.0.0.1"), 25565, "both", "connect"
+            )
+
+        assert result == PingResult(False, error="timeout")
+
+    def test_other_error(self) -> None:
+        """Unexpected responses are neither timeouts nor refusals."""
+        with patch(
+            "bluebeacon.ping._connect", side_effect=IOError("Unexpected response")
+        ):
+            result = probe_server(
+                ipaddress.IPv4Address("127.0.0.1"), 25565, "java", "connect"
+            )
+
+        assert result == PingResult(False, error="error")
+
+
+class TestAsyncProbeServer:
+    """Tests for the async_probe_server coroutine."""
+
+    def test_java_status_success(self) -> None:
+        """A successful async status request should count as success."""
+        with patch("bluebeacon.ping.JavaServer") as mock_java_class:
+            mock_java_class.return_value.async_status = AsyncMock()
+            result = asyncio.run(
+                async_probe_server(ipaddress.IPv4Address("127.0.0.1"), 25565, "java")
+            )
+
+        assert result.success is True
+        assert result.protocol == "java"
+        mock_java_class.assert_called_once_with("127.0.0.1", 25565, 0.25)
+        mock_java_class.return_value.async_status.assert_awaited_once()
+
+    def test_ipv6_address(self) -> None:
+        """IPv6 addresses should be passed to mcstatus in brackets."""
+        with patch("bluebeacon.ping.JavaServer") as mock_java_class:
+            mock_java_class.return_value.async_status = AsyncMock()
+            asyncio.run(
+                async_ping_server(ipaddress.IPv6Address("::1"), 25565, "java", "status")
+            )
+
+        mock_java_class.assert_called_once_with("[::1]", 25565, 0.25)
+
+    def test_cancels_losing_probe(self) -> None:
+        """Once a probe succeeds the other one should be cancelled and cleaned up."""
+        cleaned_up = []
+
+        async def hang(*args: object) -> None:
+            try:
+                await asyncio.sleep(10)
+            finally:
+                cleaned_up.append(True)
+
+        start = time.monotonic()
+        with (
+            patch("bluebeacon.ping._async_connect", AsyncMock()),
+            patch("bluebeacon.ping._async_raknet_ping", hang),
+        ):
+            result = asyncio.run(
+                async_probe_server(
+                    ipaddress.IPv4Address("127.0.0.1"), 25565, "both", "connect"
+                )
+            )
+
+        assert result.protocol == "java"
+        # The cleanup ran before the coroutine returned
+        assert cleaned_up == [True]
+        assert time.monotonic() - start < 1
+
+    def test_cancelling_cancels_probes(self) -> None:
+        """Cancelling the coroutine should cancel all running probes."""
+        cleaned_up = []
+
+        async def hang(*args: object) -> None:
+            try:
+                await asyncio.sleep(10)
+            finally:
+                cleaned_up.append(True)
+
+        async def cancel_probe() -> None:
+            task = asyncio.create_task(
+                async_probe_server(
+                    ipaddress.IPv4Address("127.0.0.1"), 25565, "both", "connect"
+                )
+            )
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        with (
+            patch("bluebeacon.ping._async_connect", hang),
+            patch("bluebeacon.ping._async_raknet_ping", hang),
+        ):
+            asyncio.run(cancel_probe())
+
+        assert cleaned_up == [True, True]
+
+    def test_connect_java_success(self, tcp_server: Tuple[socket.socket, int]) -> None:
+        """A listening TCP socket is enough for the connect depth."""
+        _, port = tcp_server
+
+        result = asyncio.run(
+            async_ping_server(
+                ipaddress.IPv4Address("127.0.0.1"), port, "java", "connect"
+            )
+        )
+
+        assert result is True
+
+    def test_legacy_java_success(self, tcp_server: Tuple[socket.socket, int]) -> None:
+        """A kick packet in reply to the legacy ping counts as success."""
+        sock, port = tcp_server
+        received: list[bytes] = []
+
+        def answer() -> None:
+            connection, _ = sock.accept()
+            with connection:
+                received.append(connection.recv(2))
+                connection.sendall(b"\xff\x00\x03\x00A\x00B\x00C")
+
+        thread = threading.Thread(target=answer, daemon=True)
+        thread.start()
+        result = asyncio.run(
+            async_ping_server(
+                ipaddress.IPv4Address("127.0.0.1"), port, "java", "legacy"
+            )
+        )
+        thread.join(timeout=1)
+
+        assert result is True
+        assert received == [b"\xfe\x01"]
+
+    def test_raknet_bedrock_success(
+        self, udp_server: Tuple[socket.socket, int]
+    ) -> None:
+        """An unconnected pong counts as success without being parsed."""
+        sock, port = udp_server
+
+        def answer() -> None:
+            _, address = sock.recvfrom(2048)
+            sock.sendto(b"\x1c" + b"\x00" * 32, address)
+
+        thread = threading.Thread(target=answer, daemon=True)
+        thread.start()
+        result = asyncio.run(
+            async_probe_server(
+                ipaddress.IPv4Address("127.0.0.1"), port, "bedrock", "connect"
+            )
+        )
+        thread.join(timeout=1)
+
+        assert result.success is True
+        assert result.protocol == "bedrock"
+
+    def test_closed_ports_fail_fast(self) -> None:
+        """Without any listener the whole check should end without a timeout."""
+        port = closed_port(socket.SOCK_STREAM)
+
+        start = time.monotonic()
+        result = asyncio.run(
+            async_probe_server(ipaddress.IPv4Address("127.0.0.1"), port, "both")
+        )
+        elapsed = time.monotonic() - start
+
+        assert result == PingResult(False, error="refused")
+        assert elapsed < 0.1
+
+    def test_timeout_uses_all_attempts(self) -> None:
+        """Timeouts should be retried until the attempts are used up."""
+        with patch(
+            "bluebeacon.ping._async_connect", AsyncMock(side_effect=TimeoutError)
+        ) as mock_connect:
+            result = asyncio.run(
+                async_probe_server(
+                    ipaddress.IPv4Address("127.0.0.1"), 25565, "java", "connect"
+                )
+            )
+
+        assert result == PingResult(False, error="timeout")
+        assert mock_connect.await_count == 3
+
+    def test_invalid_server_type(self) -> None:
+        """An unknown server type should be rejected."""
+        with pytest.raises(ValueError, match="Invalid server type"):
+            asyncio.run(
+                async_ping_server(ipaddress.IPv4Address("127.0.0.1"), 25565, "invalid")
+            )
+
+
+class TestIsRefusal:
+    """Tests for the is_refusal function."""
+
+    @pytest.mark.parametrize(
+        "exc, expected",
+        [
+            (ConnectionRefusedError(errno.ECONNREFUSED, "Connection refused"), True),
+            (OSError(errno.EHOSTUNREACH, "No route to host"), True),
+            (OSError(errno.ENETUNREACH, "Network is unreachable"), True),
+            (TimeoutError("timed out"), False),
+            (ConnectionResetError(errno.ECONNRESET, "Connection reset"), False),
+            (IOError("Unexpected response to legacy ping"), False),
+            (ValueError("Invalid server type"), False),
+        ],
+    )
+    def test_is_refusal(self, exc: BaseException, expected: bool) -> None:
+        """Only errors proving that nothing answers should count as refusals."""
+        assert is_refusal(exc) is expected
+
+
+class TestProbeServerStub:
+    """Tests pinging the stub servers over real sockets."""
+
+    @pytest.mark.parametrize("depth", ["connect", "legacy", "status"])
+    def test_java(self, depth: str) -> None:
+        """Every depth should succeed against a Java server."""
+        with JavaStubServer() as server:
+            result = probe_server(LOCALHOST, server.port, "java", depth=depth)
+
+        assert result.success
+        assert result.protocol == "java"
+        assert result.latency is not None and result.latency > 0
+
+    @pytest.mark.parametrize("depth", ["connect", "status"])
+    def test_bedrock(self, depth: str) -> None:
+        """Every depth should succeed against a Bedrock server."""
+        with BedrockStubServer() as server:
+            result = probe_server(LOCALHOST, server.port, "bedrock", depth=depth)
+
+        assert result.success
+        assert result.protocol == "bedrock"
+
+    @pytest.mark.parametrize("depth", ["query", "query-full"])
+    def test_java_query(self, depth: str) -> None:
+        """Query depths should ask the query port and report the players."""
+        with JavaStubServer(refuse=True) as java, QueryStubServer() as server:
+            result = probe_server(
+                LOCALHOST, java.port, "java", depth=depth, query_port=server.port
+            )
+
+        assert result.success
+        assert result.protocol == "java"
+        assert (result.players_online, result.players_max) == (2, 20)
+        assert result.version == ("1.21.4" if depth == "query-full" else None)
+
+    def test_query_refused(self) -> None:
+        """A closed query port should fail without retrying."""
+        with QueryStubServer(refuse=True) as server:
+            result = probe_server(
+                LOCALHOST, server.port, "java", depth="query", query_port=server.port
+            )
+
+        assert result == PingResult(False, error="refused")
+
+    def test_query_token_retried(self) -> None:
+        """A token the server forgot should be replaced by the next attempt."""
+        with QueryStubServer() as server:
+            probe_server(LOCALHOST, 1, "java", depth="query", query_port=server.port)
+            server.expire_tokens()
+            result = probe_server(
+                LOCALHOST,
+                1,
+                "java",
+                depth="query",
+                timeout=0.05,
+                query_port=server.port,
+            )
+
+        assert result.success
+        assert server.handshakes == 2
+
+    def test_java_status_details(self) -> None:
+        """A status ping should report the version and players of the server."""
+        with JavaStubServer() as server:
+            result = probe_server(LOCALHOST, server.port, "java")
+
+        assert result.version == "1.21.4"
+        assert result.protocol_version == 769
+        assert (result.players_online, result.players_max) == (3, 20)
+
+    def test_bedrock_status_details(self) -> None:
+        """A Bedrock status ping should report the version and players."""
+        with BedrockStubServer() as server:
+            result = probe_server(LOCALHOST, server.port, "bedrock")
+
+        assert result.version == "1.21.50"
+        assert result.protocol_version == 766
+        assert (result.players_online, result.players_max) == (3, 20)
+
+    def test_both_finds_java(self) -> None:
+        """Pinging both editions should succeed with the one that answers."""
+        with JavaStubServer() as server:
+            result = probe_server(LOCALHOST, server.port, "both")
+
+        assert result.success
+        assert result.protocol == "java"
+
+    @pytest.mark.parametrize("depth", ["connect", "status"])
+    def test_both_bedrock_port(self, depth: str) -> None:
+        """Bedrock should be pinged on its own port, as opened by Geyser."""
+        with JavaStubServer(refuse=True) as java, BedrockStubServer() as bedrock:
+            result = probe_server(
+                LOCALHOST, java.port, "both", depth=depth, bedrock_port=bedrock.port
+            )
+
+        assert result.success
+        assert result.protocol == "bedrock"
+
+    def test_both_ports_refused(self) -> None:
+        """Refusals on both ports should fail the ping without waiting."""
+        with (
+            JavaStubServer(refuse=True) as java,
+            BedrockStubServer(refuse=True) as bedrock,
+        ):
+            start = time.perf_counter()
+            result = probe_server(
+                LOCALHOST, java.port, "both", timeout=1.0, bedrock_port=bedrock.port
+            )
+            elapsed = time.perf_counter() - start
+
+        assert result == PingResult(False, error="refused")
+        assert elapsed < 0.5
+
+    @pytest.mark.parametrize(
+        "stub, server_type",
+        [(JavaStubServer, "java"), (BedrockStubServer, "bedrock")],
+    )
+    def test_refused(self, stub: type, server_type: str) -> None:
+        """A refusing server should fail fast with the reason."""
+        with stub(refuse=True) as server:
+            start = time.perf_counter()
+            result = probe_server(LOCALHOST, server.port, server_type, timeout=1.0)
+            elapsed = time.perf_counter() - start
+
+        assert result == PingResult(False, error="refused")
+        assert elapsed < 0.5
+
+    def test_latency_within_timeout(self) -> None:
+        """A server answering before the timeout should succeed."""
+        with JavaStubServer(latency=0.05) as server:
+            result = probe_server(
+                LOCALHOST, server.port, "java", depth="legacy", timeout=0.5
+            )
+
+        assert result.success
+        assert result.latency is not None and result.latency >= 0.05
+
+    @pytest.mark.parametrize("depth", ["legacy", "status"])
+    def test_latency_beyond_timeout(self, depth: str) -> None:
+        """A server answering after every attempt timed out should fail."""
+        with JavaStubServer(latency=1.0) as server:
+            result = probe_server(
+                LOCALHOST, server.port, "java", depth=depth, timeout=0.05
+            )
+
+        assert result == PingResult(False, error="timeout")
+
+    def test_lost_pings(self) -> None:
+        """A server dropping every ping should time out."""
+        with BedrockStubServer(loss=1.0) as server:
+            result = probe_server(
+                LOCALHOST, server.port, "bedrock", depth="connect", timeout=0.05
+            )
+
+        assert result == PingResult(False, error="timeout")
+
+    def test_lost_ping_retried(self) -> None:
+        """A single lost ping should be made up for by the next attempt."""
+        # With this seed the first ping is lost and the second one answered
+        with BedrockStubServer(loss=0.5, seed=1) as server:
+            result = probe_server(
+                LOCALHOST, server.port, "bedrock", depth="connect", timeout=0.05
+            )
+
+        assert result.success
+
+    def test_slow_drip_beyond_timeout(self) -> None:
+        """A status answer dripping in slower than the timeout should fail."""
+        with JavaStubServer(drip=0.2) as server:
+            result = probe_server(LOCALHOST, server.port, "java", timeout=0.05)
+
+        assert result == PingResult(False, error="timeout")
+
+    def test_slow_drip_within_timeout_cut_by_deadline(self) -> None:
+        """A deadline should end a status answer whose every byte beats the timeout."""
+        with JavaStubServer(drip=0.02) as server:
+            start = time.perf_counter()
+            result = probe_server(
+                LOCALHOST,
+                server.port,
+                "java",
+                timeout=0.25,
+                deadline=time.monotonic() + 0.2,
+            )
+            elapsed = time.perf_counter() - start
+
+        assert result == PingResult(False, error="timeout")
+        assert elapsed < 0.4
+
+    def test_deadline_passed(self) -> None:
+        """A deadline that has passed should fail the ping at once."""
+        with JavaStubServer(latency=1.0) as server:
+            result = probe_server(
+                LOCALHOST, server.port, "java", deadline=time.monotonic()
+            )
+
+        assert result == PingResult(False, error="timeout")
+
+    def test_deadline_not_reached(self) -> None:
+        """A ping well within the deadline should succeed as without one."""
+        with JavaStubServer() as server:
+            result = probe_server(
+                LOCALHOST, server.port, "java", deadline=time.monotonic() + 5
+            )
+
+        assert result.success
+
+    def test_oversized_status(self) -> None:
+        """A large MOTD and favicon should still be decoded."""
+        with JavaStubServer(motd_size=5_000, favicon_size=18_000) as server:
+            result = probe_server(LOCALHOST, server.port, "java", timeout=1.0)
+
+        assert result.success
+        assert result.players_online == 3
+
+    def test_status_beyond_mcstatus_limit(self) -> None:
+        """A status longer than the 32767 characters mcstatus accepts should fail."""
+        with JavaStubServer(favicon_size=200_000) as server:
+            result = probe_server(LOCALHOST, server.port, "java", timeout=1.0)
+
+        assert result == PingResult(False, error="error")
+
+    def test_oversized_bedrock_motd(self) -> None:
+        """A long Bedrock MOTD should still be decoded."""
+        with BedrockStubServer(motd_size=1_500) as server:
+            result = probe_server(LOCALHOST, server.port, "bedrock", timeout=1.0)
+
+        assert result.success
+
+    def test_concurrent_pings(self) -> None:
+        """Many pings from different threads should all get their own answer."""
+        results = []
+
+        with JavaStubServer(latency=0.01) as server:
+
+            def ping() -> None:
+                results.append(probe_server(LOCALHOST, server.port, "both"))
+
+            threads = [threading.Thread(target=ping) for _ in range(32)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert len(results) == 32
+        assert all(result.success for result in results)
+
+
+class TestAsyncProbeServerStub:
+    """Tests pinging the stub servers over real sockets with the async API."""
+
+    @pytest.mark.parametrize("depth", ["connect", "legacy", "status"])
+    def test_java(self, depth: str) -> None:
+        """Every depth should succeed against a Java server."""
+        with JavaStubServer() as server:
+            result = asyncio.run(
+                async_probe_server(LOCALHOST, server.port, "java", depth=depth)
+            )
+
+        assert result.success
+        assert result.protocol == "java"
+
+    @pytest.mark.parametrize("depth", ["connect", "status"])
+    def test_bedrock(self, depth: str) -> None:
+        """Every depth should succeed against a Bedrock server."""
+        with BedrockStubServer() as server:
+            result = asyncio.run(
+                async_probe_server(LOCALHOST, server.port, "bedrock", depth=depth)
+            )
+
+        assert result.success
+        assert result.protocol == "bedrock"
+
+    def test_both_bedrock_port(self) -> None:
+        """Bedrock should be pinged on its own port, as opened by Geyser."""
+        with JavaStubServer(refuse=True) as java, BedrockStubServer() as bedrock:
+            result = asyncio.run(
+                async_probe_server(
+                    LOCALHOST, java.port, "both", bedrock_port=bedrock.port
+                )
+            )
+
+        assert result.success
+        assert result.protocol == "bedrock"
+
+    def test_java_query(self) -> None:
+        """The full query should report the version and players."""
+        with QueryStubServer() as server:
+            result = asyncio.run(
+                async_probe_server(
+                    LOCALHOST, 1, "java", depth="query-full", query_port=server.port
+                )
+            )
+
+        assert result.success
+        assert (result.version, result.players_online) == ("1.21.4", 2)
+
+    def test_refused(self) -> None:
+        """A refusing server should fail with the reason."""
+        with JavaStubServer(refuse=True) as server:
+            result = asyncio.run(async_probe_server(LOCALHOST, server.port, "java"))
+
+        assert result == PingResult(False, error="refused")
+
+    def test_latency_beyond_timeout(self) -> None:
+        """A server answering after every attempt timed out should fail."""
+        with JavaStubServer(latency=1.0) as server:
+            result = asyncio.run(
+                async_probe_server(
+                    LOCALHOST, server.port, "java", depth="legacy", timeout=0.05
+                )
+            )
+
+        assert result == PingResult(False, error="timeout")
+
+    def test_deadline(self) -> None:
+        """Probes still running at the deadline should be cancelled."""
+        with JavaStubServer(latency=1.0) as server:
+            start = time.perf_counter()
+            result = asyncio.run(
+                async_probe_server(
+                    LOCALHOST,
+                    server.port,
+                    "java",
+                    depth="legacy",
+                    timeout=0.5,
+                    deadline=time.monotonic() + 0.1,
+                )
+            )
+            elapsed = time.perf_counter() - start
+
+        assert result == PingResult(False, error="timeout")
+        assert elapsed < 0.4
@@ -0,0 +1,172 @@
+"""Tests for the query module."""
+
+import asyncio
+import ipaddress
+import struct
+from typing import Iterator
+
+import pytest
+from pytest_mock import MockerFixture
+
+from bluebeacon import query
+from bluebeacon.query import QueryResponse, async_query, parse_stat
+
+from .stub_server import QueryStubServer
+
+LOCALHOST = ipaddress.IPv4Address("127.0.0.1")
+
+
+@pytest.fixture(autouse=True)
+def sessions() -> Iterator[None]:
+    """Start every test without cached sessions and close the ones it leaves."""
+    query.clear_sessions()
+    yield
+    query.clear_sessions()
+
+
+class TestParseStat:
+    """Tests for the parse_stat function."""
+
+    def test_basic(self) -> None:
+        """A basic stat should report the MOTD, map and player counts."""
+        payload = (
+            b"A server\x00SMP\x00world\x002\x0020\x00"
+            + struct.pack("<H", 25565)
+            + b"127.0.0.1\x00"
+        )
+
+        assert parse_stat(payload, full=False) == QueryResponse(
+            "A server", "world", 2, 20
+        )
+
+    def test_full(self) -> None:
+        """A full stat should also report the version, plugins and players."""
+        payload = (
+            b"splitnum\x00\x80\x00"
+            b"hostname\x00A server\x00gametype\x00SMP\x00version\x001.21.4\x00"
+            b"plugins\x00\x00map\x00world\x00numplayers\x002\x00maxplayers\x0020\x00"
+            b"\x00\x01player_\x00\x00Alex\x00Steve\x00\x00"
+        )
+
+        assert parse_stat(payload, full=True) == QueryResponse(
+            "A server",
+            "world",
+            2,
+            20,
+            version="1.21.4",
+            plugins="",
+            players=("Alex", "Steve"),
+        )
+
+    @pytest.mark.parametrize(
+        "payload, full",
+        [
+            (b"A server\x00SMP\x00world\x00two\x0020\x00", False),
+            (b"A server\x00SMP\x00", False),
+            (b"splitnum\x00\x80\x00hostname\x00A server\x00\x00", True),
+        ],
+    )
+    def test_invalid(self, payload: bytes, full: bool) -> None:
+        """Malformed payloads should raise IOError."""
+        with pytest.raises(IOError, match="Invalid query response"):
+            parse_stat(payload, full)
+
+
+class TestQuery:
+    """Tests for the query function against the stub server."""
+
+    def test_basic(self) -> None:
+        """A basic query should report the status of the server."""
+        with QueryStubServer() as server:
+            response = query.query(LOCALHOST, server.port, 1.0)
+
+        assert response == QueryResponse(server.motd, "world", 2, 20)
+
+    def test_full(self) -> None:
+        """A full query should list the players."""
+        with QueryStubServer() as server:
+            response = query.query(LOCALHOST, server.port, 1.0, full=True)
+
+        assert response.version == "1.21.4"
+        assert response.players == ("Alex", "Steve")
+
+    def test_token_reused(self) -> None:
+        """Later queries of the same process should skip the handshake."""
+        with QueryStubServer() as server:
+            for _ in range(3):
+                query.query(LOCALHOST, server.port, 1.0)
+
+        assert server.handshakes == 1
+        assert server.stats == 3
+
+    def test_expired_token(self, mocker: MockerFixture) -> None:
+        """Tokens older than TOKEN_LIFETIME should be replaced before querying."""
+        monotonic = mocker.patch("bluebeacon.query.time.monotonic", return_value=0.0)
+        with QueryStubServer() as server:
+            query.query(LOCALHOST, server.port, 1.0)
+            monotonic.return_value = query.TOKEN_LIFETIME
+            query.query(LOCALHOST, server.port, 1.0)
+
+        assert server.handshakes == 2
+
+    def test_rejected_token(self) -> None:
+        """A token the server forgot should time out once, then be replaced."""
+        with QueryStubServer() as server:
+            query.query(LOCALHOST, server.port, 1.0)
+            server.expire_tokens()
+
+            with pytest.raises(TimeoutError):
+                query.query(LOCALHOST, server.port, 0.05)
+            query.query(LOCALHOST, server.port, 1.0)
+
+        assert server.handshakes == 2
+        assert server.stats == 2
+
+    def test_refused(self) -> None:
+        """A closed query port should raise ConnectionRefusedError."""
+        with QueryStubServer(refuse=True) as server:
+            with pytest.raises(ConnectionRefusedError):
+                query.query(LOCALHOST, server.port, 1.0)
+
+    def test_lost_reply(self) -> None:
+        """A server that never answers should raise TimeoutError."""
+        with QueryStubServer(loss=1.0) as server:
+            with pytest.raises(TimeoutError):
+                query.query(LOCALHOST, server.port, 0.05)
+
+    def test_concurrent_queries(self) -> None:
+        """Concurrent queries of the same server should not share a socket."""
+        with QueryStubServer() as server:
+            session = query.acquire_session(LOCALHOST, server.port)
+            try:
+                response = query.query(LOCALHOST, server.port, 1.0)
+            finally:
+                session.close()
+
+        assert response.players_online == 2
+
+
+class TestAsyncQuery:
+    """Tests for the async_query coroutine against the stub server."""
+
+    def test_full(self) -> None:
+        """A full query should list the players."""
+        with QueryStubServer() as server:
+            response = asyncio.run(async_query(LOCALHOST, server.port, 1.0, True))
+
+        assert response.players == ("Alex", "Steve")
+
+    def test_token_reused(self) -> None:
+        """Sessions should be shared by the sync and async queries."""
+        with QueryStubServer() as server:
+            query.query(LOCALHOST, server.port, 1.0)
+            asyncio.run(async_query(LOCALHOST, server.port, 1.0))
+
+        assert server.handshakes == 1
+        assert server.stats == 2
+
+    def test_lost_reply(self) -> None:
+        """A server that never answers should raise TimeoutError."""
+        with QueryStubServer(loss=1.0) as server:
+            with pytest.raises(TimeoutError):
+                asyncio.run(async_query(LOCALHOST, server.port, 0.05))
@@ -0,0 +1,155 @@
+"""Tests for the resolver module."""
+
+import ipaddress
+import os
+import socket
+import time
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+
+from bluebeacon import state
+from bluebeacon.resolver import (
+    RESOLVE_TIMEOUT,
+    STALE_TTL,
+    TTL,
+    resolve,
+    timeout_until,
+)
+
+
+@pytest.fixture(autouse=True)
+def runtime_dir(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    """Keep resolved addresses inside a temporary runtime directory."""
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def lookups(monkeypatch: pytest.MonkeyPatch) -> List[str]:
+    """Resolve every name to 10.0.0.x, counting the lookups."""
+    names: List[str] = []
+
+    def getaddrinfo(host: str, *args: Any, **kwargs: Any) -> List[Any]:
+        names.append(host)
+        address = f"10.0.0.{len(names)}"
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, 0))]
+
+    monkeypatch.setattr("bluebeacon.resolver.socket.getaddrinfo", getaddrinfo)
+    return names
+
+
+def fail_lookups(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Make every lookup fail like an unknown name."""
+
+    def getaddrinfo(*args: Any, **kwargs: Any) -> List[Any]:
+        raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+
+    monkeypatch.setattr("bluebeacon.resolver.socket.getaddrinfo", getaddrinfo)
+
+
+class TestResolve:
+    """Tests for the resolve function."""
+
+    def test_cached_while_fresh(self, lookups: List[str]) -> None:
+        """A name should only be resolved again once its address expired."""
+        first = resolve("mc.internal", now=1000)
+        second = resolve("mc.internal", now=1000 + TTL - 1)
+        third = resolve("mc.internal", now=1000 + TTL + 1)
+
+        assert first == second == ipaddress.IPv4Address("10.0.0.1")
+        assert third == ipaddress.IPv4Address("10.0.0.2")
+        assert lookups == ["mc.internal", "mc.internal"]
+
+    def test_separate_names(self, lookups: List[str]) -> None:
+        """Every name should have its own cached address."""
+        resolve("a.internal", now=1000)
+
+        assert resolve("b.internal", now=1000) == ipaddress.IPv4Address("10.0.0.2")
+
+    def test_serve_stale(
+        self, lookups: List[str], monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """An expired address should be used while the name can't be resolved."""
+        resolve("mc.internal", now=1000)
+        fail_lookups(monkeypatch)
+
+        address = resolve("mc.internal", now=1000 + TTL + STALE_TTL - 1)
+
+        assert address == ipaddress.IPv4Address("10.0.0.1")
+
+    def test_stale_too_old(
+        self, lookups: List[str], monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """An address expired for longer than STALE_TTL should not be used."""
+        resolve("mc.internal", now=1000)
+        fail_lookups(monkeypatch)
+
+        with pytest.raises(OSError, match="Could not resolve mc.internal"):
+            resolve("mc.internal", now=1000 + TTL + STALE_TTL + 1)
+
+    def test_unknown_name(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """A name that can't be resolved should raise OSError."""
+        fail_lookups(monkeypatch)
+
+        with pytest.raises(OSError, match="Could not resolve mc.internal"):
+            resolve("mc.internal")
+
+    def test_slow_resolver(
+        self, lookups: List[str], monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """A resolver slower than the timeout should not delay the check."""
+        resolve("mc.internal", now=1000)
+
+        def getaddrinfo(*args: Any, **kwargs: Any) -> List[Any]:
+            time.sleep(1.0)
+            return []
+
+        monkeypatch.setattr("bluebeacon.resolver.socket.getaddrinfo", getaddrinfo)
+
+        start = time.perf_counter()
+        address = resolve("mc.internal", timeout=0.05, now=1000 + TTL + 1)
+        elapsed = time.perf_counter() - start
+
+        assert address == ipaddress.IPv4Address("10.0.0.1")
+        assert elapsed < 0.5
+
+        with pytest.raises(OSError, match="took longer than"):
+            resolve("other.internal", timeout=0.05)
+
+    def test_localhost(self) -> None:
+        """The system resolver should be used for real names."""
+        assert resolve("localhost").is_loopback
+
+    @pytest.mark.skipif(os.getuid() != 0, reason="requires root to chown")
+    def test_ignores_foreign_file(self, lookups: List[str]) -> None:
+        """Addresses cached by another user should not be trusted."""
+        resolve("mc.internal", now=1000)
+        os.chown(state.state_file("mc.internal", "dns"), 12345, 12345)
+
+        resolve("mc.internal", now=1001)
+
+        assert len(lookups) == 2
+
+
+class TestTimeoutUntil:
+    """Tests for the timeout_until function."""
+
+    def test_without_deadline(self) -> None:
+        """Without a deadline the full resolve timeout should be used."""
+        assert timeout_until(None) == RESOLVE_TIMEOUT
+
+    def test_deadline(self) -> None:
+        """A close deadline should cut the timeout to what is left."""
+        timeout = timeout_until(time.monotonic() + 0.2)
+
+        assert 0.1 < timeout <= 0.2
+
+    def test_far_deadline(self) -> None:
+        """A distant deadline should not raise the timeout."""
+        assert timeout_until(time.monotonic() + 60) == RESOLVE_TIMEOUT
+
+    def test_passed_deadline(self) -> None:
+        """Once the deadline has passed there should be no time left."""
+        assert timeout_until(time.monotonic() - 1) == 0
@@ -0,0 +1,80 @@
+"""Tests for the startup cost of the CLI.
+
+Every healthcheck starts a new process, so the time spent importing modules is paid
+on each check. These tests import the CLI in a fresh interpreter with
+``python -X importtime`` and fail if it becomes noticeably more expensive.
+"""
+
+import subprocess
+import sys
+from typing import Dict, List
+
+import pytest
+
+# Cumulative import time of bluebeacon.cli in microseconds. Importing the CLI takes
+# about 60 ms on a typical machine, the budget leaves room for slower CI runners.
+IMPORT_BUDGET_US = 200_000
+
+# Modules that are only needed by some commands and must not be loaded on import
+DEFERRED_MODULES = [
+    "asyncio",
+    "importlib.metadata",
+    "javaproperties",
+    "mcstatus",
+    "tomllib",
+    "yaml",
+]
+
+
+def import_times(args: List[str]) -> Dict[str, int]:
+    """Run Python with ``-X importtime`` and return the cumulative time per module."""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line.split("|")
+        if cumulative.strip().isdigit():
+            times[module.strip()] = int(cumulative)
+
+    return times
+
+
+class TestStartup:
+    """Tests for the import cost of the CLI."""
+
+    def test_cli_import_within_budget(self) -> None:
+        """Importing the CLI should stay within the time budget."""
+        # Take the best of a few runs to filter out noise from other processes
+        cumulative = min(
+            import_times(["-c", "import bluebeacon.cli"])["bluebeacon.cli"]
+            for _ in range(3)
+        )
+
+        assert cumulative < IMPORT_BUDGET_US, (
+            f"Importing bluebeacon.cli took {cumulative / 1000:.1f} ms, "
+            f"the budget is {IMPORT_BUDGET_US / 1000:.0f} ms"
+        )
+
+    @pytest.mark.parametrize("module", DEFERRED_MODULES)
+    def test_cli_import_defers_modules(self, module: str) -> None:
+        """Importing the CLI should not load parsers or protocol clients."""
+        assert module not in import_times(["-c", "import bluebeacon.cli"])
+
+    def test_ping_import_defers_mcstatus(self) -> None:
+        """mcstatus should only be loaded once a status ping needs it."""
+        assert "mcstatus" not in import_times(["-c", "import bluebeacon.ping"])
+
+    @pytest.mark.parametrize(
+        "module",
+        [module for module in DEFERRED_MODULES if module != "importlib.metadata"],
+    )
+    def test_version_defers_modules(self, module: str) -> None:
+        """--version should not load parsers or protocol clients."""
+        assert module not in import_times(["-m", "bluebeacon.cli", "--version"])
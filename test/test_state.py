@@ -0,0 +1,69 @@
+"""Tests for the state module."""
+
+from pathlib import Path
+
+import pytest
+
+from bluebeacon.state import runtime_dir, state_file, write_atomic
+
+
+class TestRuntimeDir:
+    """Tests for the runtime_dir function."""
+
+    def test_uses_xdg_runtime_dir(
+        self, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+    ) -> None:
+        """$XDG_RUNTIME_DIR should be preferred when it is set."""
+        monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+        assert runtime_dir() == tmp_path
+
+    def test_falls_back_to_tempdir(
+        self, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+    ) -> None:
+        """The temporary directory should be used without $XDG_RUNTIME_DIR."""
+        monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+        monkeypatch.setattr("tempfile.gettempdir", lambda: str(tmp_path))
+        assert runtime_dir() == tmp_path
+
+
+class TestStateFile:
+    """Tests for the state_file function."""
+
+    def test_stable_for_same_key(
+        self, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+    ) -> None:
+        """The same key and suffix should always map to the same file."""
+        monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+        path = state_file("/srv/server.properties", "cache")
+        assert path == state_file("/srv/server.properties", "cache")
+        assert path.parent == tmp_path
+        assert path.suffix == ".cache"
+
+    def test_differs_by_key(self) -> None:
+        """Different keys should map to different files."""
+        assert state_file("/a/server.properties", "cache") != state_file(
+            "/b/server.properties", "cache"
+        )
+
+
+class TestWriteAtomic:
+    """Tests for the write_atomic function."""
+
+    def test_replaces_contents(self, tmp_path: Path) -> None:
+        """The file should contain the new data and no temporary file remains."""
+        path = tmp_path / "state"
+        path.write_bytes(b"old")
+
+        write_atomic(path, b"new")
+
+        assert path.read_bytes() == b"new"
+        assert list(tmp_path.iterdir()) == [path]
+
+    def test_raises_on_error(self, tmp_path: Path) -> None:
+        """Errors should be raised without leaving a temporary file behind."""
+        path = tmp_path / "missing" / "state"
+
+        with pytest.raises(OSError):
+            write_atomic(path, b"new")
+
+        assert list(tmp_path.iterdir()) == []
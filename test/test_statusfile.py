@@ -0,0 +1,146 @@
+"""Tests for the statusfile module."""
+
+import threading
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from bluebeacon import statusfile
+from bluebeacon.ping import PingResult
+from bluebeacon.statusfile import (
+    RECORD_SIZE,
+    SEQUENCE,
+    SEQUENCE_OFFSET,
+    StatusFileWriter,
+    StatusRecord,
+    read_status_file,
+)
+
+
+@pytest.fixture
+def writer(tmp_path: Path) -> Iterator[StatusFileWriter]:
+    """Create a status file in a temporary directory."""
+    writer = StatusFileWriter(tmp_path / "bluebeacon.status")
+    yield writer
+    writer.close()
+
+
+class TestStatusFile:
+    """Tests for writing and reading status files."""
+
+    def test_no_result_yet(self, writer: StatusFileWriter) -> None:
+        """A new status file should have no result."""
+        assert writer.path.stat().st_size == RECORD_SIZE
+        assert read_status_file(writer.path) is None
+
+    def test_success(self, writer: StatusFileWriter) -> None:
+        """A successful ping should be read back with its latency."""
+        writer.publish(PingResult(True, "java", 0.0125), timestamp=1700000000.5)
+
+        assert read_status_file(writer.path) == StatusRecord(
+            2, 1700000000.5, True, 0.0125, None
+        )
+
+    @pytest.mark.parametrize(
+        "error, expected",
+        [
+            ("timeout", "timeout"),
+            ("refused", "refused"),
+            ("not listening", "not listening"),
+            ("error", "error"),
+            ("something else", "error"),
+        ],
+    )
+    def test_failure(self, writer: StatusFileWriter, error: str, expected: str) -> None:
+        """A failed ping should be read back with its failure reason."""
+        writer.publish(PingResult(False, error=error), timestamp=1.0)
+
+        assert read_status_file(writer.path) == StatusRecord(
+            2, 1.0, False, None, expected
+        )
+
+    def test_updated_in_place(self, writer: StatusFileWriter) -> None:
+        """Every result should update the same file and count up the sequence."""
+        inode = writer.path.stat().st_ino
+        writer.publish(PingResult(True, "java", 0.001))
+        writer.publish(PingResult(False, error="timeout"))
+
+        record = read_status_file(writer.path)
+
+        assert record is not None
+        assert (record.sequence, record.success) == (4, False)
+        assert writer.path.stat().st_ino == inode
+
+    def test_kept_after_close(self, tmp_path: Path) -> None:
+        """The latest result should stay readable after the writer is closed."""
+        writer = StatusFileWriter(tmp_path / "bluebeacon.status")
+        writer.publish(PingResult(True, "java", 0.001))
+        writer.close()
+
+        record = read_status_file(writer.path)
+
+        assert record is not None and record.success
+
+    def test_concurrent_reads(self, writer: StatusFileWriter) -> None:
+        """Readers should never see a record mixing two updates."""
+        stop = threading.Event()
+
+        def publish() -> None:
+            value = 0
+            while not stop.is_set():
+                value += 1
+                writer.publish(PingResult(True, "java", value), timestamp=value)
+
+        thread = threading.Thread(target=publish)
+        thread.start()
+        try:
+            for _ in range(2000):
+                record = read_status_file(writer.path)
+                if record is not None:
+                    assert record.latency == record.timestamp
+        finally:
+            stop.set()
+            thread.join()
+
+
+class TestInvalidStatusFile:
+    """Tests for reading files that are not valid status files."""
+
+    @pytest.mark.parametrize(
+        "content",
+        [b"", b"BBST", b"NOPE" + bytes(RECORD_SIZE - 4)],
+    )
+    def test_not_a_status_file(self, tmp_path: Path, content: bytes) -> None:
+        """Short files and files with another magic should be rejected."""
+        path = tmp_path / "bluebeacon.status"
+        path.write_bytes(content)
+
+        with pytest.raises(ValueError, match="Not a BlueBeacon status file"):
+            read_status_file(path)
+
+    def test_unsupported_version(self, writer: StatusFileWriter) -> None:
+        """Status files of another format version should be rejected."""
+        data = bytearray(writer.path.read_bytes())
+        data[4:6] = (2).to_bytes(2, "little")
+        writer.path.write_bytes(data)
+
+        with pytest.raises(ValueError, match="Unsupported status file version 2"):
+            read_status_file(writer.path)
+
+    def test_write_in_progress(
+        self, writer: StatusFileWriter, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """A record that stays half-written should not be read."""
+        monkeypatch.setattr(statusfile, "READ_ATTEMPTS", 3)
+        data = bytearray(writer.path.read_bytes())
+        SEQUENCE.pack_into(data, SEQUENCE_OFFSET, 1)
+        writer.path.write_bytes(data)
+
+        with pytest.raises(ValueError, match="changing too fast"):
+            read_status_file(writer.path)
+
+    def test_missing(self, tmp_path: Path) -> None:
+        """A missing status file should raise OSError."""
+        with pytest.raises(OSError):
+            read_status_file(tmp_path / "bluebeacon.status")